@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pipeline stages and helpers on synthetic HMDA data, and compare results between commits.
+
+Usage:
+    python scripts/benchmark.py generate --scale 1m                      # synthetic raw data into the 1m workspace
+    python scripts/benchmark.py generate --rows 250000 --output data/interim/synthetic.parquet
+    python scripts/benchmark.py run                                      # default scales from configs/benchmark.yaml
+    python scripts/benchmark.py run --scales 100k 1m --only model_helpers.score_predictions --repeats 3
+    python scripts/benchmark.py compare abc1234                          # abc1234 against the latest run
+
+Every run is appended to reports/benchmarks/benchmark_results.csv under the current commit.
+"""
+
+import argparse
+import os
+import sys
+
+# Plots are only saved to disk when running headless
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+os.environ.setdefault("PYTHONPATH", project_root)
+os.environ.setdefault("PROJECT_ROOT", project_root)
+
+import src.helpers.benchmark_helpers as bh
+import src.helpers.synthetic_data_helpers as sd
+
+
+def generate(args):
+    if args.scale:
+        bh.prepare_scale(args.scale)
+    else:
+        sd.generate_raw_parquet(args.rows, args.output, seed=args.seed)
+
+
+def run(args):
+    results = bh.run_benchmarks(args.scales, args.only, args.repeats)
+    print(results[["scale", "benchmark", "repeat", "status", "seconds", "peak_memory_mb"]].to_string(index=False))
+    return 0 if (results["status"] == "ok").all() else 1
+
+
+def compare(args):
+    comparison = bh.compare_results(args.base, args.head, args.threshold)
+    print(comparison.round(3).to_string())
+    return 1 if comparison["regression"].any() else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark stages and helpers on synthetic HMDA data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_generate = sub.add_parser("generate", help="Write synthetic raw HMDA Parquet")
+    p_generate.add_argument("--scale", help="A scale from configs/benchmark.yaml, written to its workspace")
+    p_generate.add_argument("--rows", type=int, default=100_000, help="Rows to write (without --scale)")
+    p_generate.add_argument("--output", help="Parquet path (default: hmda_raw)")
+    p_generate.add_argument("--seed", type=int, default=42)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and append the results")
+    p_run.add_argument("--scales", nargs="*", help="Scales to run (default: default_scales)")
+    p_run.add_argument("--only", nargs="*", help="Stage or helper benchmark names (default: all)")
+    p_run.add_argument("--repeats", type=int, default=None, help="Runs per benchmark (default: from config)")
+
+    p_compare = sub.add_parser("compare", help="Compare two commits' results")
+    p_compare.add_argument("base", help="Baseline commit (short hash)")
+    p_compare.add_argument("head", nargs="?", help="Commit to compare (default: latest recorded)")
+    p_compare.add_argument("--threshold", type=float, default=None, help="Regression ratio (default: from config)")
+
+    args = parser.parse_args()
+    sys.exit({"generate": generate, "run": run, "compare": compare}[args.command](args) or 0)
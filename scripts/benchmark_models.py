@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compare cold-load time and per-worker memory of the gzip pickles against the uncompressed mmap format.
+
+Usage:
+    python scripts/benchmark_models.py                              # every saved *_model
+    python scripts/benchmark_models.py --models hgbm_model mlp_model --workers 8
+    python scripts/benchmark_models.py --migrate                    # rewrite gzip pickles in the mmap format
+
+pss_mb counts shared pages once across the workers; private_mb is memory no other worker can share.
+"""
+
+import argparse
+import os
+import sys
+
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+os.environ.setdefault("PYTHONPATH", project_root)
+os.environ.setdefault("PROJECT_ROOT", project_root)
+
+import pandas as pd
+import src.utils.model_registry as mr
+
+
+def main(models, workers, migrate):
+    models = models or list(mr.list_models())
+    if migrate:
+        for key in models:
+            print(f"{key}: {'migrated' if mr.migrate_legacy(key) else 'already mmap'}")
+        return
+
+    rows = [row for key in models for row in mr.benchmark_load(key, n_workers=workers)]
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model load time and memory per worker")
+    parser.add_argument("--models", nargs="*", help="paths.yaml model keys (default: every saved *_model)")
+    parser.add_argument("--workers", type=int, default=4, help="Processes loading the model at once")
+    parser.add_argument("--migrate", action="store_true", help="Rewrite gzip pickles in the mmap format instead")
+    args = parser.parse_args()
+
+    main(args.models, args.workers, args.migrate)
@@ -4,12 +4,30 @@ Convert HMDA 2024 pipe-delimited (.txt) dataset to Parquet format.
 
 Usage:
     python scripts/raw_to_parquet.py --input data/raw/2024_combined_mlar_header.txt --output data/interim/2024_combined_mlar_header.parquet
+
+Streaming mode reads the file in blocks with a multithreaded Arrow reader and writes one Parquet row group
+per block, so peak memory is bounded by --block-size-mb instead of the size of the file:
+    python scripts/raw_to_parquet.py --input ... --output ... --streaming --apply-schema --drop-unused
 """
 
 import argparse
+import os
+import sys
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 from pathlib import Path
 
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.utils.arrow_utils as au
+
 
 def main(input_path: str, output_path: str):
     input_path = Path(input_path)
@@ -34,10 +52,89 @@ def main(input_path: str, output_path: str):
     print("Conversion complete.")
 
 
+def read_header(input_path: Path) -> list[str]:
+    with input_path.open("r") as f:
+        return [c.strip() for c in f.readline().rstrip("\r\n").split("|")]
+
+
+def build_column_types(columns: list[str], cfg_schema: dict, apply_schema: bool) -> dict:
+    """
+    Every column is read as a string so the reader never has to infer types from the first block.
+    With apply_schema, numeric columns get their schema.yaml type; exempt columns stay strings because
+    the "Exempt" token is split out into its own flag during cleaning.
+    """
+    types = {}
+    for col in columns:
+        spec = (cfg_schema.get("columns") or {}).get(col, {})
+        arrow_type = su.get_arrow_type(cfg_schema, col) if apply_schema else None
+        if arrow_type is None or spec.get("exempt"):
+            arrow_type = pa.string()
+        types[col] = arrow_type
+    return types
+
+
+def stream_convert(input_path: str, output_path: str, apply_schema: bool = False, drop_unused: bool = False,
+                   block_size_mb: int = 64):
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+
+    cfg_schema = fu.load_config("schema")
+    sentinels = fu.load_config("clean")["clean"].get("sentinels") or {}
+
+    columns = read_header(input_path)
+    if drop_unused:
+        dropped = set(su.get_columns_by_attribute(cfg_schema, "role", "drop"))
+        columns = [c for c in columns if c not in dropped]
+
+    column_types = build_column_types(columns, cfg_schema, apply_schema)
+    schema = pa.schema([(c, column_types[c]) for c in columns])
+
+    reader = pv.open_csv(
+        input_path,
+        read_options=pv.ReadOptions(block_size=block_size_mb * 1024 * 1024, use_threads=True),
+        parse_options=pv.ParseOptions(delimiter="|"),
+        convert_options=pv.ConvertOptions(
+            column_types={c: pa.string() for c in columns},  # cast ourselves so bad values become nulls
+            include_columns=columns,
+            null_values=au.NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+
+    print(f"Streaming raw file: {input_path}")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    with pq.ParquetWriter(output_path, schema, compression="snappy") as writer:
+        for batch in reader:
+            arrays = []
+            for col in columns:
+                arr = batch.column(col)
+                if col in sentinels:
+                    arr = au.null_tokens(arr, sentinels[col])
+                if column_types[col] != pa.string():
+                    arr = au.coerce_numeric(arr, column_types[col])
+                arrays.append(arr)
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            n_rows += batch.num_rows
+
+    print(f"Wrote {n_rows:,} rows and {len(columns)} columns to: {output_path}")
+    print("Conversion complete.")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convert HMDA TXT to Parquet")
     parser.add_argument("--input", required=True, help="Path to input .txt file")
     parser.add_argument("--output", required=True, help="Path to output .parquet file")
+    parser.add_argument("--streaming", action="store_true", help="Convert in blocks with bounded memory")
+    parser.add_argument("--apply-schema", action="store_true", help="Cast numeric columns to their schema.yaml dtype (streaming only)")
+    parser.add_argument("--drop-unused", action="store_true", help="Skip columns with role: drop in schema.yaml (streaming only)")
+    parser.add_argument("--block-size-mb", type=int, default=64, help="Size of each streamed block / row group in MB")
     args = parser.parse_args()
 
-    main(args.input, args.output)
\ No newline at end of file
+    if (args.apply_schema or args.drop_unused) and not args.streaming:
+        parser.error("--apply-schema and --drop-unused require --streaming")
+
+    if args.streaming:
+        stream_convert(args.input, args.output, args.apply_schema, args.drop_unused, args.block_size_mb)
+    else:
+        main(args.input, args.output)
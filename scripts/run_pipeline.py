@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Run the project pipeline (the 01-04 notebooks) headless, as a DAG of cached stages.
+
+Usage:
+    python scripts/run_pipeline.py                              # everything
+    python scripts/run_pipeline.py --targets train_hgbm --jobs 4
+    python scripts/run_pipeline.py --list
+    python scripts/run_pipeline.py --targets model_dataset --trace     # also write a trace to reports/traces
+
+Independent stages run in parallel processes. Stages whose inputs, config and code are unchanged are skipped,
+so re-running after a failure picks up where it stopped.
+"""
+
+import argparse
+import os
+import sys
+
+# Plots are only saved to disk when running headless
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+os.environ.setdefault("PYTHONPATH", project_root)
+os.environ.setdefault("PROJECT_ROOT", project_root)
+
+import src.utils.pipeline_utils as pu
+import src.utils.trace_utils as tu
+
+REGISTRY = "src.helpers.pipeline_helpers"
+
+
+def main(targets, jobs, force, list_only, trace=None):
+    if list_only:
+        dag = pu.build_dag(pu.load_stages(REGISTRY))
+        for name in pu.topological_order(dag):
+            deps = ", ".join(sorted(dag[name])) or "-"
+            print(f"{name:24s} <- {deps}")
+        return 0
+
+    if trace is not None:
+        tu.enable(trace or None, fresh=True)
+    status = pu.run_pipeline(REGISTRY, targets=targets, max_workers=jobs, force=force)
+    if trace is not None:
+        tu.export()
+        print(tu.summarize(tu.load_spans(os.environ[tu.TRACE_DIR_ENV])).head(20).to_string())
+    failed = sorted(name for name, s in status.items() if s in ("failed", "skipped"))
+    if failed:
+        print(f"Pipeline incomplete. Failed or skipped: {', '.join(failed)}")
+        return 1
+
+    print("Pipeline complete.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the HMDA pipeline as a DAG of cached stages")
+    parser.add_argument("--targets", nargs="*", help="Stages to bring up to date (plus their upstream stages)")
+    parser.add_argument("--jobs", type=int, default=None, help="Maximum stages running at once (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-run the selected stages even if cached")
+    parser.add_argument("--list", action="store_true", help="Print the stages and their dependencies")
+    parser.add_argument("--trace", nargs="?", const="", default=None, metavar="DIR",
+                        help="Trace every helper call into DIR (default: reports/traces) as JSON and Chrome trace")
+    args = parser.parse_args()
+
+    sys.exit(main(args.targets, args.jobs, args.force, args.list, args.trace))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Score applications with a trained model, in bulk or over a local HTTP endpoint.
+
+Usage:
+    python scripts/score.py batch --model hgbm --output data/processed/hgbm_scores.parquet
+    python scripts/score.py batch --model log_reg --input new_apps.parquet --output scores.parquet --workers 8 --threshold 0.42
+    python scripts/score.py serve --model hgbm --port 8080
+
+Input rows use the hmda_2024_model columns, or the hmda_2024_typed columns (imputed and one-hot encoded with the
+fitted feature_imputer / ohe_encoder). Out-of-core models (e.g. sgd_log_reg) are scored the same way. Batch mode prints rows/sec and per-batch p99 latency;
+serve mode reports the same for requests at GET /stats.
+"""
+
+import argparse
+import os
+import sys
+
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+os.environ.setdefault("PYTHONPATH", project_root)
+os.environ.setdefault("PROJECT_ROOT", project_root)
+
+import src.utils.file_utils as fu
+import src.utils.serving_utils as sv
+import src.helpers.scoring_helpers as sh
+
+
+def batch(args):
+    input_path = args.input or fu.get_path("hmda_2024_model")
+    sh.score_parquet(args.model, input_path, args.output, batch_size=args.batch_size, n_workers=args.workers,
+                     keep_columns=args.keep_columns, threshold=args.threshold)
+
+
+def serve(args):
+    scorer = sh.load_scorer(args.model)
+    batcher = sv.MicroBatcher(lambda df: sh.score_frame(scorer, df),
+                              max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms)
+    server = sv.make_server(batcher, host=args.host, port=args.port)
+    print(f"Serving {args.model} on http://{args.host}:{args.port} (POST /score, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(batcher.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score HMDA applications with a trained model")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_batch = sub.add_parser("batch", help="Score a Parquet file")
+    p_batch.add_argument("--model", required=True, help="Model name, e.g. log_reg, hgbm, sgd_log_reg")
+    p_batch.add_argument("--input", help="Parquet file in hmda_2024_model or hmda_2024_typed format (default: hmda_2024_model)")
+    p_batch.add_argument("--output", required=True, help="Parquet file to write scores to")
+    p_batch.add_argument("--batch-size", type=int, default=100_000, help="Rows per batch")
+    p_batch.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count)")
+    p_batch.add_argument("--keep-columns", nargs="*", default=None, help="Input columns to copy to the output")
+    p_batch.add_argument("--threshold", type=float, default=None, help="Also write a 0/1 prediction at this threshold")
+    p_batch.set_defaults(func=batch)
+
+    p_serve = sub.add_parser("serve", help="Serve a micro-batching HTTP endpoint")
+    p_serve.add_argument("--model", required=True, help="Model name, e.g. log_reg, hgbm, sgd_log_reg")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8080)
+    p_serve.add_argument("--max-batch-rows", type=int, default=1024, help="Flush a batch at this many rows")
+    p_serve.add_argument("--max-wait-ms", type=float, default=5.0, help="Flush a batch after its first request waited this long")
+    p_serve.set_defaults(func=serve)
+
+    args = parser.parse_args()
+    args.func(args)
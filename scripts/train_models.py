@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Train several models at once under one CPU budget, instead of one after another on every core each.
+
+Usage:
+    python scripts/train_models.py                                  # every model spec, all CPUs
+    python scripts/train_models.py --models hgbm random_forest --cpus 16
+    python scripts/train_models.py --fraction 0.02
+
+Wall time and peak memory per model go to training_runs_csv; each model's metrics CSV keeps only test metrics.
+"""
+
+import argparse
+import os
+import sys
+
+# Plots are only saved to disk when running headless
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Make src importable when run as a script from the project root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+os.environ.setdefault("PYTHONPATH", project_root)
+os.environ.setdefault("PROJECT_ROOT", project_root)
+
+import src.helpers.orchestration_helpers as oh
+
+
+def main(models, cpus, fraction):
+    summary = oh.train_models(models, cpu_budget=cpus, fraction=fraction)
+    print(summary.to_string())
+    return 0 if (summary["status"] == "ok").all() else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train model specs concurrently under a CPU budget")
+    parser.add_argument("--models", nargs="*", help="training_helpers.MODEL_SPECS keys (default: all)")
+    parser.add_argument("--cpus", type=int, default=None, help="Threads shared by all models (default: CPU count)")
+    parser.add_argument("--fraction", type=float, default=None, help="Training sample fraction (default: per model spec)")
+    args = parser.parse_args()
+
+    sys.exit(main(args.models, args.cpus, args.fraction))
@@ -0,0 +1,151 @@
+# src/helpers/association_helpers.py
+from __future__ import annotations
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import scipy.stats as stats
+import src.utils.arrow_utils as au
+import src.helpers.encoding_helpers as enc
+
+ASSOCIATION_COLUMNS = ["feature_1", "feature_2", "measure", "value", "p_value", "n"]
+
+# Pairs whose full table would have more cells than this (e.g. census_tract x county_code) are counted sparsely
+MAX_DENSE_CELLS = 1 << 24
+
+
+def encode_categories(df: pd.DataFrame, cols: list[str]) -> tuple[np.ndarray, list[list]]:
+    """
+    Dictionary-encode each column once. Returns an (n_rows, n_cols) int32 code block and each column's labels.
+    Missing values get their own code (the last label, None), as astype(str) made them their own category.
+    """
+    codes = np.empty((len(df), len(cols)), dtype=np.int32, order="F")
+    labels = []
+    for j, col in enumerate(cols):
+        encoded = pc.dictionary_encode(enc.to_arrow(df[col]))
+        codes[:, j] = encoded.indices.fill_null(len(encoded.dictionary)).to_numpy(zero_copy_only=False)
+        labels.append(encoded.dictionary.to_pylist() + [None])
+    return codes, labels
+
+
+def contingency_table(a: np.ndarray, n_a: int, b: np.ndarray, n_b: int) -> np.ndarray:
+    """
+    Counts of every (a, b) code pair in one bincount over the combined code a * n_b + b.
+    """
+    return np.bincount(a.astype(np.int64) * n_b + b, minlength=n_a * n_b).reshape(n_a, n_b)
+
+
+def cramers_v_from_table(table: np.ndarray) -> tuple[float, float, int]:
+    """
+    Cramér's V, the chi-square p-value and n. Categories never observed are dropped, as pd.crosstab did.
+    """
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    n = int(table.sum())
+    r, k = table.shape
+    if min(r, k) < 2:
+        return np.nan, np.nan, n
+
+    chi2, p = stats.chi2_contingency(table)[:2]
+    return float(np.sqrt(chi2 / n / min(k - 1, r - 1))), float(p), n
+
+
+def sparse_cramers_v(a: np.ndarray, n_a: int, b: np.ndarray, n_b: int) -> tuple[float, float, int]:
+    """
+    cramers_v_from_table from the observed (a, b) pairs only, for tables too large to hold densely.
+    Over the non-empty cells chi2 = n * (sum O^2 / (row total * column total) - 1), chi2_contingency's
+    statistic (its 2x2 continuity correction never applies to tables this large).
+    """
+    keys, counts = np.unique(a.astype(np.int64) * n_b + b, return_counts=True)
+    rows, cols = keys // n_b, keys % n_b
+    counts = counts.astype(np.float64)
+    row_totals = np.bincount(rows, weights=counts, minlength=n_a)
+    col_totals = np.bincount(cols, weights=counts, minlength=n_b)
+    n = int(counts.sum())
+    r, k = int((row_totals > 0).sum()), int((col_totals > 0).sum())
+    if min(r, k) < 2:
+        return np.nan, np.nan, n
+
+    chi2 = n * (np.sum(counts * counts / (row_totals[rows] * col_totals[cols])) - 1)
+    p = stats.chi2.sf(chi2, (r - 1) * (k - 1))
+    return float(np.sqrt(chi2 / n / min(k - 1, r - 1))), float(p), n
+
+
+def pearson(x: np.ndarray, y: np.ndarray) -> tuple[float, float, int]:
+    """
+    Pearson r over the rows where both are present, its two-sided p-value and n.
+    With a 0/1 y this is the point-biserial correlation.
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    n = len(x)
+    if n < 3 or x.min() == x.max() or y.min() == y.max():
+        return np.nan, np.nan, n
+
+    dx, dy = x - x.mean(), y - y.mean()
+    r = float(np.clip((dx @ dy) / np.sqrt((dx @ dx) * (dy @ dy)), -1.0, 1.0))
+    t = r * np.sqrt((n - 2) / max(1 - r * r, 1e-300))
+    return r, float(2 * stats.t.sf(abs(t), n - 2)), n
+
+
+def _as_float(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pc.cast(enc.to_arrow(df[col]), "float64").to_numpy(zero_copy_only=False)
+
+
+def _cramers_v_task(a: np.ndarray, n_a: int, b: np.ndarray, n_b: int, batch_size: int):
+    if n_a * n_b > MAX_DENSE_CELLS:
+        return sparse_cramers_v(a, n_a, b, n_b)
+    # Tables from row batches add up, so only one batch's combined codes are materialized at a time
+    table = sum(contingency_table(a[s:s + batch_size], n_a, b[s:s + batch_size], n_b)
+                for s in range(0, max(len(a), 1), batch_size))
+    return cramers_v_from_table(table)
+
+
+def compute_associations(df: pd.DataFrame, category_cols: list[str], numeric_cols: list[str], target: str | None = None,
+                         pairs: bool = True, max_rows: int | None = None, batch_size: int = 2_000_000,
+                         n_threads: int | None = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    Association of every feature with the target and, with pairs=True, of every feature pair, as one tidy frame.
+    - categorical x categorical / target: Cramér's V from contingency tables built by bincount on integer codes
+    - numeric x target and numeric x two-category feature: point-biserial; numeric x numeric: Pearson
+      (for two-category features the sign follows the order the categories first appear in)
+    Categories are encoded once, tables are summed over row batches and the pairs run on a thread pool.
+    max_rows samples the rows first, which keeps the all-pairs screen affordable on the full dataset.
+    """
+    if max_rows is not None and len(df) > max_rows:
+        df = df.sample(n=max_rows, random_state=random_state)
+
+    codes, labels = encode_categories(df, category_cols)
+    sizes = [len(lab) for lab in labels]
+    numeric = {col: _as_float(df, col) for col in numeric_cols}
+
+    # (feature_1, feature_2, measure, fn) with fn returning (value, p_value, n)
+    tasks = []
+    if target is not None:
+        y = _as_float(df, target)
+        # crosstab dropped rows with a missing target
+        known = ~np.isnan(y)
+        y_codes, y_labels = encode_categories(df[[target]], [target])
+        tasks += [
+            (col, target, "cramers_v", lambda j=j: _cramers_v_task(codes[known, j], sizes[j], y_codes[known, 0],
+                                                                   len(y_labels[0]), batch_size))
+            for j, col in enumerate(category_cols)
+        ]
+        tasks += [(col, target, "point_biserial", lambda col=col: pearson(numeric[col], y)) for col in numeric_cols]
+
+    if pairs:
+        tasks += [
+            (category_cols[i], category_cols[j], "cramers_v",
+             lambda i=i, j=j: _cramers_v_task(codes[:, i], sizes[i], codes[:, j], sizes[j], batch_size))
+            for i, j in combinations(range(len(category_cols)), 2)
+        ]
+        tasks += [(a, b, "pearson", lambda a=a, b=b: pearson(numeric[a], numeric[b])) for a, b in combinations(numeric_cols, 2)]
+        # Two observed categories and no missing values: codes are already 0/1
+        binary = [j for j in range(len(category_cols)) if sizes[j] == 3 and codes[:, j].max(initial=0) < 2]
+        tasks += [
+            (col, category_cols[j], "point_biserial", lambda col=col, j=j: pearson(numeric[col], codes[:, j].astype(np.float64)))
+            for col in numeric_cols for j in binary
+        ]
+
+    rows = au.map_batches(lambda task: (*task[:3], *task[3]()), tasks, n_threads=n_threads)
+    return pd.DataFrame(list(rows), columns=ASSOCIATION_COLUMNS)
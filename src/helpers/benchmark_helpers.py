@@ -0,0 +1,264 @@
+# src/helpers/benchmark_helpers.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import multiprocessing
+import os
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import src.utils.cache_utils as cu
+import src.utils.file_utils as fu
+import src.helpers.orchestration_helpers as oh
+import src.helpers.synthetic_data_helpers as sd
+
+RESULT_COLUMNS = ["commit", "dirty", "timestamp", "scale", "rows", "kind", "benchmark", "repeat", "status",
+                  "seconds", "peak_memory_mb", "baseline_memory_mb"]
+
+
+def _benchmark_cfg() -> dict:
+    return fu.load_config("benchmark").get("benchmark") or {}
+
+
+def scale_rows(scale: str) -> int:
+    return int(_benchmark_cfg()["scales"][scale])
+
+
+# Helper benchmarks. Each setup runs inside the scale's workspace after the stages and returns the call to time,
+# so loading its inputs counts toward memory but not time.
+def _setup_convert_by_schema():
+    import src.helpers.clean_helpers as chelp
+    df, cfg_schema = fu.load_parquet("hmda_raw"), fu.load_config("schema")
+    return lambda: chelp.convert_by_schema(df, cfg_schema)
+
+
+def _setup_plan_column_types():
+    import src.utils.memory_utils as mu
+    return lambda: mu.plan_column_types("hmda_2024_typed")
+
+
+def _setup_compute_associations():
+    import src.utils.schema_utils as su
+    import src.helpers.association_helpers as ah
+    df = fu.load_parquet("hmda_2024_typed")
+    cfg_schema = fu.load_config("schema")
+    category_cols = [c for c in su.get_columns_by_attribute(cfg_schema, "type", "categorical") if c in df]
+    numeric_cols = [c for c in su.get_columns_by_attribute(cfg_schema, "type", "numeric") if c in df]
+    return lambda: ah.compute_associations(df, category_cols, numeric_cols, target="denied_flag")
+
+
+def _setup_build_model_dataset():
+    import src.helpers.encoding_helpers as enc
+    import src.helpers.feature_engineering_helper as feh
+    df = fu.load_parquet("hmda_2024_typed")
+    cfg_feature_engineering = fu.load_config("feature_engineering")
+    return lambda: feh.build_model_dataset(df, cfg_feature_engineering, enc.OneHotEncoder(cfg_feature_engineering))
+
+
+def _setup_fit_feature_imputer():
+    import src.helpers.feature_engineering_helper as feh
+    imputer = feh.feature_imputer(feh.CATEGORICAL_NUMERIC_COLS + feh.MEDIAN_FILL_COLS)
+    return lambda: feh.fit_feature_imputer(imputer)
+
+
+def _setup_assign_splits():
+    import src.utils.schema_utils as su
+    import src.helpers.feature_engineering_helper as feh
+    row_keys = pq.read_table(fu.get_path("hmda_2024_model"), columns=[su.ROW_KEY]).column(su.ROW_KEY).to_numpy()
+    return lambda: feh.assign_splits(row_keys)
+
+
+def _setup_load_model_dataset():
+    import src.helpers.model_helpers as mh
+    return lambda: mh.load_model_dataset(fraction=1.0)
+
+
+def _setup_score_predictions():
+    import src.helpers.feature_engineering_helper as feh
+    import src.helpers.model_helpers as mh
+    y = pq.read_table(fu.get_path("hmda_2024_model"), columns=["denied_flag"]).column("denied_flag").to_numpy()
+    y_test = y[np.asarray(feh.load_split_assignment()) < 0]
+    y_prob = np.random.default_rng(0).random(len(y_test))
+    return lambda: mh.score_predictions(y_test, y_prob)
+
+
+def _setup_evaluate():
+    import src.helpers.evaluation_helpers as ev
+    import src.helpers.feature_engineering_helper as feh
+    y = pq.read_table(fu.get_path("hmda_2024_model"), columns=["denied_flag"]).column("denied_flag").to_numpy()
+    y_test = y[np.asarray(feh.load_split_assignment()) < 0]
+    rng = np.random.default_rng(0)
+    y_prob, segments = rng.random(len(y_test)), rng.choice(["conventional", "fha", "va", "rhs"], len(y_test))
+    return lambda: ev.evaluate(y_test, y_prob, segments, n_boot=1000)
+
+
+def _setup_iter_batches():
+    import src.helpers.out_of_core_helpers as ooc
+    return lambda: sum(len(y) for _, y in ooc.iter_batches("pca_svd"))
+
+
+def _setup_materialize_view():
+    import shutil
+    import src.helpers.feature_store_helpers as fs
+    shutil.rmtree(fs.view_dir("pca_svd"), ignore_errors=True)
+    return lambda: fs.materialize_view("pca_svd")
+
+
+def _setup_score_parquet():
+    import src.helpers.scoring_helpers as sch
+    output = fu.project_root() / ".cache" / "benchmark_scores.parquet"
+    return lambda: sch.score_parquet("log_reg", fu.get_path("hmda_2024_model"), output)
+
+
+HELPER_BENCHMARKS = {
+    "clean_helpers.convert_by_schema": _setup_convert_by_schema,
+    "memory_utils.plan_column_types": _setup_plan_column_types,
+    "association_helpers.compute_associations": _setup_compute_associations,
+    "feature_engineering_helper.build_model_dataset": _setup_build_model_dataset,
+    "feature_engineering_helper.fit_feature_imputer": _setup_fit_feature_imputer,
+    "feature_engineering_helper.assign_splits": _setup_assign_splits,
+    "model_helpers.load_model_dataset": _setup_load_model_dataset,
+    "model_helpers.score_predictions": _setup_score_predictions,
+    "evaluation_helpers.evaluate": _setup_evaluate,
+    "out_of_core_helpers.iter_batches": _setup_iter_batches,
+    "feature_store_helpers.materialize_view": _setup_materialize_view,
+    "scoring_helpers.score_parquet": _setup_score_parquet,
+}
+
+
+def workspace(scale: str) -> Path:
+    """
+    Project directory for one scale: the real configs, with every paths.yaml output under it, so the
+    stages run on synthetic data without touching the real artifacts.
+    """
+    root = fu.get_path("benchmark_workspace") / scale
+    for rel in fu.load_config("paths").values():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+    configs = root / "configs"
+    if not configs.exists():
+        configs.symlink_to(fu.project_root() / "configs", target_is_directory=True)
+    return root
+
+
+def prepare_scale(scale: str) -> Path:
+    """
+    Generate the scale's synthetic raw data unless the workspace already holds it.
+    """
+    cfg = _benchmark_cfg()
+    root = workspace(scale)
+    raw = root / fu.load_config("paths")["hmda_raw"]
+    if not raw.exists() or pq.ParquetFile(raw).metadata.num_rows != scale_rows(scale):
+        sd.generate_raw_parquet(scale_rows(scale), raw, chunk_rows=cfg.get("chunk_rows", 500_000), seed=cfg.get("seed", 42))
+    return root
+
+
+def _run_job(root: str, kind: str, name: str) -> dict:
+    # Runs in a fresh process, so PROJECT_ROOT is read before anything resolves a path
+    os.environ["PROJECT_ROOT"] = root
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if kind == "stage":
+        import src.helpers.pipeline_helpers as pu
+        func = pu.STAGES[name]["func"]
+    else:
+        func = HELPER_BENCHMARKS[name]()
+
+    baseline = oh._tree_rss_mb(os.getpid())
+    started = time.perf_counter()
+    with oh._PeakMemory(interval=0.05) as memory:
+        func()
+    return {"seconds": time.perf_counter() - started, "peak_memory_mb": memory.peak_mb, "baseline_memory_mb": baseline}
+
+
+def git_commit() -> tuple[str, bool]:
+    """
+    Short hash of HEAD and whether the working tree has uncommitted changes.
+    """
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=fu.project_root(), capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+
+def _stage_done(root: Path, name: str) -> bool:
+    import src.helpers.pipeline_helpers as pu
+    paths = fu.load_config("paths")
+    return all((root / paths[key.removesuffix(cu.META_SUFFIX)]).exists() for key in pu.STAGES[name]["outputs"])
+
+
+def run_benchmarks(scales: list[str] | None = None, only: list[str] | None = None, repeats: int | None = None) -> pd.DataFrame:
+    """
+    Time and memory-profile every pipeline stage (in order, end to end) and then every helper benchmark at
+    each scale, each run in its own process. With only, other stages run just when the workspace lacks
+    their outputs. Results are appended to benchmark_results_csv under the current commit; a failed stage
+    stops the scale, since the stages after it need its outputs.
+    """
+    cfg = _benchmark_cfg()
+    scales = scales or cfg.get("default_scales") or list(cfg["scales"])
+    repeats = repeats or cfg.get("repeats", 1)
+    jobs = [("stage", name) for name in cfg.get("stages", [])]
+    jobs += [("helper", name) for name in HELPER_BENCHMARKS if not only or name in only]
+    commit, dirty = git_commit()
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    rows = []
+    for scale in scales:
+        root = prepare_scale(scale)
+        for kind, name in jobs:
+            n_repeats = repeats
+            if only and kind == "stage" and name not in only:
+                n_repeats = 0 if _stage_done(root, name) else 1
+            for repeat in range(n_repeats):
+                row = {"commit": commit, "dirty": dirty, "timestamp": timestamp, "scale": scale,
+                       "rows": scale_rows(scale), "kind": kind, "benchmark": name, "repeat": repeat}
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    try:
+                        row.update(status="ok", **pool.submit(_run_job, str(root), kind, name).result())
+                        print(f"{scale} {name}: {row['seconds']:.2f}s, peak {row['peak_memory_mb']:,.0f} MB")
+                    except Exception as e:
+                        print(f"{scale} {name}: failed ({type(e).__name__}: {e})")
+                        row["status"] = "failed"
+                rows.append(row)
+            if kind == "stage" and rows and rows[-1]["benchmark"] == name and rows[-1]["status"] != "ok":
+                break
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    path = fu.get_path("benchmark_results_csv")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(path, mode="a", header=not path.exists(), index=False)
+    return results
+
+
+def load_results() -> pd.DataFrame:
+    return pd.read_csv(fu.get_path("benchmark_results_csv"))
+
+
+def compare_results(base: str, head: str | None = None, threshold: float | None = None) -> pd.DataFrame:
+    """
+    Median seconds and peak memory per scale and benchmark at two commits (head: the latest one recorded),
+    with head / base ratios. Rows slower than threshold times the base are flagged as regressions.
+    """
+    threshold = threshold or _benchmark_cfg().get("regression_threshold", 1.1)
+    results = load_results()
+    results = results[results["status"] == "ok"]
+    head = head or results["commit"].iloc[-1]
+    for commit in (base, head):
+        if commit not in set(results["commit"]):
+            raise ValueError(f"No successful benchmark results for commit {commit!r}")
+
+    medians = (results[results["commit"].isin([base, head])]
+               .groupby(["scale", "kind", "benchmark", "commit"])[["seconds", "peak_memory_mb"]].median()
+               .unstack("commit"))
+    out = pd.DataFrame({
+        "base_seconds": medians[("seconds", base)],
+        "head_seconds": medians[("seconds", head)],
+        "base_memory_mb": medians[("peak_memory_mb", base)],
+        "head_memory_mb": medians[("peak_memory_mb", head)],
+    })
+    out["time_ratio"] = out["head_seconds"] / out["base_seconds"]
+    out["memory_ratio"] = out["head_memory_mb"] / out["base_memory_mb"]
+    out["regression"] = (out["time_ratio"] > threshold) | (out["memory_ratio"] > threshold)
+    return out.dropna(subset=["base_seconds", "head_seconds"])
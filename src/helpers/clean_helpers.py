@@ -1,7 +1,17 @@
 # src/helpers/clean_helpers.py
+from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from pandas.api.types import is_string_dtype
 import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.utils.arrow_utils as au
+
+# Values that mark a field as exempt from reporting
+EXEMPT_TOKENS = ["exempt", "1111"]
 
 
 def null_like_check(df: pd.DataFrame, null_like_values) -> pd.Series:
@@ -56,7 +66,7 @@ def apply_exempt_split(df: pd.DataFrame, exempt_cols: list[str]) -> list[str]:
 
         # Find the values within the column with a value of exempt
         non_null_s = s.str.casefold()
-        mask_exempt = non_null_s.isin(["exempt", "1111"])
+        mask_exempt = non_null_s.isin(EXEMPT_TOKENS)
         mask_missing = s.isna()
 
         flag_col = f"{col}_exempt"
@@ -136,6 +146,134 @@ def apply_action_taken_flag(df: pd.DataFrame, cfg_clean: dict) -> pd.DataFrame:
     return df_out
 
 
+def compile_clean_plan(cfg_clean: dict, cfg_schema: dict, columns: list[str]) -> dict:
+    """
+    Compile clean.yaml and schema.yaml into a single plan for apply_clean_plan.
+    Covers the same steps as notebook 01: drop, strip, exempt split, sentinels, dtype conversion,
+    negative income fix and the action_taken filter / denied_flag target.
+    """
+    clean_cfg = cfg_clean["clean"]
+    cols_spec = (cfg_schema.get("columns") or {})
+
+    dropped = set(su.get_columns_by_attribute(cfg_schema, "role", "drop"))
+    keep = [c for c in columns if c not in dropped]
+
+    features = set(su.get_columns_by_attribute(cfg_schema, "role", "feature"))
+    exempt = set(su.get_columns_by_attribute(cfg_schema, "exempt", True))
+
+    numeric, bools = {}, []
+    for col in keep:
+        target = str((cols_spec.get(col) or {}).get("dtype", ""))
+        if target.startswith(("Int", "Float")):
+            numeric[col] = su.get_arrow_type(cfg_schema, col)
+        elif target.startswith("Bool"):
+            bools.append(col)
+
+    action_cfg = clean_cfg["action_taken"]
+    return {
+        "columns": keep,
+        "key_columns": [c for c in (clean_cfg.get("row_key_columns") or keep) if c in columns],
+        "exempt": sorted(features & exempt & set(keep)),  # same order as notebook 01, so the *_exempt flags line up
+        "sentinels": {c: v for c, v in (clean_cfg.get("sentinels") or {}).items() if c in keep},
+        "numeric": numeric,
+        "bool": bools,
+        "absolute_value": [c for c in (clean_cfg.get("absolute_value") or []) if c in numeric],
+        "valid_actions": sorted(set(action_cfg["approved"]) | set(action_cfg["denied"])),
+        "denied_actions": sorted(set(action_cfg["denied"])),
+    }
+
+
+def apply_clean_plan(batch: pa.RecordBatch, plan: dict) -> pa.RecordBatch:
+    """
+    Run every cleaning step over one record batch in a single pass.
+    Output columns match hmda_2024_typed: the kept columns, then the *_exempt flags, then denied_flag and row_key.
+    """
+    arrays = {}
+    for col in plan["columns"]:
+        arr = batch.column(col)
+        if au.is_string(arr):
+            arr = pc.utf8_trim_whitespace(arr)
+        arrays[col] = arr
+
+    # Keyed on the canonicalized raw identifying columns so the same application gets the same key on every rebuild
+    row_key = au.hash_rows(batch, plan["key_columns"])
+
+    # Exempt split: 1 = exempt, 0 = reported, -1 = missing. Exempt values become "NA" so they coerce to null.
+    flags = {}
+    for col in plan["exempt"]:
+        s = arrays[col]
+        s_str = s if au.is_string(s) else pc.cast(s, pa.string())
+        is_exempt = pc.fill_null(pc.is_in(pc.utf8_lower(s_str), value_set=pa.array(EXEMPT_TOKENS)), False)
+        flags[f"{col}_exempt"] = pc.if_else(
+            pc.is_null(s), pa.scalar(-1, pa.int8()),
+            pc.if_else(is_exempt, pa.scalar(1, pa.int8()), pa.scalar(0, pa.int8())),
+        )
+        arrays[col] = pc.if_else(is_exempt, pa.scalar("NA" if au.is_string(s) else None, s.type), s)
+
+    for col, tokens in plan["sentinels"].items():
+        arrays[col] = au.null_tokens(arrays[col], tokens)
+
+    for col, target in plan["numeric"].items():
+        arrays[col] = au.coerce_numeric(arrays[col], target)
+
+    for col in plan["absolute_value"]:
+        arrays[col] = pc.abs(arrays[col])
+
+    # Bool columns are coded 1 = yes, 2 = no; anything else is flagged -1
+    for col in plan["bool"]:
+        s = arrays[col]
+        s_str = s if au.is_string(s) else pc.cast(s, pa.string())
+        arrays[col] = pc.fill_null(
+            pc.if_else(pc.equal(s_str, "1"), pa.scalar(1, pa.int8()),
+                       pc.if_else(pc.equal(s_str, "2"), pa.scalar(0, pa.int8()), pa.scalar(-1, pa.int8()))),
+            pa.scalar(-1, pa.int8()),
+        )
+
+    action = arrays["action_taken"]
+    keep_mask = pc.fill_null(pc.is_in(action, value_set=pa.array(plan["valid_actions"], type=action.type)), False)
+    arrays.update(flags)
+    arrays["denied_flag"] = pc.cast(
+        pc.fill_null(pc.is_in(action, value_set=pa.array(plan["denied_actions"], type=action.type)), False),
+        pa.int8(),
+    )
+    arrays[su.ROW_KEY] = row_key
+
+    out = pa.RecordBatch.from_arrays(list(arrays.values()), names=list(arrays.keys()))
+    return out.filter(keep_mask)
+
+
+def clean_to_parquet(cfg_clean: dict, cfg_schema: dict, input_key: str = "hmda_raw", output_key: str = "hmda_2024_typed",
+                     batch_size: int = 250_000, n_threads: int | None = None) -> Path:
+    """
+    Out-of-core replacement for the strip / exempt / convert / action_taken steps in notebook 01.
+    Streams the raw Parquet file in record batches, cleans them on a thread pool and writes
+    each result as a row group, so memory is bounded by batch_size rather than the dataset.
+    """
+    input_path = fu.get_path(input_key)
+    output_path = fu.get_path(output_key)
+    print(f"Cleaning dataset from {input_path}")
+
+    dataset = ds.dataset(input_path, format="parquet")
+    plan = compile_clean_plan(cfg_clean, cfg_schema, dataset.schema.names)
+    read_columns = plan["columns"] + [c for c in plan["key_columns"] if c not in plan["columns"]]
+    batches = dataset.to_batches(columns=read_columns, batch_size=batch_size, use_threads=True)
+
+    n_rows = 0
+    writer = None
+    try:
+        for out in au.map_batches(lambda b: apply_clean_plan(b, plan), batches, n_threads):
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, out.schema, compression="snappy")
+            writer.write_batch(out)
+            n_rows += out.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Saved {n_rows:,} rows to {output_path}")
+    return output_path
+
+
 def generate_schema_summary(df: pd.DataFrame, cfg_schema: dict, path_key: str = "schema_summary") -> pd.DataFrame:
     """
     Build column-level metadata for ALL columns currently in df (including derived ones like *_exempt, approved_flag).
@@ -0,0 +1,273 @@
+# src/helpers/clustering_helpers.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sklearn.cluster import HDBSCAN, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances, silhouette_score
+from sklearn.neighbors import NearestNeighbors
+from threadpoolctl import threadpool_limits
+
+import src.utils.arrow_utils as au
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+import src.utils.schema_utils as su
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.feature_store_helpers as fs
+import src.helpers.model_helpers as mh
+
+# Label columns of cluster_labels, one per clustering model
+LABEL_COLS = {"kmeans": "kmeans_cluster", "density": "density_cluster"}
+NOISE = -1
+
+
+def _cfg() -> dict:
+    return fu.load_config("clustering")["clustering"]
+
+
+def _load_splits(view: str) -> list[tuple[np.ndarray, np.ndarray]]:
+    # Memory-mapped X and row positions of both splits: together, every application in the model dataset
+    out = []
+    for split in fs.SPLITS:
+        X, y, _ = fs.load_view(view, split)
+        out.append((X, y.index.to_numpy()))
+    return out
+
+
+def sample_rows(view: str, n_rows: int, seed: int = 42) -> np.ndarray:
+    """
+    n_rows uniformly sampled rows of the view, across both splits. The same seed gives the same rows.
+    """
+    splits = _load_splits(view)
+    total = sum(len(X) for X, _ in splits)
+    rows = np.sort(np.random.default_rng(seed).choice(total, size=min(n_rows, total), replace=False))
+    out, offset = [], 0
+    for X, _ in splits:
+        local = rows[(rows >= offset) & (rows < offset + len(X))] - offset
+        out.append(np.asarray(X[local]))
+        offset += len(X)
+    return np.concatenate(out)
+
+
+def iter_batches(views: list[str], batch_size: int):
+    """
+    (row positions, [X of each view]) for every application, batch_size rows at a time in file order.
+    The views share row order, so one batch is the same applications in each.
+    """
+    splits = [_load_splits(view) for view in views]
+    for i, (_, positions) in enumerate(splits[0]):
+        for start in range(0, len(positions), batch_size):
+            yield positions[start:start + batch_size], [s[i][0][start:start + batch_size] for s in splits]
+
+
+def centroid_silhouette(X: np.ndarray, centers: np.ndarray, labels: np.ndarray, batch_size: int = 50_000) -> float:
+    """
+    Silhouette with distances to centroids in place of mean distances to cluster members (simplified
+    silhouette): O(n k) instead of O(n^2), so it covers every row rather than a sample.
+    """
+    total = 0.0
+    for start in range(0, len(X), batch_size):
+        d = pairwise_distances(X[start:start + batch_size], centers)
+        rows = np.arange(len(d))
+        own = d[rows, labels[start:start + batch_size]]
+        d[rows, labels[start:start + batch_size]] = np.inf
+        other = d.min(axis=1)
+        denom = np.maximum(own, other)
+        total += np.where(denom > 0, (other - own) / np.where(denom > 0, denom, 1), 0.0).sum()
+    return total / len(X)
+
+
+def _sweep_job(view: str, k: int, sweep_rows: int, silhouette_rows: int, batch_size: int, seed: int,
+               n_threads: int) -> dict:
+    # Runs in a spawned worker; every worker draws the same sample from the shared memory-mapped view
+    started = time.perf_counter()
+    with threadpool_limits(limits=n_threads):
+        X = sample_rows(view, sweep_rows, seed)
+        kmeans = MiniBatchKMeans(n_clusters=k, batch_size=batch_size, random_state=seed).fit(X)
+        return {
+            "k": k,
+            "inertia": kmeans.inertia_,
+            "silhouette": silhouette_score(X, kmeans.labels_, sample_size=min(silhouette_rows, len(X)), random_state=seed),
+            "centroid_silhouette": centroid_silhouette(X, kmeans.cluster_centers_, kmeans.labels_),
+            "seconds": time.perf_counter() - started,
+        }
+
+
+def k_sweep(k_values: list[int] | None = None, n_workers: int | None = None) -> pd.DataFrame:
+    """
+    Fit MiniBatchKMeans for every k at once, each in its own process with an equal share of the CPUs,
+    and score it by inertia, exact silhouette on a sample and centroid silhouette on every sweep row.
+    Saves cluster_sweep_csv and the elbow / silhouette plot.
+    """
+    cfg = _cfg()
+    kcfg = cfg["kmeans"]
+    k_values = k_values or kcfg["k_values"]
+    n_workers = min(len(k_values), n_workers or os.cpu_count() or 1)
+    n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    # Built once here rather than by every worker at the same time
+    fs.materialize_view(kcfg["view"])
+
+    print(f"Sweeping k = {k_values} on {n_workers} worker(s)")
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_sweep_job, kcfg["view"], k, kcfg["sweep_rows"], kcfg["silhouette_rows"],
+                               cfg["batch_size"], cfg["seed"], n_threads) for k in k_values]
+        sweep = pd.DataFrame([f.result() for f in futures])
+
+    sweep.to_csv(fu.get_path("cluster_sweep_csv"), index=False)
+    mh.save_viz(plot_sweep(sweep), "cluster_sweep_plot")
+    plt.close("all")
+    return sweep
+
+
+def plot_sweep(sweep: pd.DataFrame):
+    fig, ax1 = plt.subplots(figsize=(8, 5))
+    ax1.set_xlabel("Number of clusters (k)")
+    ax1.set_ylabel("WCSS (Elbow)", color="tab:blue")
+    ax1.plot(sweep["k"], sweep["inertia"], marker="o", color="tab:blue")
+    ax1.tick_params(axis="y", labelcolor="tab:blue")
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel("Silhouette Score", color="tab:red")
+    ax2.plot(sweep["k"], sweep["silhouette"], marker="s", linestyle="--", color="tab:red", label="sampled")
+    ax2.plot(sweep["k"], sweep["centroid_silhouette"], marker="^", linestyle=":", color="tab:red", label="centroid")
+    ax2.tick_params(axis="y", labelcolor="tab:red")
+    ax2.legend(loc="upper right")
+    plt.title("Elbow Method and Silhouette Scores")
+    return fig
+
+
+def fit_kmeans(n_clusters: int | None = None) -> MiniBatchKMeans:
+    """
+    MiniBatchKMeans with partial_fit over every application, one feature-store batch at a time in a shuffled order.
+    """
+    cfg = _cfg()
+    kcfg = cfg["kmeans"]
+    n_clusters = n_clusters or kcfg["n_clusters"]
+    batches = [X for _, (X,) in iter_batches([kcfg["view"]], cfg["batch_size"])]
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=cfg["batch_size"], random_state=cfg["seed"])
+    for i in np.random.default_rng(cfg["seed"]).permutation(len(batches)):
+        kmeans.partial_fit(np.asarray(batches[i]))
+
+    mr.save_model(kmeans, "kmeans_cluster_model", {"view": kcfg["view"], "n_clusters": n_clusters})
+    return kmeans
+
+
+def fit_density() -> dict:
+    """
+    HDBSCAN on a coreset of sampled rows, plus what assign_density needs to label every other row: the coreset's
+    nearest-neighbor index, labels and core distances, and the largest core distance in each cluster.
+    """
+    cfg = _cfg()
+    dcfg = cfg["density"]
+    X = sample_rows(dcfg["view"], dcfg["coreset_rows"], cfg["seed"])
+    print(f"Fitting HDBSCAN on a {len(X):,} row coreset")
+    labels = HDBSCAN(min_cluster_size=dcfg["min_cluster_size"], min_samples=dcfg["min_samples"]).fit_predict(X)
+
+    # A point counts as its own first neighbor, as in HDBSCAN's core distance
+    neighbors = NearestNeighbors(n_neighbors=dcfg["min_samples"]).fit(X)
+    core_distances = neighbors.kneighbors(X)[0][:, -1]
+    n_clusters = int(labels.max()) + 1
+    cluster_max_core = np.array([core_distances[labels == c].max() for c in range(n_clusters)])
+
+    model = {"view": dcfg["view"], "neighbors": neighbors, "labels": labels, "core_distances": core_distances,
+             "cluster_max_core": cluster_max_core}
+    noise_share = float((labels == NOISE).mean())
+    print(f"Clusters: {n_clusters}, noise share of the coreset: {noise_share:.3f}")
+    mr.save_model(model, "density_cluster_model", {"view": dcfg["view"], "n_clusters": n_clusters,
+                                                   "coreset_rows": len(X), "noise_share": noise_share})
+    return model
+
+
+def assign_density(model: dict, X: np.ndarray) -> np.ndarray:
+    """
+    Label rows with the cluster of the coreset point nearest by mutual reachability distance (HDBSCAN's
+    approximate prediction). Rows nearest a noise point, or sparser than every member of their cluster, are noise.
+    """
+    dist, idx = model["neighbors"].kneighbors(X)
+    # A new row is its own first neighbor too, so its core distance is to its (min_samples - 1)-th coreset
+    # neighbor, as for the coreset points in fit_density
+    core = dist[:, -2] if dist.shape[1] > 1 else np.zeros(len(dist))
+    reach = np.maximum(np.maximum(dist, model["core_distances"][idx]), core[:, None])
+    nearest = idx[np.arange(len(idx)), reach.argmin(axis=1)]
+    labels = model["labels"][nearest].astype(np.int32)
+    clustered = labels != NOISE
+    too_sparse = np.zeros(len(labels), dtype=bool)
+    too_sparse[clustered] = core[clustered] > model["cluster_max_core"][labels[clustered]]
+    labels[too_sparse] = NOISE
+    return labels
+
+
+def assign_clusters(batch_size: int | None = None, n_threads: int | None = None) -> pd.DataFrame:
+    """
+    Label every application with both saved clustering models, streaming feature-store batches through a thread
+    pool. Saves cluster_labels (row_key and one column per model, in model dataset row order).
+    """
+    batch_size = batch_size or _cfg()["batch_size"]
+    kmeans, density = mr.get_model("kmeans_cluster_model"), mr.get_model("density_cluster_model")
+    kmeans_view = mr.load_metadata("kmeans_cluster_model").get("view") or _cfg()["kmeans"]["view"]
+
+    def label_batch(batch):
+        positions, (X_kmeans, X_density) = batch
+        return positions, kmeans.predict(np.asarray(X_kmeans)), assign_density(density, np.asarray(X_density))
+
+    dataset = ds.dataset(fu.get_path("hmda_2024_model"), format="parquet")
+    n_rows = dataset.count_rows()
+    labels = {col: np.full(n_rows, NOISE, dtype=np.int32) for col in LABEL_COLS.values()}
+    started = time.perf_counter()
+    for positions, kmeans_labels, density_labels in au.map_batches(
+            label_batch, iter_batches([kmeans_view, density["view"]], batch_size), n_threads=n_threads):
+        labels[LABEL_COLS["kmeans"]][positions] = kmeans_labels
+        labels[LABEL_COLS["density"]][positions] = density_labels
+    print(f"Assigned clusters to {n_rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    out = pd.DataFrame(labels)
+    if su.ROW_KEY in dataset.schema.names:
+        out.insert(0, su.ROW_KEY, dataset.to_table(columns=[su.ROW_KEY]).column(su.ROW_KEY).to_numpy())
+    pq.write_table(pa.Table.from_pandas(out, preserve_index=False), fu.get_path("cluster_labels"), compression="snappy")
+    print(f"Saved to {fu.get_path('cluster_labels')}")
+    return out
+
+
+def cluster_profiles(model: str = "kmeans", batch_size: int = 250_000) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    numeric_summary (per-cluster means of the continuous columns, with application count and denial rate) and
+    categorical_summary (per-cluster share of each one-hot column, one column per cluster) over every application,
+    accumulated batch by batch from the model dataset and cluster_labels. Noise is cluster -1.
+    """
+    label_col = LABEL_COLS[model]
+    labels = pq.read_table(fu.get_path("cluster_labels"), columns=[label_col]).column(label_col).to_numpy()
+    dataset = ds.dataset(fu.get_path("hmda_2024_model"), format="parquet")
+    columns = [c for c in dataset.schema.names if c != su.ROW_KEY]
+
+    sums, counts, sizes, start = None, None, None, 0
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        df = batch.to_pandas(ignore_metadata=True).astype(np.float64)
+        groups = df.groupby(labels[start:start + len(df)])
+        start += len(df)
+        batch_sums, batch_counts, batch_sizes = groups.sum(min_count=1).fillna(0.0), groups.count(), groups.size()
+        sums = batch_sums if sums is None else sums.add(batch_sums, fill_value=0.0)
+        counts = batch_counts if counts is None else counts.add(batch_counts, fill_value=0)
+        sizes = batch_sizes if sizes is None else sizes.add(batch_sizes, fill_value=0)
+
+    means = sums / counts.where(counts > 0)
+    means.index.name = "cluster"
+    numeric_cols = [c for c in feh.SCALED_NUMERIC_COLS if c in means]
+    categorical_cols = [c for c in means if c not in numeric_cols and c != "denied_flag"]
+
+    numeric_summary = means[numeric_cols].copy()
+    numeric_summary.insert(0, "applications", sizes.astype(np.int64))
+    numeric_summary.insert(1, "denial_rate", means["denied_flag"])
+    categorical_summary = means[categorical_cols].T
+
+    numeric_summary.to_csv(fu.get_path(f"{label_col}_numeric_summary_csv"))
+    categorical_summary.to_csv(fu.get_path(f"{label_col}_categorical_summary_csv"))
+    return numeric_summary, categorical_summary
@@ -3,33 +3,99 @@ import pandas as pd
 from scipy.stats import skew, kurtosis
 import src.utils.schema_utils as su
 import src.utils.file_utils as fu
+import src.utils.arrow_utils as au
+import src.utils.sketch_utils as sk
+import src.helpers.association_helpers as ah
+import src.helpers.target_cube_helpers as tc
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats as stats
-from scipy.stats import pointbiserialr
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 
+PROFILE_QUANTILES = {"q01": 0.01, "q25": 0.25, "q50": 0.5, "q75": 0.75, "q99": 0.99}
 
-def get_numeric_features(df: pd.DataFrame, cfg_schema:object) -> pd.Series:
+
+def get_numeric_features(df: pd.DataFrame | str, cfg_schema:object) -> pd.Series:
     # We left activity_year in for now, even though it's just one year.  Added this condition to avoid throwing warnings.
-    return [
-        c for c in su.get_columns_by_attribute(cfg_schema, "type", "numeric")
-        if df[c].nunique(dropna=True) > 1
-    ]
+    numeric_cols = su.get_columns_by_attribute(cfg_schema, "type", "numeric")
+    if not isinstance(df, pd.DataFrame):
+        profile = profile_numeric_columns(df, numeric_cols)
+        return [c for c in numeric_cols if profile.loc[c, "max"] > profile.loc[c, "min"]]
+
+    return [c for c in numeric_cols if df[c].nunique(dropna=True) > 1]
 
 
-def get_numeric_columns_requiring_review(df: pd.DataFrame, numeric_cols:list[str]) -> pd.Series:
+def get_numeric_columns_requiring_review(df: pd.DataFrame | str, numeric_cols:list[str]) -> pd.Series:
+    """
+    df can also be a paths.yaml key; the Parquet file is then streamed once, so it need not fit in memory.
+    Skew and kurtosis are exact; outlier_pct uses the IQR from quantile sketches.
+    """
     cfg_eda = fu.load_config("eda")
     skew_threshold = cfg_eda["eda"]["skew_threshold"]
     kurtosis_threshold = cfg_eda["eda"]["kurtosis_threshold"]
     outlier_threshold = cfg_eda["eda"]["outlier_threshold"]
 
+    profile = profile_numeric_columns(df, numeric_cols)
     return pd.DataFrame({
-        "skew": identify_columns_with_skew(df, numeric_cols, skew_threshold),
-        "kurtosis": identify_columns_with_kurtosis(df, numeric_cols, kurtosis_threshold),
-        "outlier_pct": identify_columns_with_outliers(df, numeric_cols, outlier_threshold)
+        "skew": profile["skew"][profile["skew"].abs() > skew_threshold],
+        "kurtosis": profile["kurtosis"][profile["kurtosis"].abs() > kurtosis_threshold],
+        "outlier_pct": profile["outlier_pct"][profile["outlier_pct"] > outlier_threshold].rename("outlier_pct"),
     })
 
 
+def _profile_batch(item):
+    col, arr, k, seed = item
+    values = pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+    return col, sk.ColumnProfile(k, seed).update(values)
+
+
+def profile_numeric_columns(source: pd.DataFrame | str, numeric_cols: list[str], batch_size: int = 1_000_000,
+                            n_threads: int | None = None, k: int = 1024) -> pd.DataFrame:
+    """
+    One streaming pass over a DataFrame or a Parquet file (paths.yaml key or path), in parallel across
+    columns and batches. Each (batch, column) gets a mergeable profile: exact moments plus a KLL sketch.
+    Returns one row per column: count, nulls, mean, std, min, q01-q99, max, skew, kurtosis, outlier_pct.
+    Quantiles are within about 0.1% of rank at the default k; raise k for more precision.
+    """
+    if isinstance(source, pd.DataFrame):
+        batches = pa.Table.from_pandas(source[numeric_cols], preserve_index=False).to_batches(batch_size)
+    else:
+        path = fu.get_path(source) if isinstance(source, str) and source in fu.load_config("paths") else source
+        print(f"Profiling {path}")
+        batches = ds.dataset(path, format="parquet").to_batches(columns=numeric_cols, batch_size=batch_size)
+
+    # Every partial profile gets its own sketch seed, so compaction errors cancel when they are merged
+    items = ((col, batch.column(col), k, sk.partial_seed(b, c))
+             for b, batch in enumerate(batches) for c, col in enumerate(numeric_cols))
+    profiles = {col: sk.ColumnProfile(k) for col in numeric_cols}
+    for col, partial in au.map_batches(_profile_batch, items, n_threads=n_threads):
+        profiles[col].merge(partial)
+
+    rows = {}
+    for col, p in profiles.items():
+        n = p.moments[0]
+        q = dict(zip(PROFILE_QUANTILES, p.sketch.quantile(list(PROFILE_QUANTILES.values()))))
+        iqr = q["q75"] - q["q25"]
+        below = p.sketch.cdf(q["q25"] - 1.5 * iqr, strict=True)
+        above = 1 - p.sketch.cdf(q["q75"] + 1.5 * iqr)
+        rows[col] = {
+            "count": int(n),
+            "nulls": p.nulls,
+            "mean": p.moments[1] if n else np.nan,
+            "std": np.sqrt(p.moments[2] / (n - 1)) if n > 1 else np.nan,
+            "min": p.min if n else np.nan,
+            **q,
+            "max": p.max if n else np.nan,
+            "skew": sk.skew_from_moments(p.moments),
+            "kurtosis": sk.kurtosis_from_moments(p.moments),
+            # Share of non-null values: with pyarrow dtypes the (df[col] < lower) | (df[col] > upper) mean skipped nulls
+            "outlier_pct": below + above if n else np.nan,
+        }
+
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
 def identify_columns_with_skew(df: pd.DataFrame, numeric_cols: list[str], skew_threshold: float) -> pd.Series:
     cols_skew = df[numeric_cols].apply(skew, nan_policy='omit')
     return cols_skew[cols_skew.abs() > skew_threshold]
@@ -116,11 +182,13 @@ def get_categorical_columns_requiring_review(df: pd.DataFrame, category_cols: li
 
 
 
-def identify_perfect_category_classes(df, category_cols, target):
+def identify_perfect_category_classes(df, category_cols, target, cube: tc.TargetCube | None = None):
+    # Pass a cube from tc.build_target_cube to share one pass over the data between the category screens
     MIN_N = 50
+    cube = cube or tc.build_target_cube(df, category_cols, target)
     rows = []
     for col in category_cols:
-        g = df.groupby(col, dropna=False)[target].agg(rate='mean', n='count')
+        g = cube.stats(col)
         if len(g) < 2:
             continue
         mask = ((g['rate'] == 0) | (g['rate'] == 1)) & (g['n'] >= MIN_N)
@@ -133,11 +201,12 @@ def identify_perfect_category_classes(df, category_cols, target):
     return out
 
 
-def identify_categories_with_large_denial_ranges(df, category_cols, target):
+def identify_categories_with_large_denial_ranges(df, category_cols, target, cube: tc.TargetCube | None = None):
     RANGE_T = 0.15
+    cube = cube or tc.build_target_cube(df, category_cols, target)
     rows = []
     for col in category_cols:
-        g = df.groupby(col, dropna=False)[target].agg(rate='mean', n='count')
+        g = cube.stats(col)
         if len(g) < 2:
             continue
         rmin, rmax = g['rate'].min(), g['rate'].max()
@@ -168,32 +237,25 @@ def identify_highly_correlated_numeric_features(df: pd.DataFrame, numeric_cols:
     return high_corr[high_corr['corr'] > 0.8].sort_values('corr', ascending=False)
 
 
-def identify_feature_target_correlations(df: pd.DataFrame, numeric_cols: list[str], target: str):
-    results_num = []
-    for col in numeric_cols:
-        # Drop NaNs for valid pairs
-        valid = df[[col, target]].dropna()
-        if valid[col].nunique() > 1:
-            r, p = pointbiserialr(valid[col], valid[target])
-            results_num.append({'feature': col, 'corr': r, 'p_value': p})
+def identify_numeric_target_correlations(df: pd.DataFrame, numeric_cols: list[str], target: str):
+    # Point-biserial correlation of each numeric feature with the (binary) target
+    results = ah.compute_associations(df, [], numeric_cols, target, pairs=False)
+    results = results.dropna(subset=["value"]).rename(columns={"feature_1": "feature", "value": "corr"})
 
-    return pd.DataFrame(results_num).sort_values('corr', key=abs, ascending=False)
+    return results[["feature", "corr", "p_value"]].sort_values("corr", key=abs, ascending=False)
 
 
 def cramers_v(x, y):
-    confusion = pd.crosstab(x, y)
-    chi2 = stats.chi2_contingency(confusion)[0]
-    n = confusion.sum().sum()
-    phi2 = chi2 / n
-    r, k = confusion.shape
-    return np.sqrt(phi2 / min(k - 1, r - 1))
+    df = pd.DataFrame({"x": np.asarray(x), "y": np.asarray(y)})
+    codes, labels = ah.encode_categories(df, ["x", "y"])
+    table = ah.contingency_table(codes[:, 0], len(labels[0]), codes[:, 1], len(labels[1]))
+    return ah.cramers_v_from_table(table)[0]
 
 
-def identify_feature_target_correlations(df: pd.DataFrame, category_cols: list[str], target: str):
-    results_cat = []
-    for col in category_cols:
-        if df[col].nunique() > 1:
-            v = cramers_v(df[col].astype(str), df[target])
-            results_cat.append({'feature': col, 'cramers_v': v})
+def identify_categorical_target_correlations(df: pd.DataFrame, category_cols: list[str], target: str):
+    # Cramér's V of each categorical feature with the target; missing values count as their own category
+    category_cols = [col for col in category_cols if df[col].nunique() > 1]
+    results = ah.compute_associations(df, category_cols, [], target, pairs=False)
+    results = results.rename(columns={"feature_1": "feature", "value": "cramers_v"})
 
-    return pd.DataFrame(results_cat).sort_values('cramers_v', ascending=False)
\ No newline at end of file
+    return results[["feature", "cramers_v"]].sort_values("cramers_v", ascending=False)
@@ -0,0 +1,221 @@
+# src/helpers/encoding_helpers.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import scipy.sparse as sp
+
+# Row of an encoder's lookup table used for missing values and for codes no label maps
+NA_KEY, OTHER_KEY = 0, 1
+
+
+def to_arrow(s: pd.Series) -> pa.Array:
+    """
+    The column as one Arrow array. Zero-copy for pyarrow-backed columns.
+    """
+    arr = pa.array(s, from_pandas=True)
+    return arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+
+
+def _compile_map(base_col: str, code_map: dict) -> dict:
+    """
+    Compile one *_ohe_map into a lookup table: one row per distinct code (plus NA and other rows),
+    one int8 column per output feature.
+    """
+    codes = list(dict.fromkeys(code for label_codes in code_map.values() for code in label_codes))
+
+    # Same names and order as the column-at-a-time version; a label named "other" or "NA" is replaced
+    # by the built-in indicator of that name, as assigning the same column twice did
+    names = list(dict.fromkeys([f"{base_col}_NA"] + [f"{base_col}_{label}" for label in code_map] + [f"{base_col}_other"]))
+    table = np.zeros((len(codes) + 2, len(names)), dtype=np.int8)
+
+    definitions = [(f"{base_col}_NA", [NA_KEY])]
+    definitions += [(f"{base_col}_{label}", [codes.index(c) + 2 for c in label_codes]) for label, label_codes in code_map.items()]
+    definitions += [(f"{base_col}_other", [OTHER_KEY])]
+    for name, rows in definitions:
+        j = names.index(name)
+        table[:, j] = 0
+        table[rows, j] = 1
+
+    # Integer codes get a direct lookup array indexed by (value - lo)
+    int_codes = {c: codes.index(c) + 2 for c in codes if isinstance(c, (int, np.integer)) and not isinstance(c, bool)}
+    lo, lut = compile_lookup(int_codes, OTHER_KEY, np.int32)
+
+    return {
+        "base_col": base_col,
+        "names": names,
+        "table": np.asfortranarray(table),
+        "sparse_table": sp.csr_matrix(table),
+        "code_keys": {c: i + 2 for i, c in enumerate(codes)},
+        "lo": lo,
+        "lut": lut,
+    }
+
+
+def compile_lookup(code_values: dict, default, dtype) -> tuple[int, np.ndarray]:
+    """
+    Lookup array over the integer codes' range: lut[code - lo] is that code's value, default elsewhere.
+    """
+    lo = min(code_values, default=0)
+    lut = np.full(max(code_values, default=0) - lo + 1, default, dtype=dtype)
+    for code, value in code_values.items():
+        lut[code - lo] = value
+    return lo, lut
+
+
+def lookup_integers(values: np.ndarray, lo: int, lut: np.ndarray, default) -> np.ndarray:
+    if values.dtype.itemsize <= 2:
+        # 8/16-bit codes: expand to a table over every possible value and index it directly, no bounds checks
+        unsigned = np.dtype(f"u{values.dtype.itemsize}")
+        info = np.iinfo(values.dtype)
+        codes = np.arange(lo, lo + len(lut))
+        fits = (codes >= info.min) & (codes <= info.max)
+        full = np.full(1 << (8 * values.dtype.itemsize), default, dtype=lut.dtype)
+        full[codes[fits].astype(values.dtype).view(unsigned)] = lut[fits]
+        return full[values.view(unsigned)]
+
+    idx = values.astype(np.int64, copy=False) - lo
+    # Negative offsets wrap to huge unsigned values, so one comparison checks both bounds
+    hit = idx.view(np.uint64) < len(lut)
+    out = lut[np.where(hit, idx, 0)]
+    out[~hit] = default
+    return out
+
+
+def _integer_keys(arr: pa.Array, spec: dict) -> np.ndarray:
+    values = arr.fill_null(-1).to_numpy()
+    keys = lookup_integers(values, spec["lo"], spec["lut"], OTHER_KEY)
+    keys[values == -1] = NA_KEY
+    return keys
+
+
+def _numeric_keys(arr: pa.Array, spec: dict) -> np.ndarray:
+    values = arr.to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+    idx = values - spec["lo"]
+    # NaN fails every comparison, so nulls and non-integer values fall through to other
+    hit = (idx >= 0) & (idx < len(spec["lut"])) & (idx == np.floor(idx))
+    keys = np.where(hit, spec["lut"][np.where(hit, idx, 0).astype(np.intp)], OTHER_KEY)
+    keys[np.isnan(values) | (values == -1)] = NA_KEY
+    return keys
+
+
+def _dictionary_keys(arr: pa.Array, spec: dict) -> np.ndarray:
+    # Look up each distinct value once, then broadcast through the dictionary indices
+    encoded = pc.dictionary_encode(arr)
+    dictionary_keys = np.array(
+        [spec["code_keys"].get(v, OTHER_KEY) for v in encoded.dictionary.to_pylist()] + [NA_KEY], dtype=np.int32
+    )
+    indices = encoded.indices.fill_null(len(encoded.dictionary)).to_numpy(zero_copy_only=False)
+    return dictionary_keys[indices]
+
+
+class OneHotEncoder:
+    """
+    The *_ohe_map one-hot encoding from feature_engineering.yaml, compiled into lookup tables.
+    Each source column is encoded in one vectorized pass: values -> lookup-table row -> int8 indicators.
+    Fit once (on the columns present), then reuse on any batch or at inference time.
+    """
+
+    def __init__(self, cfg_feature_engineering: dict):
+        fe_cfg = cfg_feature_engineering["feature_engineering"]
+        self.maps = {k.replace("_ohe_map", ""): v for k, v in fe_cfg.items() if k.endswith("_ohe_map")}
+
+    def fit(self, df: pd.DataFrame) -> "OneHotEncoder":
+        self.specs_ = [_compile_map(col, code_map) for col, code_map in self.maps.items() if col in df.columns]
+        self.columns_ = [spec["base_col"] for spec in self.specs_]
+        return self
+
+    def get_feature_names_out(self) -> list[str]:
+        return [name for spec in self.specs_ for name in spec["names"]]
+
+    def _keys(self, s: pd.Series, spec: dict) -> np.ndarray:
+        arr = to_arrow(s)
+        if pa.types.is_integer(arr.type):
+            return _integer_keys(arr, spec)
+        if pa.types.is_floating(arr.type):
+            return _numeric_keys(arr, spec)
+        return _dictionary_keys(arr, spec)
+
+    def transform(self, df: pd.DataFrame, sparse: bool = False):
+        """
+        Encode the fitted source columns. Returns an (n_rows, n_features) int8 array in column-major order,
+        or a CSR matrix with sparse=True.
+        """
+        if sparse:
+            blocks = [spec["sparse_table"][self._keys(df[spec["base_col"]], spec)] for spec in self.specs_]
+            return sp.hstack(blocks, format="csr", dtype=np.int8)
+
+        out = np.empty((len(df), len(self.get_feature_names_out())), dtype=np.int8, order="F")
+        offset = 0
+        for spec in self.specs_:
+            keys = self._keys(df[spec["base_col"]], spec)
+            # One contiguous gather per output column
+            for k in range(len(spec["names"])):
+                out[:, offset + k] = spec["table"][:, k][keys]
+            offset += len(spec["names"])
+        return out
+
+    def transform_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop the source columns and append the int8[pyarrow] indicator columns, the same layout one_hot_encode_columns produced.
+        """
+        block = self.transform(df)
+        encoded = {
+            name: pd.arrays.ArrowExtensionArray(pa.array(block[:, j]))
+            for j, name in enumerate(self.get_feature_names_out())
+        }
+        return pd.concat([df.drop(columns=self.columns_), pd.DataFrame(encoded, index=df.index)], axis=1)
+
+
+def bitmask_dtype(n_labels: int):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_labels <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"{n_labels} labels do not fit in a 64-bit mask")
+
+
+def compile_code_map(code_map: dict) -> dict:
+    """
+    Compile a *_code_map into a lookup array from slot code to label bitmask (bit i = i-th label in the map).
+    """
+    labels = list(code_map)
+    dtype = bitmask_dtype(len(labels))
+    bits = {}
+    for i, codes in enumerate(code_map.values()):
+        for code in codes:
+            bits[code] = bits.get(code, 0) | (1 << i)
+
+    lo, lut = compile_lookup(bits, 0, dtype)
+    return {"labels": labels, "lo": lo, "lut": lut}
+
+
+def multi_hot_bitmask(df: pd.DataFrame, slot_cols: list[str], compiled: dict) -> np.ndarray:
+    """
+    OR the label bitmasks of every slot together: one lookup per slot column, one pass over the rows.
+    Missing slots and non-integer codes (e.g. 1.5 in dirty raw data) contribute no bits.
+    """
+    lo, lut = compiled["lo"], compiled["lut"]
+    mask = np.zeros(len(df), dtype=lut.dtype)
+    for col in slot_cols:
+        values = to_arrow(df[col])
+        if pa.types.is_floating(values.type):
+            mask |= _float_bitmask(values, lo, lut)
+        else:
+            mask |= lookup_integers(values.fill_null(-1).to_numpy(), lo, lut, 0)
+    return mask
+
+
+def _float_bitmask(values: pa.Array, lo: int, lut: np.ndarray) -> np.ndarray:
+    # Like _numeric_keys: NaN fails every comparison, so nulls and non-integer codes fall through to no bits
+    idx = values.to_numpy(zero_copy_only=False).astype(np.float64, copy=False) - lo
+    hit = (idx >= 0) & (idx < len(lut)) & (idx == np.floor(idx))
+    return np.where(hit, lut[np.where(hit, idx, 0).astype(np.intp)], 0).astype(lut.dtype, copy=False)
+
+
+def unpack_bitmask(mask: np.ndarray, labels: list[str], prefix: str) -> dict:
+    """
+    Expand a packed bitmask into one int8 indicator per label, named {prefix}{label}.
+    """
+    return {f"{prefix}{label}": ((mask >> i) & 1).astype(np.int8) for i, label in enumerate(labels)}
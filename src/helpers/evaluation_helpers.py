@@ -0,0 +1,162 @@
+# src/helpers/evaluation_helpers.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+METRICS = ["F1", "Accuracy", "Precision", "Recall", "ROC AUC", "PR AUC"]
+
+
+def score_cells(y_true, y_prob, segments=None, decimals: int | None = None):
+    """
+    Negative / positive counts per (segment, distinct score) from one sort and one bincount.
+    Returns the thresholds in descending order (K + 1,), counts (S, K + 1, 2) and the S segment labels
+    ("all" without segments; missing segment values are labelled "missing"). The first threshold is +inf
+    with an empty cell: the predict-nobody point (with_predict_none).
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_prob = np.asarray(y_prob, dtype=np.float64)
+    if decimals is not None:
+        y_prob = np.round(y_prob, decimals)
+    neg_scores, inverse = np.unique(-y_prob, return_inverse=True)
+
+    if segments is None:
+        seg_codes, labels = np.zeros(len(y_true), dtype=np.int64), ["all"]
+    else:
+        seg_codes, labels = pd.factorize(pd.Series(segments, dtype=object).fillna("missing"), sort=True)
+        labels = list(labels)
+
+    n_scores = len(neg_scores)
+    cells = (seg_codes * n_scores + inverse) * 2 + y_true
+    counts = np.bincount(cells, minlength=len(labels) * n_scores * 2).reshape(len(labels), n_scores, 2)
+    return (*with_predict_none(-neg_scores, counts), labels)
+
+
+def with_predict_none(scores: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Prepend threshold +inf with an empty cell to descending scores and their (..., K, 2) counts, so every
+    curve starts at tp = fp = 0 and the optimum can be to predict nobody positive.
+    """
+    return np.r_[np.inf, scores], np.concatenate([np.zeros((*counts.shape[:-2], 1, 2), counts.dtype), counts], axis=-2)
+
+
+def confusion_curve(counts: np.ndarray):
+    """
+    Cumulative true and false positives at each threshold of (..., K, 2) counts in descending score order,
+    plus the positive and negative totals (kept as a trailing axis of length 1 so they broadcast).
+    """
+    tp = counts[..., 1].cumsum(axis=-1)
+    fp = counts[..., 0].cumsum(axis=-1)
+    return tp, fp, tp[..., -1:], fp[..., -1:]
+
+
+def threshold_metrics(tp, fp, n_pos, n_neg) -> dict[str, np.ndarray]:
+    """
+    F1, Accuracy, Precision and Recall from confusion counts. Undefined precision and F1 are 0;
+    recall without positives is NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "F1": np.where(tp + fp + n_pos > 0, 2 * tp / (tp + fp + n_pos), 0.0),
+            "Accuracy": (tp + n_neg - fp) / (n_pos + n_neg),
+            "Precision": np.where(tp + fp > 0, tp / (tp + fp), 0.0),
+            "Recall": tp / n_pos,
+        }
+
+
+def optimal_index(tp, fp, n_pos, fp_cost: float | None = None, fn_cost: float | None = None) -> np.ndarray:
+    """
+    Position on each curve that maximizes F1, or minimizes fp_cost * FP + fn_cost * FN when costs are given.
+    Ties go to the highest threshold.
+    """
+    if fp_cost is not None or fn_cost is not None:
+        return ((fp_cost or 0.0) * fp + (fn_cost or 0.0) * (n_pos - tp)).argmin(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(tp + fp + n_pos > 0, 2 * tp / (tp + fp + n_pos), 0.0).argmax(axis=-1)
+
+
+def curve_metrics(counts: np.ndarray, threshold_index=None) -> dict[str, np.ndarray]:
+    """
+    Every metric from the cumulative confusion matrix over thresholds, vectorized over any leading axes of
+    counts (..., K, 2) as score_cells returns them, e.g. segments or bootstrap resamples.
+    Threshold-based metrics are taken at threshold_index (predict positive for the scores in the first
+    threshold_index + 1 cells), or at the F1-optimal threshold of each curve when None. ROC AUC is the
+    trapezoid over the curve and PR AUC the step-wise average precision, so both match sklearn.
+    """
+    counts = counts.astype(np.float64)
+    tp, fp, n_pos, n_neg = confusion_curve(counts)
+    if threshold_index is None:
+        threshold_index = optimal_index(tp, fp, n_pos)
+    index = np.broadcast_to(np.asarray(threshold_index), tp.shape[:-1])[..., None]
+    tp_at, fp_at = np.take_along_axis(tp, index, -1)[..., 0], np.take_along_axis(fp, index, -1)[..., 0]
+    pos, neg = n_pos[..., 0], n_neg[..., 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = np.concatenate([np.zeros_like(n_pos), tp], axis=-1) / n_pos
+        fpr = np.concatenate([np.zeros_like(n_neg), fp], axis=-1) / n_neg
+        roc_auc = (np.diff(fpr, axis=-1) * (tpr[..., 1:] + tpr[..., :-1]) / 2).sum(axis=-1)
+        precision_curve = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        pr_auc = (counts[..., 1] * precision_curve).sum(axis=-1) / pos
+
+    return {
+        **threshold_metrics(tp_at, fp_at, pos, neg),
+        "ROC AUC": np.where((pos > 0) & (neg > 0), roc_auc, np.nan),
+        "PR AUC": np.where(pos > 0, pr_auc, np.nan),
+        "index": np.asarray(threshold_index),
+    }
+
+
+def _rebin(thresholds: np.ndarray, counts: np.ndarray, index: int, decimals: int):
+    # Merge scores equal after rounding, keeping the chosen threshold a bin edge so metrics at it stay exact
+    rounded = np.round(thresholds, decimals)
+    starts = np.flatnonzero(np.r_[True, rounded[1:] != rounded[:-1]] | (np.arange(len(rounded)) == index + 1))
+    return np.add.reduceat(counts, starts, axis=-2), np.searchsorted(starts, index, side="right") - 1
+
+
+def evaluate(y_true, y_prob, segments=None, n_boot: int = 1000, alpha: float = 0.05, decimals: int = 3,
+             batch_size: int = 100, random_state: int = 42) -> pd.DataFrame:
+    """
+    All test metrics, overall and per segment, with percentile bootstrap confidence intervals.
+    - One pass builds the (segment, score) count cube; every metric comes from its cumulative sums
+    - The threshold is F1-optimal on the whole test set; segments and resamples are scored at that threshold
+    - Resampling rows with replacement is a multinomial draw over the cube's cells, so batch_size resamples
+      are one matrix (scores rounded to decimals for the resamples only; point estimates are exact)
+    Returns one row per (segment, metric) with Score, ci_low, ci_high and n.
+    """
+    thresholds, counts, labels = score_cells(y_true, y_prob, segments)
+    overall = curve_metrics(counts.sum(axis=0))
+    index = int(overall["index"])
+    point = {"all": overall}
+    if segments is not None:
+        by_segment = curve_metrics(counts, index)
+        point.update({label: {m: by_segment[m][s] for m in METRICS} for s, label in enumerate(labels)})
+
+    samples = {name: {m: [] for m in METRICS} for name in point}
+    if n_boot:
+        rng = np.random.default_rng(random_state)
+        binned, binned_index = _rebin(thresholds, counts, index, decimals)
+        n = int(binned.sum())
+        p = (binned / n).ravel()
+        for start in range(0, n_boot, batch_size):
+            draws = rng.multinomial(n, p, size=min(batch_size, n_boot - start)).reshape(-1, *binned.shape)
+            resampled = {"all": curve_metrics(draws.sum(axis=1), binned_index)}
+            if segments is not None:
+                by_segment = curve_metrics(draws, binned_index)
+                resampled.update({label: {m: by_segment[m][:, s] for m in METRICS} for s, label in enumerate(labels)})
+            for name, metrics in resampled.items():
+                for m in METRICS:
+                    samples[name][m].append(metrics[m])
+
+    sizes = dict(zip(labels, counts.sum(axis=(1, 2)))) if segments is not None else {}
+    sizes["all"] = int(counts.sum())
+    rows = []
+    for name, metrics in point.items():
+        for m in METRICS:
+            draws = np.concatenate(samples[name][m]) if samples[name][m] else np.array([np.nan])
+            low, high = np.nanquantile(draws, [alpha / 2, 1 - alpha / 2]) if np.isfinite(draws).any() else (np.nan, np.nan)
+            rows.append({"segment": name, "metric": m, "Score": float(metrics[m]), "ci_low": low, "ci_high": high,
+                         "n": int(sizes[name])})
+
+    results = pd.DataFrame(rows).set_index(["segment", "metric"])
+    results.attrs["threshold"] = float(thresholds[index])
+    return results
@@ -1,27 +1,70 @@
-# src/helpers/eda_helpers.py
+# src/helpers/feature_engineering_helper.py
 import pandas as pd
+from pathlib import Path
 from typing import Dict, List, Optional
-from sklearn.model_selection import train_test_split
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.helpers.encoding_helpers as enc
+import src.helpers.imputation_helpers as imp
 import numpy as np
 
-def generate_multi_hot_features(df: pd.DataFrame, cfg: Dict, prefix: str) -> pd.DataFrame:
+# Continuous features that are log transformed and standard scaled before PCA
+SCALED_NUMERIC_COLS = [
+    "loan_amount", "income", "combined_loan_to_value_ratio", "loan_term", "intro_rate_period", "prepayment_penalty_term",
+    "property_value", "loan_to_income_ratio", "debt_to_income_ratio_60100_x_loan_to_income_ratio",
+    "debt_to_income_ratio_5060_x_loan_to_income_ratio", "debt_to_income_ratio_4850_x_loan_to_income_ratio",
+    "debt_to_income_ratio_4547_x_loan_to_income_ratio",
+]
+
+MULTI_HOT_PREFIXES = ["applicant_ethnicity_", "co_applicant_ethnicity_", "applicant_race_", "co_applicant_race_"]
+
+# Columns dropped in 03a: multi-hot source slots, identifiers, the pre-target, and features with very low correlation to the target
+MODEL_DROP_COLUMNS = [f"{prefix}{i}" for prefix in MULTI_HOT_PREFIXES for i in range(1, 6)] + [
+    "action_taken", "census_tract", "county_code", "activity_year", "lei",
+    "state_code", "multifamily_affordable_units", "multifamily_affordable_units_exempt", "applicant_age",
+    "applicant_age_above_62", "balloon_payment", "total_units",
+]
+
+CATEGORICAL_NUMERIC_COLS = ["applicant_credit_scoring_model", "co_applicant_credit_scoring_model",
+                            "manufactured_home_secured_property_type", "submission_of_application",
+                            "initially_payable_to_institution"]
+MEDIAN_FILL_COLS = ["combined_loan_to_value_ratio", "loan_term", "intro_rate_period", "prepayment_penalty_term",
+                    "loan_to_income_ratio"]
+
+# Split parameters shared by create_train_test_splits and the imputer fit, which must agree on the train rows
+TEST_SIZE = 0.15
+N_FOLDS = 3
+# Share of the train rows split_row_groups puts in "validation" (out-of-core training picks its best epoch on it)
+VALIDATION_FRACTION = 0.05
+
+# One-hot debt_to_income_ratio bands that get a loan_to_income_ratio interaction.
+# YAML reads labels like 60_100 as the integer 60100, hence the column names.
+DTI_INTERACTION_COLS = ["debt_to_income_ratio_60100", "debt_to_income_ratio_5060", "debt_to_income_ratio_4850",
+                        "debt_to_income_ratio_4547"]
+
+
+def generate_multi_hot_features(df: pd.DataFrame, cfg: Dict, prefix: str, packed: bool = False) -> pd.DataFrame:
+    """
+    One int8 column per label of the prefix's *_code_map: 1 if any of the 5 slots holds one of its codes.
+    With packed=True a single {prefix}bitmask column (bit i = i-th label) is added instead.
+    """
     # Derive the code map key from the prefix
     map_key = f"{prefix}code_map"
-    code_map: Dict[str, List[int]] = cfg["feature_engineering"][map_key]
+    compiled = enc.compile_code_map(cfg["feature_engineering"][map_key])
 
     # Build the slot column names
     slot_cols = [f"{prefix}{i}" for i in range(1, 6)]
+    mask = enc.multi_hot_bitmask(df, slot_cols, compiled)
 
-    # Compute multi-hot columns
-    slots = df[slot_cols]
-    out_cols: List[str] = []
+    if packed:
+        df[f"{prefix}bitmask"] = pd.arrays.ArrowExtensionArray(pa.array(mask))
+        return df
 
-    for label, codes in code_map.items():
-        col_name = f"{prefix}{label}"
-        mask = slots.isin(codes).any(axis=1)
-        df[col_name] = mask.astype("int8[pyarrow]").fillna(-1)
-        out_cols.append(col_name)
+    for col_name, values in enc.unpack_bitmask(mask, compiled["labels"], prefix).items():
+        df[col_name] = pd.arrays.ArrowExtensionArray(pa.array(values))
 
     return df
 
@@ -29,121 +72,268 @@ def generate_multi_hot_features(df: pd.DataFrame, cfg: Dict, prefix: str) -> pd.
 def impute_income(df: pd.DataFrame) -> pd.DataFrame:
     """
     Impute missing income values using median (income / loan_amount) ratio stratified by loan_type.
+    Fits on df itself; use a persisted FeatureImputer to reuse train statistics.
     """
-    # Compute ratio
-    df["income_to_loan_ratio"] = df["income"] / df["loan_amount"]
+    return imp.RatioImputer("income").fit(df).transform(df)
 
-    # Median ratio by loan_type
-    ratio_medians = (
-        df.loc[df["income_to_loan_ratio"].notna()]
-            .groupby("loan_type")["income_to_loan_ratio"]
-            .median()
-    )
 
-    # Map median ratio back to rows
-    df["median_ratio"] = df["loan_type"].map(ratio_medians)
+def impute_property_value(df: pd.DataFrame) -> pd.DataFrame:
+    # Median LTV ratio (loan_amount / property_value) by loan_type
+    return imp.RatioImputer("property_value", invert=True).fit(df).transform(df)
 
-    # Impute missing income
-    missing_mask = df["income"].isna() & df["loan_amount"].notna()
-    df.loc[missing_mask, "income"] = (
-        df.loc[missing_mask, "loan_amount"] * df.loc[missing_mask, "median_ratio"]
-    )
 
-    # Drop temporary columns
-    df = df.drop(columns=["income_to_loan_ratio", "median_ratio"])
+def add_loan_to_income_ratio(df: pd.DataFrame) -> pd.DataFrame:
+    # Income left missing (no loan_type / loan_amount to impute from) gives a missing ratio
+    income = df["income"].to_numpy(dtype=np.float64, na_value=np.nan)
+    loan_amount = df["loan_amount"].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["loan_to_income_ratio"] = np.where(income > 0, loan_amount / income, np.nan)
     return df
 
 
-def impute_property_value(df: pd.DataFrame) -> pd.DataFrame:
-    # Compute LTV ratio
-    df["loan_to_value_ratio"] = df["loan_amount"] / df["property_value"]
-
-    # Calculate median LTV ratio by loan_type
-    ltv_medians = (
-        df.loc[df["loan_to_value_ratio"].notna()]
-            .groupby("loan_type")["loan_to_value_ratio"]
-            .median()
-    )
-
-    # Map median ratios back to each row
-    df["median_ltv_ratio"] = df["loan_type"].map(ltv_medians)
-
-    # Impute property_value where missing
-    mask = df["property_value"].isna() & df["loan_amount"].notna()
-    df.loc[mask, "property_value"] = (
-        df.loc[mask, "loan_amount"] / df.loc[mask, "median_ltv_ratio"]
-    )
-
-    # Drop temporary columns
-    df = df.drop(columns=["loan_to_value_ratio", "median_ltv_ratio"])
-    return df
+def feature_imputer(median_cols: list[str]) -> imp.FeatureImputer:
+    """
+    The 03a imputations as one fitted object: income and property_value from loan_type median ratios,
+    loan_to_income_ratio from the imputed income, then median fills for median_cols.
+    """
+    return imp.FeatureImputer([
+        imp.RatioImputer("income"),
+        imp.RatioImputer("property_value", invert=True),
+        add_loan_to_income_ratio,
+        imp.MedianImputer(median_cols),
+    ])
+
+
+def train_rows(df: pd.DataFrame, test_size: float = TEST_SIZE) -> np.ndarray:
+    """
+    Mask of the rows create_train_test_splits (run with the same test_size) will put in train, known before the
+    split is saved because it only depends on row_key. Every row when there is no row_key.
+    """
+    if su.ROW_KEY not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    return assign_splits(df[su.ROW_KEY].to_numpy(dtype=np.uint64), test_size) >= 0
 
 
-def create_train_test_splits(df: pd.DataFrame, index_suffix=""):
-    # Stratified 85/15 split
-    train_idx, test_idx = train_test_split(
-        df.index,
-        stratify=df["denied_flag"],
-        test_size=0.15,
-        random_state=42
-    )
+def fit_feature_imputer(imputer: imp.FeatureImputer, df: pd.DataFrame | None = None, source_key: str = "hmda_2024_typed",
+                        batch_size: int = 1_000_000, test_size: float = TEST_SIZE) -> imp.FeatureImputer:
+    """
+    Fit on the train rows of df, or stream them from the Parquet file when df is None
+    (medians then come from quantile sketches and only the columns the imputer reads are loaded).
+    test_size must match the one the splits are created with.
+    """
+    if df is not None:
+        return imputer.fit(df.loc[train_rows(df, test_size), [c for c in imputer.columns if c in df.columns]])
 
-    # Convert to DataFrames for consistent output
-    train_df = pd.DataFrame(train_idx, columns=["index"])
-    test_df = pd.DataFrame(test_idx, columns=["index"])
+    dataset = ds.dataset(fu.get_path(source_key), format="parquet")
+    columns = [c for c in imputer.columns + [su.ROW_KEY] if c in dataset.schema.names]
 
-    # Output directory
-    train_output_path = fu.get_path("train_index" + index_suffix)
-    test_output_path = fu.get_path("test_index" + index_suffix)
+    def make_batches():
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+            batch = batch.to_pandas(types_mapper=pd.ArrowDtype)
+            yield batch[train_rows(batch, test_size)].copy()
+
+    print(f"Fitting imputers on the train rows of {fu.get_path(source_key)}")
+    return imputer.fit_batches(make_batches)
 
-    # Save index lists
-    train_df.to_csv(train_output_path, index=False)
-    test_df.to_csv(test_output_path, index=False)
 
-    print(f"Train indices saved to: {train_output_path / 'train_index.csv'}")
-    print(f"Test indices saved to:  {test_output_path / 'test_index.csv'}")
+def create_train_test_splits(df: pd.DataFrame, index_suffix="", test_size=TEST_SIZE, n_folds=N_FOLDS):
+    """
+    Assign every row to test or a train fold from its row_key, so membership survives rebuilds of the dataset.
+    """
+    _require_row_key(df.columns)
+    assignment = assign_splits(df[su.ROW_KEY].to_numpy(dtype=np.uint64), test_size, n_folds)
+    save_split_assignment(assignment, index_suffix, df.index)
 
 
-def one_hot_encode_columns(df: pd.DataFrame, cfg_feature_engineering: dict) -> pd.DataFrame:
-    fe_cfg = cfg_feature_engineering["feature_engineering"]
-    df_out = df.copy()
+def create_train_test_splits_from_parquet(index_suffix="", test_size=TEST_SIZE, n_folds=N_FOLDS, batch_size=1_000_000):
+    """
+    Streaming version of create_train_test_splits: reads only row_key from the modeling Parquet file
+    and writes the assignment straight into a memory-mapped .npy.
+    """
+    dataset = ds.dataset(fu.get_path("hmda_2024_model" + index_suffix), format="parquet")
+    _require_row_key(dataset.schema.names)
+    output_path = fu.get_path("split_assignment" + index_suffix)
+    assignment = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.int8, shape=(dataset.count_rows(),))
+
+    start = 0
+    for batch in dataset.to_batches(columns=[su.ROW_KEY], batch_size=batch_size):
+        end = start + batch.num_rows
+        assignment[start:end] = assign_splits(np.asarray(batch.column(0)), test_size, n_folds)
+        start = end
+    assignment.flush()
+
+    save_split_assignment(assignment, index_suffix)
+
+
+def _require_row_key(columns) -> None:
+    # Keying on anything else (e.g. the feature values) would reshuffle the split whenever feature engineering changes
+    if su.ROW_KEY not in columns:
+        raise KeyError(f"Splits are keyed on {su.ROW_KEY}, which the model dataset does not have; rebuild it from the "
+                       "current hmda_2024_typed")
+
+
+def assign_splits(row_keys, test_size=TEST_SIZE, n_folds=N_FOLDS, seed=42) -> np.ndarray:
+    """
+    Deterministic split from a 64-bit row key. Returns int8: -1 for test, 0..n_folds-1 for the train fold.
+    The key is mixed and read as two independent uniform draws (one for test, one for fold). Because the draw
+    doesn't depend on the label, each class lands in test at test_size up to sampling noise (~1e-4 at HMDA scale).
+    """
+    mixed = _mix64(np.asarray(row_keys, dtype=np.uint64) ^ np.uint64(seed))
+    u_test = (mixed & np.uint64(0xFFFFFFFF)).astype(np.float64) / 2.0 ** 32
+    u_fold = (mixed >> np.uint64(32)).astype(np.float64) / 2.0 ** 32
+
+    assignment = np.floor(u_fold * n_folds).astype(np.int8)
+    assignment[u_test < test_size] = -1
+    return assignment
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer, so every bit of the key affects both draws
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def save_split_assignment(assignment: np.ndarray, index_suffix="", index=None):
+    split_path = fu.get_path("split_assignment" + index_suffix)
+    if not (isinstance(assignment, np.memmap) and Path(assignment.filename) == split_path):
+        np.save(split_path, assignment)
+
+    # The index CSVs are still written for notebooks that read them directly
+    index = np.arange(len(assignment)) if index is None else np.asarray(index)
+    train_output_path = fu.get_path("train_index" + index_suffix)
+    test_output_path = fu.get_path("test_index" + index_suffix)
+    pd.DataFrame({"index": index[assignment >= 0]}).to_csv(train_output_path, index=False)
+    pd.DataFrame({"index": index[assignment < 0]}).to_csv(test_output_path, index=False)
 
-    for col_key, code_map in fe_cfg.items():
-        if not col_key.endswith("_ohe_map"):
-            continue
+    print(f"Split assignment saved to: {split_path}")
+    print(f"Train indices saved to: {train_output_path}")
+    print(f"Test indices saved to:  {test_output_path}")
 
-        base_col = col_key.replace("_ohe_map", "")
-        if base_col not in df_out.columns:
-            continue
 
-        s = df_out[base_col]
-        s_int = s.astype("Int64") if pd.api.types.is_integer_dtype(s) else s
+def load_split_assignment(index_suffix="") -> np.ndarray:
+    """
+    Memory-map the split assignment. -1 = test, 0..k-1 = train fold.
+    """
+    return np.load(fu.get_path("split_assignment" + index_suffix), mmap_mode="r")
 
-        # missing mask
-        na_mask = s.isna() | (s == -1)
-        df_out[f"{base_col}_NA"] = na_mask.astype("int8[pyarrow]")
 
-        # track mapped codes
-        mapped_codes = set()
+def split_row_groups(pf: pq.ParquetFile, split: str, index_suffix: str = "") -> list[tuple[int, np.ndarray]]:
+    """
+    (row group, positions within it) for every row group of the model dataset holding rows of the split:
+    "train", "test", or "fit" / "validation", which divide the train rows with VALIDATION_FRACTION of them
+    (drawn from the row position) going to validation.
+    """
+    assignment = load_split_assignment(index_suffix)
+    groups, start = [], 0
+    for i in range(pf.metadata.num_row_groups):
+        n = pf.metadata.row_group(i).num_rows
+        in_group = np.asarray(assignment[start:start + n])
+        mask = in_group < 0 if split == "test" else in_group >= 0
+        if split in ("fit", "validation"):
+            held_out = assign_splits(np.arange(start, start + n), VALIDATION_FRACTION, n_folds=1, seed=7) < 0
+            mask &= held_out if split == "validation" else ~held_out
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            groups.append((i, rows))
+        start += n
+    return groups
+
+
+def load_split_positions(index_suffix="", fold: int | None = None):
+    """
+    Return (train, test) row positions. With fold, returns (train minus fold, fold) for cross-validation.
+    Uses the .npy assignment when present and the index CSVs otherwise.
+    """
+    if fu.get_path("split_assignment" + index_suffix).exists():
+        assignment = load_split_assignment(index_suffix)
+        if fold is not None:
+            return np.flatnonzero((assignment >= 0) & (assignment != fold)), np.flatnonzero(assignment == fold)
+        return np.flatnonzero(assignment >= 0), np.flatnonzero(assignment < 0)
 
-        # create columns for all defined mappings
-        for label, codes in code_map.items():
-            mask = s_int.isin(codes) & ~na_mask
-            df_out[f"{base_col}_{label}"] = mask.astype("int8[pyarrow]")
-            mapped_codes.update(codes)
+    if fold is not None:
+        raise FileNotFoundError("Fold positions need the split assignment; run create_train_test_splits first")
+    train_idx = pd.read_csv(fu.get_path("train_index" + index_suffix))["index"].to_numpy()
+    test_idx = pd.read_csv(fu.get_path("test_index" + index_suffix))["index"].to_numpy()
+    return train_idx, test_idx
 
-        # catch any unmapped, non-missing codes
-        other_mask = ~s_int.isin(mapped_codes) & ~na_mask
-        df_out[f"{base_col}_other"] = other_mask.astype("int8[pyarrow]")
 
-        # drop the original column
-        df_out.drop(columns=[base_col], inplace=True)
+def one_hot_encode_columns(df: pd.DataFrame, cfg_feature_engineering: dict, encoder=None) -> pd.DataFrame:
+    """
+    Replace each column with a *_ohe_map by its NA / label / other int8 indicators.
+    Pass an encoding_helpers.OneHotEncoder to reuse it; an unfitted one is fitted on df in place.
+    """
+    encoder = encoder or enc.OneHotEncoder(cfg_feature_engineering)
+    if not hasattr(encoder, "specs_"):
+        encoder.fit(df)
 
-    return df_out
+    return encoder.transform_frame(df)
 
 
 def log_transform_skewed_features(df: pd.DataFrame) -> pd.DataFrame:
     transform_features = ["income", "property_value", "loan_amount", "intro_rate_period", "loan_term", "loan_to_income_ratio", "prepayment_penalty_term", "combined_loan_to_value_ratio", 'debt_to_income_ratio_60100_x_loan_to_income_ratio', 'debt_to_income_ratio_5060_x_loan_to_income_ratio', 'debt_to_income_ratio_4850_x_loan_to_income_ratio', 'debt_to_income_ratio_4547_x_loan_to_income_ratio']
     df[transform_features] = np.log1p(df[transform_features])
 
-    return df
\ No newline at end of file
+    return df
+
+
+def add_missing_flags(df: pd.DataFrame) -> pd.DataFrame:
+    df["income_missing"] = df["income"].isna().astype("int8[pyarrow]").fillna(-1)
+    df["property_value_missing"] = df["property_value"].isna().astype("int8[pyarrow]").fillna(-1)
+    return df
+
+
+def add_missing_flag_and_impute(df: pd.DataFrame, imputer: imp.FeatureImputer | None = None) -> pd.DataFrame:
+    """
+    Missing flags, then the imputations. Without an imputer the statistics are fitted on the train rows of df.
+    """
+    df = add_missing_flags(df)
+    if imputer is None:
+        imputer = feature_imputer([])
+    if not hasattr(imputer, "fitted_"):
+        fit_feature_imputer(imputer, df)
+    return imputer.transform(df)
+
+
+def _is_string_dtype(dtype) -> bool:
+    # Dictionary-encoded strings (memory_utils planned types) get the same NA fill as plain ones
+    if isinstance(dtype, pd.ArrowDtype) and pa.types.is_dictionary(dtype.pyarrow_dtype):
+        return pa.types.is_string(dtype.pyarrow_dtype.value_type)
+    return pd.api.types.is_string_dtype(dtype) and not pd.api.types.is_object_dtype(dtype)
+
+
+def build_model_dataset(df: pd.DataFrame, cfg_feature_engineering: dict, encoder=None, imputer=None) -> pd.DataFrame:
+    """
+    The notebook 03a feature spec as one function: hmda_2024_typed in, hmda_2024_model out.
+    Pass a OneHotEncoder and a FeatureImputer to keep them for inference; an unfitted imputer is fitted
+    on the train rows only.
+    """
+    for prefix in MULTI_HOT_PREFIXES:
+        generate_multi_hot_features(df, cfg_feature_engineering, prefix)
+
+    df["multifamily_affordable_units"] = df["multifamily_affordable_units"].fillna(0)
+    imputer = imputer or feature_imputer(CATEGORICAL_NUMERIC_COLS + MEDIAN_FILL_COLS)
+    df = add_missing_flag_and_impute(df, imputer)
+    df = df.drop(columns=[c for c in MODEL_DROP_COLUMNS if c in df.columns])
+
+    # Fill string missing values with NA for one-hot encoding
+    string_cols = [c for c in df.columns if _is_string_dtype(df[c].dtype)]
+    df[string_cols] = df[string_cols].fillna("NA")
+
+    df = one_hot_encode_columns(df, cfg_feature_engineering, encoder)
+
+    for col in DTI_INTERACTION_COLS:
+        df[f"{col}_x_loan_to_income_ratio"] = df[col] * df["loan_to_income_ratio"]
+
+    return df
+
+
+def build_catboost_model_dataset(df: pd.DataFrame, imputer=None) -> pd.DataFrame:
+    """
+    The 03a_catboost feature spec: categoricals stay raw for CatBoost, so no multi-hot or one-hot encoding.
+    """
+    df = add_missing_flag_and_impute(df, imputer or feature_imputer(MEDIAN_FILL_COLS))
+    df = df.drop(columns=[c for c in MODEL_DROP_COLUMNS if c in df.columns])
+
+    return df
@@ -0,0 +1,183 @@
+# src/helpers/feature_store_helpers.py
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+import src.utils.schema_utils as su
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.model_helpers as mh
+import src.helpers.sparse_svd_helpers as ssvd
+import src.helpers.training_helpers as th
+
+# Fitted transforms (paths.yaml keys) each view is computed with. pca and pca_svd are the combined
+# matrices the MLP and logistic regression train on (training_helpers.transform_features).
+VIEWS = {
+    "raw": [],
+    "scaled": ["scaler_model"],
+    "ipca": ["scaler_model", "ipca_model"],
+    "svd": ["svd_model"],
+    "pca": ["scaler_model", "ipca_model"],
+    "pca_svd": ["scaler_model", "ipca_model", "svd_model"],
+}
+SPLITS = ("train", "test")
+TARGET_COL = "denied_flag"
+
+
+def view_key(view: str, index_suffix: str = "") -> str:
+    """
+    Identifies one materialized view: the model dataset and split assignment files it was built from
+    and the registry version of every fitted transform it uses. Refitting any of them gives a new key.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{view}{index_suffix}".encode())
+    for key in ["hmda_2024_model" + index_suffix, "split_assignment" + index_suffix]:
+        stat = fu.get_path(key).stat()
+        h.update(f"{key}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    for key in VIEWS[view]:
+        meta = mr.load_metadata(key)
+        h.update(f"{key}:{meta.get('version')}:{meta.get('size')}".encode())
+    return h.hexdigest()
+
+
+def view_dir(view: str, index_suffix: str = "") -> Path:
+    return fu.get_path("feature_store") / f"{view}{index_suffix}_{view_key(view, index_suffix)}"
+
+
+def transform_view(view: str, X: pd.DataFrame, transforms: dict) -> tuple[np.ndarray, list[str]]:
+    """
+    One batch of model-dataset rows as the view's matrix, with its column names.
+    """
+    cat_cols = [c for c in X.columns if c not in feh.SCALED_NUMERIC_COLS]
+    if view == "raw":
+        return X.to_numpy(dtype=np.float32, na_value=np.nan), list(X.columns)
+    if view == "scaled":
+        X_numeric = feh.log_transform_skewed_features(X[feh.SCALED_NUMERIC_COLS].copy())
+        return transforms["scaler"].transform(X_numeric), list(feh.SCALED_NUMERIC_COLS)
+    if view == "ipca":
+        pcs = th.transform_numeric_pca(X, transforms["scaler"], transforms["ipca"])
+        return pcs, [f"PC{i + 1}" for i in range(pcs.shape[1])]
+    if view == "svd":
+        svd = transforms["svd"].transform(ssvd.to_csr(X, cat_cols))
+        return svd, [f"SVD{i + 1}" for i in range(svd.shape[1])]
+
+    combined = th.transform_features(view, X, transforms)
+    n_pcs = transforms["ipca"].n_components_
+    tail = [f"SVD{i + 1}" for i in range(combined.shape[1] - n_pcs)] if view == "pca_svd" else cat_cols
+    return combined, [f"PC{i + 1}" for i in range(n_pcs)] + tail
+
+
+def materialize_view(view: str, index_suffix: str = "", batch_size: int = 250_000) -> Path:
+    """
+    Transform the whole model dataset into the view once, in one sequential pass, writing float32
+    X_<split>.npy, int8 y_<split>.npy and the row positions of each split. Written to a temporary
+    directory and renamed, so readers never see a half-built view.
+    """
+    out_dir = view_dir(view, index_suffix)
+    if out_dir.exists():
+        return out_dir
+
+    dataset = ds.dataset(fu.get_path("hmda_2024_model" + index_suffix), format="parquet")
+    feature_cols = [c for c in dataset.schema.names if c not in (TARGET_COL, su.ROW_KEY)]
+    assignment = np.asarray(feh.load_split_assignment(index_suffix))
+    positions = {"train": np.flatnonzero(assignment >= 0), "test": np.flatnonzero(assignment < 0)}
+    transforms = {name.removesuffix("_model"): mr.get_model(name) for name in VIEWS[view]}
+
+    tmp_dir = out_dir.with_name(f".{out_dir.name}.{os.getpid()}.tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Materializing the {view} view to {out_dir}")
+
+    matrices, labels, offsets, columns = {}, {}, dict.fromkeys(SPLITS, 0), None
+    start = 0
+    for batch in dataset.to_batches(columns=feature_cols + [TARGET_COL], batch_size=batch_size):
+        df = batch.to_pandas()
+        in_test = assignment[start:start + len(df)] < 0
+        start += len(df)
+        for split, rows in (("train", ~in_test), ("test", in_test)):
+            if not rows.any():
+                continue
+            X, columns = transform_view(view, df.loc[rows, feature_cols], transforms)
+            if split not in matrices:
+                shape = (len(positions[split]), X.shape[1])
+                matrices[split] = np.lib.format.open_memmap(tmp_dir / f"X_{split}.npy", mode="w+", dtype=np.float32, shape=shape)
+                labels[split] = np.lib.format.open_memmap(tmp_dir / f"y_{split}.npy", mode="w+", dtype=np.int8,
+                                                          shape=(shape[0],))
+            end = offsets[split] + len(X)
+            matrices[split][offsets[split]:end] = X
+            labels[split][offsets[split]:end] = df.loc[rows, TARGET_COL].to_numpy()
+            offsets[split] = end
+
+    for split in SPLITS:
+        if split in matrices:
+            matrices[split].flush()
+            labels[split].flush()
+        np.save(tmp_dir / f"positions_{split}.npy", positions[split])
+    with (tmp_dir / "columns.json").open("w") as f:
+        json.dump(columns, f)
+
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        # Another process materialized the same view first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def load_view(view: str, split: str = "train", index_suffix: str = "") -> tuple[np.ndarray, pd.Series, list[str]]:
+    """
+    Read-only memory-mapped X, the labels (indexed by row position) and the column names of one split,
+    materializing the view first if needed. Every process mapping the same file shares its pages.
+    """
+    path = materialize_view(view, index_suffix)
+    X = np.load(path / f"X_{split}.npy", mmap_mode="r")
+    y = pd.Series(np.load(path / f"y_{split}.npy"), index=np.load(path / f"positions_{split}.npy"), name=TARGET_COL)
+    with (path / "columns.json").open() as f:
+        columns = json.load(f)
+    return X, y, columns
+
+
+def load_training_data(view: str, fraction: float = 1.0, index_suffix: str = "", random_state: int = 42):
+    """
+    Drop-in for mh.load_model_dataset + th.prepare_features: the same stratified sample of each split,
+    taken from the feature store. fraction=1.0 returns the memory-mapped matrices without copying.
+    Raw views come back as DataFrames so estimators keep the feature names.
+    """
+    out = []
+    for split in SPLITS:
+        X, y, columns = load_view(view, split, index_suffix)
+        if fraction < 1.0:
+            rows = np.searchsorted(y.index, mh.stratified_sample_positions(y.index, _labels_by_position(y), fraction, random_state))
+            X, y = X[rows], y.iloc[rows]
+        if view == "raw":
+            X = pd.DataFrame(X, columns=columns, index=y.index, copy=False)
+        out += [X, y]
+    return tuple(out)
+
+
+def _labels_by_position(y: pd.Series) -> np.ndarray:
+    # stratified_sample_positions indexes the target by row position across the whole dataset
+    target = np.zeros(y.index.max() + 1, dtype=np.int8)
+    target[y.index] = y.to_numpy()
+    return target
+
+
+def clear_stale_views(view: str | None = None, index_suffix: str = "") -> list[Path]:
+    """
+    Delete materialized views whose key no longer matches the current data and transforms.
+    """
+    root = fu.get_path("feature_store")
+    views = [view] if view else list(VIEWS)
+    current = {view_dir(v, index_suffix).name for v in views}
+    removed = []
+    for path in root.glob("*_*") if root.exists() else []:
+        if path.name.rsplit("_", 1)[0] in {f"{v}{index_suffix}" for v in views} and path.name not in current:
+            shutil.rmtree(path)
+            removed.append(path)
+    return removed
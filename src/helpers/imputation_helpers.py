@@ -0,0 +1,127 @@
+# src/helpers/imputation_helpers.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import src.utils.sketch_utils as sk
+
+
+def _float(s: pd.Series) -> np.ndarray:
+    return s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class RatioImputer:
+    """
+    Fill missing col from base times the median col / base ratio of the row's `by` group
+    (base divided by the median base / col ratio with invert=True, as the loan-to-value ratio is defined).
+    fit() computes exact medians; partial_fit() feeds per-group KLL sketches, for data that does not fit in memory.
+    """
+
+    def __init__(self, col: str, base: str = "loan_amount", by: str = "loan_type", invert: bool = False, k: int = 1024):
+        self.col = col
+        self.base = base
+        self.by = by
+        self.invert = invert
+        self.k = k
+        self.columns = [col, base, by]
+
+    def _ratio(self, df: pd.DataFrame) -> np.ndarray:
+        col, base = _float(df[self.col]), _float(df[self.base])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return base / col if self.invert else col / base
+
+    def fit(self, df: pd.DataFrame) -> "RatioImputer":
+        ratio = pd.Series(self._ratio(df), index=df.index)
+        self.medians_ = ratio.groupby(df[self.by]).median().dropna().to_dict()
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "RatioImputer":
+        self.sketches_ = getattr(self, "sketches_", {})
+        ratio = self._ratio(df)
+        groups = df[self.by]
+        for group in groups.dropna().unique():
+            self.sketches_.setdefault(group, sk.KLLSketch(self.k)).update(ratio[(groups == group).to_numpy(dtype=bool, na_value=False)])
+        self.medians_ = {g: float(s.quantile(0.5)) for g, s in self.sketches_.items() if s.n}
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        base = _float(df[self.base])
+        mask = df[self.col].isna().to_numpy(dtype=bool) & ~np.isnan(base)
+        if mask.any():
+            median = df.loc[mask, self.by].map(self.medians_).to_numpy(dtype=np.float64, na_value=np.nan)
+            df.loc[mask, self.col] = base[mask] / median if self.invert else base[mask] * median
+        return df
+
+
+class MedianImputer:
+    """
+    Fill missing values of each column with its median: exact with fit(), from KLL sketches with partial_fit().
+    """
+
+    def __init__(self, cols: list[str], k: int = 1024):
+        self.cols = cols
+        self.k = k
+        self.columns = cols
+
+    def fit(self, df: pd.DataFrame) -> "MedianImputer":
+        self.medians_ = df[self.cols].median().to_dict()
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "MedianImputer":
+        self.sketches_ = getattr(self, "sketches_", {col: sk.KLLSketch(self.k) for col in self.cols})
+        for col in self.cols:
+            self.sketches_[col].update(_float(df[col]))
+        self.medians_ = {col: float(s.quantile(0.5)) for col, s in self.sketches_.items()}
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        df[self.cols] = df[self.cols].fillna(pd.Series(self.medians_))
+        return df
+
+
+class FeatureImputer:
+    """
+    Imputers applied in order, with plain df -> df functions (e.g. a derived column) allowed in between.
+    Fit on the training rows once, persist, then transform any batch: train, test or new data at inference.
+    """
+
+    def __init__(self, steps: list):
+        self.steps = steps
+
+    @property
+    def columns(self) -> list[str]:
+        return list(dict.fromkeys(c for step in self.steps for c in getattr(step, "columns", [])))
+
+    @staticmethod
+    def _apply(step, df: pd.DataFrame) -> pd.DataFrame:
+        return step.transform(df) if hasattr(step, "transform") else step(df)
+
+    def fit(self, df: pd.DataFrame) -> "FeatureImputer":
+        df = df.copy()
+        for step in self.steps:
+            if hasattr(step, "fit"):
+                step.fit(df)
+            df = self._apply(step, df)
+        self.fitted_ = True
+        return self
+
+    def fit_batches(self, make_batches) -> "FeatureImputer":
+        """
+        Streaming fit. make_batches() returns a fresh iterator of DataFrame batches (the training rows);
+        it is called once per imputer, since each one is fitted on the output of those before it.
+        """
+        for i, step in enumerate(self.steps):
+            if not hasattr(step, "partial_fit"):
+                continue
+            for batch in make_batches():
+                for previous in self.steps[:i]:
+                    batch = self._apply(previous, batch)
+                step.partial_fit(batch)
+        self.fitted_ = True
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        for step in self.steps:
+            df = self._apply(step, df)
+        return df
@@ -1,22 +1,15 @@
 import pandas as pd
-import joblib
-import os
-import sys
 from sklearn.linear_model import LogisticRegression
 from scipy.stats import loguniform, uniform
 from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+import src.utils.model_registry as mr
+import src.helpers.feature_engineering_helper as feh
 
 def scale_dataset(df: pd.DataFrame) -> pd.DataFrame:
-    project_root = get_project_root()
+    numeric_cols = feh.SCALED_NUMERIC_COLS
 
-    numeric_cols = ['loan_amount', 'income', 'combined_loan_to_value_ratio', 'loan_term', 'intro_rate_period',
-                    'prepayment_penalty_term',
-                    'property_value', 'loan_to_income_ratio', 'debt_to_income_ratio_60100_x_loan_to_income_ratio',
-                    'debt_to_income_ratio_5060_x_loan_to_income_ratio',
-                    'debt_to_income_ratio_4850_x_loan_to_income_ratio',
-                    'debt_to_income_ratio_4547_x_loan_to_income_ratio']
-
-    scaler = joblib.load(os.path.join(project_root, 'models', 'scaler.pkl'))
+    # Loaded once per process by the model registry rather than on every call
+    scaler = mr.get_model("scaler_model")
     X_train_scaled = scaler.transform(df[numeric_cols])
     X_train_scaled_df = pd.DataFrame(X_train_scaled, columns=numeric_cols, index=df.index)
 
@@ -25,20 +18,12 @@ def scale_dataset(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def transform_data_with_pca(df: pd.DataFrame) -> pd.DataFrame:
-    ipca = joblib.load(os.path.join(get_project_root, 'models', 'ipca.pkl'))
+    ipca = mr.get_model("ipca_model")
     df_pca = ipca.transform(df)[:, :22]
 
     return df_pca
 
 
-def get_project_root():
-    project_root = os.path.abspath(os.path.join(os.getcwd(), '..'))
-    if project_root not in sys.path:
-        sys.path.append(project_root)
-
-    return project_root
-
-
 
 def create_base_estimator():
     return LogisticRegression(
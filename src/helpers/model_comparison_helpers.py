@@ -1,5 +1,17 @@
+import hashlib
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+import src.helpers.encoding_helpers as enc
+import src.helpers.evaluation_helpers as ev
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.model_helpers as mh
+import src.helpers.scoring_helpers as sch
+import src.helpers.training_helpers as th
+import src.helpers.out_of_core_helpers as ooc
 
 def load_model_metrics_from_csv(model: str):
     model_path = fu.get_path(f"{model}_metrics_csv")
@@ -10,4 +22,120 @@ def load_model_metrics_from_csv(model: str):
     df_wide["Model"] = model
     df_wide = df_wide.set_index("Model")
 
-    return df_wide
\ No newline at end of file
+    return df_wide
+
+
+def trained_models() -> list[str]:
+    return [name for name in [*th.MODEL_SPECS, *ooc.OUT_OF_CORE_SPECS] if fu.get_path(f"{name}_model").exists()]
+
+
+def _prediction_path(name: str, index_suffix: str = ""):
+    # Keyed on the model's registry version and the dataset / split files, so retraining or re-splitting
+    # invalidates the cached predictions
+    h = hashlib.blake2b(digest_size=8)
+    meta = mr.load_metadata(f"{name}_model")
+    h.update(f"{meta.get('version')}:{meta.get('size')}".encode())
+    for key in ["hmda_2024_model" + index_suffix, "split_assignment" + index_suffix]:
+        path = fu.get_path(key)
+        if path.exists():
+            h.update(f"{key}:{path.stat().st_size}:{path.stat().st_mtime_ns}".encode())
+    return fu.get_path("prediction_cache") / f"{name}_{h.hexdigest()}.npz"
+
+
+def test_predictions(name: str, batch_size: int = 250_000) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row positions, labels and predicted probabilities for the model's whole test split.
+    Features come from the feature store (CatBoost: its model dataset); predictions are cached per model version.
+    """
+    spec = sch.model_spec(name)
+    index_suffix = spec.get("index_suffix", "")
+    path = _prediction_path(name, index_suffix)
+    if path.exists():
+        cached = np.load(path)
+        return cached["positions"], cached["y_true"], cached["y_prob"]
+
+    print(f"Predicting the {name} test split")
+    model = mr.get_model(f"{name}_model")
+    if spec["features"] == "catboost":
+        scorer = sch.load_scorer(name)
+        positions = np.sort(feh.load_split_positions(index_suffix)[1])
+        dataset = ds.dataset(fu.get_path("hmda_2024_model" + index_suffix), format="parquet")
+        y_true, y_prob = [], []
+        for start in range(0, len(positions), batch_size):
+            X, y = mh.take_rows(dataset, positions[start:start + batch_size], scorer["columns"], "denied_flag")
+            y_true.append(y.to_numpy())
+            y_prob.append(sch.score_frame(scorer, X))
+        y_true, y_prob = np.concatenate(y_true), np.concatenate(y_prob)
+    else:
+        import src.helpers.feature_store_helpers as fs
+        X, y, columns = fs.load_view(spec["features"], "test", index_suffix)
+        y_prob = []
+        for start in range(0, len(y), batch_size):
+            X_batch = X[start:start + batch_size]
+            if spec["features"] == "raw":
+                X_batch = pd.DataFrame(X_batch, columns=columns)
+            y_prob.append(model.predict_proba(X_batch)[:, 1])
+        positions, y_true, y_prob = y.index.to_numpy(), y.to_numpy(), np.concatenate(y_prob)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, positions=positions, y_true=y_true, y_prob=y_prob)
+    return positions, y_true, y_prob
+
+
+def category_columns(column: str) -> list[str]:
+    """
+    The one-hot columns column is encoded into, from its *_ohe_map in feature_engineering.yaml. Other columns
+    sharing the prefix (column_exempt, *_x_loan_to_income_ratio interactions) are not categories of it.
+    """
+    encoder = enc.OneHotEncoder(fu.load_config("feature_engineering")).fit(pd.DataFrame(columns=[column]))
+    return encoder.get_feature_names_out()
+
+
+def load_segments(column: str, positions: np.ndarray, index_suffix: str = "") -> np.ndarray:
+    """
+    Segment label of each row: the column itself when the model dataset keeps it, otherwise the category of
+    the row's one-hot column (loan_type -> "conventional" from loan_type_conventional). None when unset.
+    """
+    dataset = ds.dataset(fu.get_path("hmda_2024_model" + index_suffix), format="parquet")
+    names = dataset.schema.names
+    if column in names:
+        values = dataset.take(pa.array(positions), columns=[column]).column(column).to_pandas()
+        return values.astype("string").to_numpy(dtype=object, na_value=None)
+
+    onehot = [c for c in category_columns(column) if c in names]
+    if not onehot:
+        raise KeyError(f"{column} is not in the model dataset, raw or one-hot encoded by feature_engineering.yaml")
+    table = dataset.take(pa.array(positions), columns=onehot)
+    block = np.column_stack([np.nan_to_num(table.column(c).to_numpy(zero_copy_only=False).astype(np.float32)) for c in onehot])
+    labels = np.asarray([c[len(column) + 1:] for c in onehot], dtype=object)[block.argmax(axis=1)]
+    labels[~(block > 0).any(axis=1)] = None
+    return labels
+
+
+def compare_models(names: list[str] | None = None, segment_by: str | None = None, n_boot: int = 1000,
+                   alpha: float = 0.05) -> pd.DataFrame:
+    """
+    Every model's test metrics on its whole test split with bootstrap confidence intervals, optionally per
+    segment_by value (e.g. "loan_type"). One row per (Model, segment, metric); threshold is each model's
+    F1-optimal threshold, which its segments are also scored at. names default to every trained model.
+    """
+    names = names or trained_models()
+    results = []
+    for name in names:
+        positions, y_true, y_prob = test_predictions(name)
+        segments = load_segments(segment_by, positions, sch.model_spec(name).get("index_suffix", "")) if segment_by else None
+        result = ev.evaluate(y_true, y_prob, segments, n_boot=n_boot, alpha=alpha)
+        results.append(result.assign(threshold=result.attrs["threshold"]))
+
+    return pd.concat(results, keys=names, names=["Model"])
+
+
+def format_comparison(results: pd.DataFrame, decimals: int = 3) -> pd.DataFrame:
+    """
+    compare_models output as one row per model (and segment) and one "score [low, high]" column per metric.
+    """
+    fmt = f"{{:.{decimals}f}}"
+    cells = (results["Score"].map(fmt.format) + " [" + results["ci_low"].map(fmt.format) + ", "
+             + results["ci_high"].map(fmt.format) + "]")
+    table = cells.unstack("metric")[ev.METRICS]
+    return table.droplevel("segment") if set(table.index.get_level_values("segment")) == {"all"} else table
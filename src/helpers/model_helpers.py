@@ -1,47 +1,87 @@
 # src/helpers/model_helpers.py
 import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.utils.model_registry as mr
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.evaluation_helpers as ev
 import pandas as pd
-import joblib
+import pyarrow as pa
+import pyarrow.dataset as ds
 import matplotlib.pyplot as plt
-from sklearn.metrics import (
-    f1_score, accuracy_score, precision_score, recall_score,
-    roc_auc_score, average_precision_score,
-    RocCurveDisplay, PrecisionRecallDisplay
-)
+from sklearn.metrics import RocCurveDisplay, PrecisionRecallDisplay
 from sklearn.calibration import calibration_curve
 import numpy as np
 
 
-def load_model_dataset(fraction = 0.005, index_suffix=""):
-    modeling_dataset = fu.load_parquet("hmda_2024_model" + index_suffix)
-    train_output_path = fu.get_path("train_index" + index_suffix)
-    test_output_path = fu.get_path("test_index" + index_suffix)
-    train_idx = pd.read_csv(train_output_path)["index"]
-    test_idx = pd.read_csv(test_output_path)["index"]
-
-    # Subset the DataFrame
-    train_df = modeling_dataset.loc[train_idx]
-    test_df = modeling_dataset.loc[test_idx]
+def load_model_dataset(fraction = 0.005, index_suffix="", columns: list[str] | None = None, dtype=None, random_state=42):
+    """
+    Load the train/test split of the modeling dataset without reading the whole file into memory.
+    - Only denied_flag is read to draw a stratified sample of `fraction` from each split
+    - The sampled rows and the requested `columns` are then taken from Parquet; nothing else is materialized
+    - Returns numpy-backed frames; pass dtype (e.g. np.float32) to get X as one contiguous block
+    """
+    target_col = "denied_flag"
+    input_path = fu.get_path("hmda_2024_model" + index_suffix)
+    print(f"Loading dataset from {input_path}")
 
-    # This is temporary to test functionality on a very small sample.  Remove before running final training.
-    train_df = train_df.sample(frac=fraction, random_state=42)
-    test_df = test_df.sample(frac=fraction, random_state=42)
+    dataset = ds.dataset(input_path, format="parquet")
+    feature_cols = columns or [c for c in dataset.schema.names if c not in (target_col, su.ROW_KEY)]
+    target = np.asarray(dataset.to_table(columns=[target_col]).column(target_col))
 
-    # Separate X and y
-    target_col = "denied_flag"
+    train_idx, test_idx = feh.load_split_positions(index_suffix)
 
-    X_train = train_df.drop(columns=[target_col])
-    y_train = train_df[target_col]
+    # fraction < 1 is for iterating on a small sample.  Use fraction=1.0 for final training.
+    train_pos = stratified_sample_positions(train_idx, target, fraction, random_state)
+    test_pos = stratified_sample_positions(test_idx, target, fraction, random_state)
 
-    X_test = test_df.drop(columns=[target_col])
-    y_test = test_df[target_col]
+    X_train, y_train = take_rows(dataset, train_pos, feature_cols, target_col, dtype)
+    X_test, y_test = take_rows(dataset, test_pos, feature_cols, target_col, dtype)
 
     return X_train, y_train, X_test, y_test
 
 
+def stratified_sample_positions(positions, target, fraction: float, random_state=42) -> np.ndarray:
+    """
+    Sample `fraction` of positions within each target class. Returned positions are sorted so the Parquet take is sequential.
+    """
+    positions = np.asarray(positions)
+    if fraction >= 1.0:
+        return np.sort(positions)
+
+    rng = np.random.default_rng(random_state)
+    y = target[positions]
+    sampled = []
+    for cls in np.unique(y):
+        cls_pos = positions[y == cls]
+        n = int(round(len(cls_pos) * fraction))
+        sampled.append(rng.choice(cls_pos, size=n, replace=False))
+
+    return np.sort(np.concatenate(sampled))
+
+
+def take_rows(dataset, positions: np.ndarray, feature_cols: list[str], target_col: str, dtype=None):
+    table = dataset.take(pa.array(positions), columns=feature_cols + [target_col])
+    y = pd.Series(np.asarray(table.column(target_col)), index=positions, name=target_col)
+
+    if dtype is None:
+        X = table.select(feature_cols).to_pandas(ignore_metadata=True)
+        X.index = positions
+        return X, y
+
+    # Fill one column-major block so the DataFrame wraps it without copying
+    block = np.empty((table.num_rows, len(feature_cols)), dtype=dtype, order="F")
+    for j, col in enumerate(feature_cols):
+        block[:, j] = table.column(col).to_numpy()
+    X = pd.DataFrame(block, columns=feature_cols, index=positions, copy=False)
+
+    return X, y
+
+
 def persist_model(model_selector, path_key: str):
-    model_path = fu.get_path(path_key)
-    joblib.dump(model_selector.best_estimator_, model_path, compress=("gzip", 3))
+    mr.save_model(model_selector.best_estimator_, path_key, {
+        "best_params": model_selector.best_params_,
+        "best_cv_score": model_selector.best_score_,
+    })
 
 
 def save_metrics_to_csv(results, key: str):
@@ -62,33 +102,91 @@ def output_cv_summary(model_selector):
 def calculate_test_metrics(model_selector, X_test, y_test):
     best_lr = model_selector.best_estimator_
     y_prob = best_lr.predict_proba(X_test)[:, 1]
-    threshold = calculate_optimal_threshold(y_test, y_prob)
-    y_pred = (y_prob >= threshold).astype(int)
-
-    metrics = {
-        "F1": f1_score(y_test, y_pred),
-        "Accuracy": accuracy_score(y_test, y_pred),
-        "Precision": precision_score(y_test, y_pred),
-        "Recall": recall_score(y_test, y_pred),
-        "ROC AUC": roc_auc_score(y_test, y_prob),
-        "PR AUC": average_precision_score(y_test, y_prob)
-    }
-
-    results = pd.DataFrame(metrics, index=["Score"]).T
+    results, y_pred = score_predictions(y_test, y_prob)
 
     # Return metrics
     return results, y_pred, y_prob
 
 
+def score_predictions(y_test, y_prob):
+    """
+    Test metrics at the F1-optimal threshold from predicted probabilities, and the predictions at it.
+    Every metric comes from one sort of the scores (evaluation_helpers), not one sklearn call each.
+    """
+    thresholds, counts, _ = ev.score_cells(y_test, y_prob)
+    metrics = ev.curve_metrics(counts.sum(axis=0))
+    threshold = float(thresholds[metrics.pop("index")])
+    print(f"Best threshold = {threshold}, F1 = {metrics['F1']}")
+    y_pred = (np.asarray(y_prob) >= threshold).astype(int)
+
+    results = pd.DataFrame({m: float(v) for m, v in metrics.items()}, index=["Score"]).T
+    return results, y_pred
+
+
 def calculate_optimal_threshold(y_test, y_prob):
-    thresholds = np.linspace(0.0, 1.0, 200)
-    f1s = [f1_score(y_test, y_prob >= t) for t in thresholds]
-    best_threshold = thresholds[np.argmax(f1s)]
-    print(f"Best threshold = {best_threshold}, F1 = {max(f1s)}")
+    curve = calculate_threshold_curve(count_scores(y_test, y_prob))
+    best_threshold, best = find_optimal_threshold(curve)
+    print(f"Best threshold = {best_threshold}, F1 = {best['f1']}")
 
     return best_threshold
 
 
+def count_scores(y_true, y_prob, decimals: int | None = None) -> pd.DataFrame:
+    """
+    Collapse predictions into positive / negative counts per distinct score (ascending), from the same
+    counting pass the evaluation engine uses. Rounding with decimals caps the number of distinct scores,
+    which keeps streamed counts small.
+    """
+    thresholds, counts, _ = ev.score_cells(y_true, y_prob, decimals=decimals)
+    counts = counts[0, :0:-1]  # drop the predict-nobody cell and go back to ascending scores
+    return pd.DataFrame({"score": thresholds[:0:-1], "pos": counts[:, 1], "neg": counts[:, 0]})
+
+
+def accumulate_score_counts(chunks, decimals: int | None = 6) -> pd.DataFrame:
+    """
+    Build score counts from an iterable of (y_true, y_prob) chunks without holding every probability in memory.
+    Memory is bounded by the number of distinct (rounded) scores rather than the number of rows.
+    """
+    counts = pd.DataFrame({"score": pd.Series(dtype="float64"), "pos": pd.Series(dtype="int64"), "neg": pd.Series(dtype="int64")})
+    for y_true, y_prob in chunks:
+        merged = pd.concat([counts, count_scores(y_true, y_prob, decimals)], ignore_index=True)
+        counts = merged.groupby("score", as_index=False, sort=True)[["pos", "neg"]].sum()
+
+    return counts
+
+
+def calculate_threshold_curve(score_counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Exact confusion matrix, precision, recall, F1 and accuracy at every distinct threshold
+    (predict positive when score >= threshold), computed by evaluation_helpers like every other metric.
+    The first row (threshold +inf) predicts nobody positive, so the cost minimum can choose it.
+    """
+    counts = score_counts.sort_values("score", ascending=False)
+    thresholds, cells = ev.with_predict_none(counts["score"].to_numpy(), counts[["neg", "pos"]].to_numpy())
+    tp, fp, n_pos, n_neg = ev.confusion_curve(cells)
+    metrics = ev.threshold_metrics(tp, fp, n_pos, n_neg)
+
+    return pd.DataFrame({
+        "threshold": thresholds,
+        "tp": tp, "fp": fp, "fn": n_pos - tp, "tn": n_neg - fp,
+        "precision": metrics["Precision"],
+        "recall": metrics["Recall"],
+        "f1": metrics["F1"],
+        "accuracy": metrics["Accuracy"],
+    })
+
+
+def find_optimal_threshold(curve: pd.DataFrame, fp_cost: float | None = None, fn_cost: float | None = None):
+    """
+    Pick the threshold that maximizes F1, or minimizes fp_cost * FP + fn_cost * FN when costs are given
+    (evaluation_helpers.optimal_index). Returns the threshold and its row of the curve.
+    """
+    tp, fp = curve["tp"].to_numpy(), curve["fp"].to_numpy()
+    best = curve.iloc[int(ev.optimal_index(tp, fp, tp[-1], fp_cost, fn_cost))]
+
+    return float(best["threshold"]), best
+
+
 def draw_roc_curve(y_test, y_prob, output_path_key):
     RocCurveDisplay.from_predictions(y_test, y_prob)
     plt.title("ROC Curve")
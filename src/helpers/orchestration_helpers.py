@@ -0,0 +1,141 @@
+# src/helpers/orchestration_helpers.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import os
+import resource
+import threading
+import time
+
+import pandas as pd
+from joblib.externals.loky import get_reusable_executor
+from threadpoolctl import threadpool_limits
+
+import src.utils.file_utils as fu
+import src.helpers.training_helpers as th
+
+# Read by BLAS / OpenMP runtimes that start after the job does (e.g. in joblib's worker processes)
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+
+def allocate_threads(names: list[str], cpu_budget: int) -> dict[str, int]:
+    """
+    Split cpu_budget threads between models running at once: one each, then the rest in proportion
+    to each spec's cpu_weight (largest remainder).
+    """
+    weights = {name: th.MODEL_SPECS[name].get("cpu_weight", 1.0) for name in names}
+    spare = cpu_budget - len(names)
+    shares = {name: spare * w / sum(weights.values()) for name, w in weights.items()}
+    threads = {name: 1 + int(s) for name, s in shares.items()}
+    leftover = cpu_budget - sum(threads.values())
+    for name in sorted(shares, key=lambda n: shares[n] - int(shares[n]), reverse=True)[:leftover]:
+        threads[name] += 1
+    return threads
+
+
+def _tree_rss_mb(pid: int) -> float:
+    # Resident memory of a process and all its descendants (joblib workers included), from /proc
+    total, stack = 0.0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack.extend(int(c) for c in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+
+class _PeakMemory:
+    """
+    Samples the resident memory of this process tree in the background and keeps the peak.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _tree_rss_mb(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._start_maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # ru_maxrss catches a peak between samples in this process (kilobytes on Linux). It survives fork + exec,
+        # so a spawned process starts with its parent's; only a rise during the block is this block's peak.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if maxrss > self._start_maxrss:
+            self.peak_mb = max(self.peak_mb, maxrss / 1024)
+
+
+def _train_job(name: str, n_threads: int, fraction: float | None) -> dict:
+    # The search runs its candidates on n_threads worker processes (training_helpers.limit_search_threads), and
+    # each of those workers runs single-threaded (they inherit these variables); the job itself keeps all
+    # n_threads for the refit
+    search_jobs = n_threads
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = "1"
+
+    started = time.perf_counter()
+    try:
+        with _PeakMemory() as memory, threadpool_limits(limits=n_threads):
+            results = th.train_model(name, fraction=fraction, n_jobs=search_jobs)
+    finally:
+        # Stop joblib's idle workers now; otherwise this process waits on them when it exits after its one task
+        get_reusable_executor().shutdown(wait=True)
+
+    return {"results": results, "wall_seconds": time.perf_counter() - started, "peak_memory_mb": memory.peak_mb}
+
+
+def train_models(names: list[str] | None = None, cpu_budget: int | None = None, fraction: float | None = None) -> pd.DataFrame:
+    """
+    Train several model specs at once, each in its own process with its share of cpu_budget threads
+    (default: every CPU). With more models than threads, they run cpu_budget at a time on one thread each.
+    Returns one row per model: threads, status, wall seconds, peak memory (also saved to training_runs_csv).
+    """
+    names = names or list(th.MODEL_SPECS)
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    parallel = min(len(names), cpu_budget)
+    threads = allocate_threads(names, cpu_budget) if parallel == len(names) else dict.fromkeys(names, 1)
+
+    runs = []
+    # spawn so each job starts its own BLAS / OpenMP pools under its thread limit; a fresh process per job
+    # keeps peak memory per model
+    with ProcessPoolExecutor(max_workers=parallel, mp_context=multiprocessing.get_context("spawn"),
+                             max_tasks_per_child=1) as pool:
+        running = {}
+        for name in names:
+            print(f"Queued {name} with {threads[name]} thread(s)")
+            running[pool.submit(_train_job, name, threads[name], fraction)] = name
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                run = {"model": name, "threads": threads[name]}
+                try:
+                    job = future.result()
+                except Exception as e:
+                    print(f"{name}: failed ({type(e).__name__}: {e})")
+                    runs.append({**run, "status": "failed"})
+                    continue
+
+                print(f"Finished {name} in {job['wall_seconds']:.1f}s, peak {job['peak_memory_mb']:,.0f} MB")
+                runs.append({**run, "status": "ok", "wall_seconds": job["wall_seconds"], "peak_memory_mb": job["peak_memory_mb"]})
+
+    summary = pd.DataFrame(runs).set_index("model")
+    summary.to_csv(fu.get_path("training_runs_csv"))
+    return summary
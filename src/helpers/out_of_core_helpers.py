@@ -0,0 +1,164 @@
+# src/helpers/out_of_core_helpers.py
+from __future__ import annotations
+import copy
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pyarrow.parquet as pq
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neural_network import MLPClassifier
+
+import src.utils.arrow_utils as au
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+import src.utils.schema_utils as su
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.model_helpers as mh
+import src.helpers.training_helpers as th
+
+TARGET_COL = "denied_flag"
+CLASSES = np.array([0, 1])
+# Share of the training rows held out of partial_fit to pick the best epoch
+VALIDATION_FRACTION = feh.VALIDATION_FRACTION
+
+
+def create_sgd_log_reg():
+    # A fixed small step, cut by 5 when an epoch doesn't improve validation loss (train_out_of_core). The "optimal"
+    # schedule starts at 1 / (alpha * t0), which with a small alpha overshoots and leaves the weights saturated.
+    return SGDClassifier(loss="log_loss", penalty="elasticnet", alpha=1e-4, l1_ratio=0.15, learning_rate="adaptive",
+                         eta0=0.01, random_state=42)
+
+
+def create_streaming_mlp():
+    return MLPClassifier(hidden_layer_sizes=(64, 32), alpha=1e-4, batch_size=256, learning_rate_init=1e-3,
+                         random_state=42)
+
+
+# Learners trained on every training row with partial_fit, one batch at a time. features selects the transform
+# (training_helpers.transform_features); epochs is the number of passes over the training rows.
+OUT_OF_CORE_SPECS = {
+    "sgd_log_reg": {"estimator": create_sgd_log_reg, "features": "pca_svd", "epochs": 5, "balanced_weights": True},
+    "mlp_streaming": {"estimator": create_streaming_mlp, "features": "pca", "epochs": 5, "balanced_weights": True},
+    # Naive Bayes sums sufficient statistics, so a second pass would count every row twice
+    "gaussian_nb": {"estimator": GaussianNB, "features": "pca_svd", "epochs": 1},
+}
+
+
+def iter_batches(kind: str, split: str = "train", batch_size: int = 50_000, shuffle: bool = True,
+                 mix_groups: int = 2, seed: int = 42, index_suffix: str = "", transforms: dict | None = None):
+    """
+    Stream (X, y) batches of one split of the model dataset, transformed for a feature kind, with memory
+    bounded by a few Parquet row groups. A background thread reads and transforms the next row groups while
+    the caller fits on the current ones. With shuffle, row groups come in a random order and mix_groups of
+    them are pooled and permuted together, so batches mix rows from different parts of the file.
+    """
+    pf = pq.ParquetFile(fu.get_path("hmda_2024_model" + index_suffix))
+    feature_cols = [c for c in pf.schema_arrow.names if c not in (TARGET_COL, su.ROW_KEY)]
+    transforms = th.load_feature_transforms(kind) if transforms is None else transforms
+
+    groups = feh.split_row_groups(pf, split, index_suffix)
+    if shuffle:
+        groups = [groups[i] for i in np.random.default_rng(seed).permutation(len(groups))]
+    else:
+        mix_groups = 1
+    chunks = [(k, groups[k:k + mix_groups]) for k in range(0, len(groups), mix_groups)]
+
+    def load(chunk):
+        k, members = chunk
+        X, y = [], []
+        for i, rows in members:
+            df = pf.read_row_group(i, columns=feature_cols + [TARGET_COL]).take(rows).to_pandas()
+            X.append(np.asarray(th.transform_features(kind, df[feature_cols], transforms), dtype=np.float32))
+            y.append(df[TARGET_COL].to_numpy(dtype=np.int8))
+        X, y = np.vstack(X), np.concatenate(y)
+        if shuffle:
+            order = np.random.default_rng([seed, k]).permutation(len(y))
+            X, y = X[order], y[order]
+        return X, y
+
+    # One reader thread; at most one chunk waits while the caller works on another
+    for X, y in au.map_batches(load, chunks, n_threads=1, max_in_flight=2):
+        for start in range(0, len(y), batch_size):
+            yield X[start:start + batch_size], y[start:start + batch_size]
+
+
+def balanced_class_weights(index_suffix: str = "") -> np.ndarray:
+    """
+    n / (2 * class count) over the training rows, indexed by class, from the target column alone.
+    """
+    target = pq.read_table(fu.get_path("hmda_2024_model" + index_suffix), columns=[TARGET_COL])
+    y = target.column(TARGET_COL).to_numpy()[np.asarray(feh.load_split_assignment(index_suffix)) >= 0]
+    counts = np.bincount(y.astype(np.int64), minlength=len(CLASSES))
+    return len(y) / (len(CLASSES) * counts)
+
+
+def predict_split(estimator, kind: str, split: str = "test", batch_size: int = 50_000, index_suffix: str = "",
+                  transforms: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Labels and positive-class probabilities for every row of a split, scored batch by batch in file order.
+    """
+    y_true, y_prob = [], []
+    for X, y in iter_batches(kind, split, batch_size, shuffle=False, index_suffix=index_suffix, transforms=transforms):
+        y_true.append(y)
+        y_prob.append(estimator.predict_proba(X)[:, 1])
+    return np.concatenate(y_true), np.concatenate(y_prob)
+
+
+def validation_loss(estimator, kind: str, batch_size: int = 50_000, transforms: dict | None = None,
+                    weights: np.ndarray | None = None) -> float:
+    """
+    Mean log loss over the validation rows (class-weighted when weights are given), streamed batch by batch.
+    """
+    total, weight = 0.0, 0.0
+    for X, y in iter_batches(kind, "validation", batch_size, shuffle=False, transforms=transforms):
+        w = np.ones(len(y)) if weights is None else weights[y]
+        total += log_loss(y, estimator.predict_proba(X), sample_weight=w, labels=CLASSES, normalize=False)
+        weight += w.sum()
+    return total / weight
+
+
+def train_out_of_core(name: str, epochs: int | None = None, batch_size: int = 50_000, seed: int = 42):
+    """
+    Fit an OUT_OF_CORE_SPECS learner on the training rows with partial_fit, reshuffling every epoch, and keep
+    the epoch with the lowest validation loss (VALIDATION_FRACTION of the training rows, never fitted on).
+    Then evaluate on the whole test split and save metrics, curves and the model like train_model does.
+    """
+    spec = OUT_OF_CORE_SPECS[name]
+    epochs = spec["epochs"] if epochs is None else epochs
+    kind = spec["features"]
+    transforms = th.load_feature_transforms(kind)
+    weights = balanced_class_weights() if spec.get("balanced_weights") else None
+
+    estimator = spec["estimator"]()
+    best, rows_seen = None, 0
+    for epoch in range(epochs):
+        started, rows = time.perf_counter(), 0
+        for X, y in iter_batches(kind, "fit", batch_size, seed=seed + epoch, transforms=transforms):
+            estimator.partial_fit(X, y, classes=CLASSES, sample_weight=None if weights is None else weights[y])
+            rows += len(y)
+        rows_seen += rows
+        loss = validation_loss(estimator, kind, batch_size, transforms, weights)
+        print(f"{name}: epoch {epoch + 1}/{epochs}, {rows:,} rows in {time.perf_counter() - started:.1f}s, "
+              f"validation loss {loss:.4f}")
+        if best is None or loss < best["loss"]:
+            best = {"loss": loss, "epoch": epoch + 1, "estimator": copy.deepcopy(estimator)}
+        elif getattr(estimator, "learning_rate", None) == "adaptive":
+            # sklearn's adaptive schedule only runs inside fit, so partial_fit gets it here
+            estimator.eta0 /= 5
+    estimator = best["estimator"]
+    print(f"{name}: keeping epoch {best['epoch']} (validation loss {best['loss']:.4f})")
+
+    y_test, y_prob = predict_split(estimator, kind, "test", batch_size, transforms=transforms)
+    results, _ = mh.score_predictions(y_test, y_prob)
+    mh.save_metrics_to_csv(results, f"{name}_metrics_csv")
+    mh.draw_roc_curve(y_test, y_prob, f"{name}_roc")
+    mh.draw_pr_curve(y_test, y_prob, f"{name}_pr")
+    plt.close("all")
+    mr.save_model(estimator, f"{name}_model", {"features": kind, "epochs": epochs, "best_epoch": best["epoch"],
+                                               "validation_loss": best["loss"], "train_rows_per_epoch": rows,
+                                               "rows_seen": rows_seen})
+
+    return results
@@ -0,0 +1,236 @@
+# src/helpers/pipeline_helpers.py
+import pandas as pd
+import pyarrow.dataset as ds
+from sklearn.preprocessing import StandardScaler
+from sklearn.impute import SimpleImputer
+from sklearn.decomposition import IncrementalPCA
+import src.utils.cache_utils as cu
+import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.utils.memory_utils as mu
+import src.utils.model_registry as mr
+import src.helpers.clean_helpers as chelp
+import src.helpers.clustering_helpers as clh
+import src.helpers.encoding_helpers as enc
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.model_helpers as mh
+import src.helpers.out_of_core_helpers as ooc
+import src.helpers.sparse_svd_helpers as ssvd
+import src.helpers.target_cube_helpers as tc
+import src.helpers.training_helpers as th
+
+
+def clean():
+    chelp.clean_to_parquet(fu.load_config("clean"), fu.load_config("schema"))
+
+
+def schema_summary():
+    chelp.generate_schema_summary(fu.load_parquet("hmda_2024_typed"), fu.load_config("schema"))
+
+
+def target_cube():
+    category_cols = su.get_columns_by_attribute(fu.load_config("schema"), "type", "categorical")
+    source = fu.get_path("hmda_2024_typed")
+    columns = set(ds.dataset(source, format="parquet").schema.names)
+    tc.save_target_cube(tc.build_target_cube(source, [c for c in category_cols if c in columns], "denied_flag"))
+
+
+def _build_within_budget(build, imputer, output_key: str):
+    """
+    Load hmda_2024_typed in the narrowest lossless types and build output_key from it in memory, or chunk by chunk
+    (imputer fitted by streaming first) when the planned frame would not fit the memory budget.
+    """
+    plan = mu.plan_column_types("hmda_2024_typed", fu.load_config("schema"))
+    mu.print_plan(plan)
+    if mu.fits_budget(plan):
+        fu.save_parquet(build(mu.load_parquet("hmda_2024_typed", plan)), output_key)
+        return
+
+    print("Planned dataset exceeds the memory budget; building in chunks")
+    feh.fit_feature_imputer(imputer)
+    fu.save_parquet_chunks((build(chunk) for chunk in mu.iter_frames("hmda_2024_typed", plan)), output_key)
+
+
+def model_dataset():
+    cfg_feature_engineering = fu.load_config("feature_engineering")
+    encoder = enc.OneHotEncoder(cfg_feature_engineering)
+    imputer = feh.feature_imputer(feh.CATEGORICAL_NUMERIC_COLS + feh.MEDIAN_FILL_COLS)
+    _build_within_budget(lambda df: feh.build_model_dataset(df, cfg_feature_engineering, encoder, imputer),
+                         imputer, "hmda_2024_model")
+    mr.save_model(encoder, "ohe_encoder")
+    mr.save_model(imputer, "feature_imputer")
+
+
+def catboost_model_dataset():
+    imputer = feh.feature_imputer(feh.MEDIAN_FILL_COLS)
+    _build_within_budget(lambda df: feh.build_catboost_model_dataset(df, imputer), imputer, "hmda_2024_model_catboost")
+    mr.save_model(imputer, "feature_imputer_catboost")
+
+
+def splits():
+    feh.create_train_test_splits_from_parquet()
+
+
+def catboost_splits():
+    feh.create_train_test_splits_from_parquet(index_suffix="_catboost")
+
+
+def _load_scaled_train():
+    X_train, _, _, _ = mh.load_model_dataset(fraction=1.0, columns=feh.SCALED_NUMERIC_COLS)
+    return feh.log_transform_skewed_features(X_train)
+
+
+def fit_scaler():
+    scaler = StandardScaler().fit(_load_scaled_train())
+    mr.save_model(scaler, "scaler_model")
+
+
+def fit_ipca(n_components=5, batch_size=50000):
+    scaler = mr.load_model("scaler_model")
+    X_train = SimpleImputer(strategy="median").fit_transform(scaler.transform(_load_scaled_train()))
+
+    ipca = IncrementalPCA(n_components=n_components, batch_size=batch_size).fit(X_train)
+    mr.save_model(ipca, "ipca_model", {"n_components": ipca.n_components_})
+
+    pd.DataFrame({
+        "PC": range(1, ipca.n_components_ + 1),
+        "ExplainedVarianceRation": ipca.explained_variance_ratio_,
+        "CumulativeVariance": ipca.explained_variance_ratio_.cumsum(),
+    }).to_csv(fu.get_path("pca_variance_csv"), index=False)
+
+
+def fit_svd(n_components=20):
+    # Every training row, streamed as sparse row-group chunks, instead of a dense 0.5% sample
+    svd = ssvd.fit_svd(n_components)
+    mr.save_model(svd, "svd_model", {"n_components": n_components})
+    print(f"SVD explained variance (sum): {svd.explained_variance_ratio_.sum()}")
+
+
+def train_log_reg():
+    th.train_model("log_reg")
+
+
+def train_random_forest():
+    th.train_model("random_forest")
+
+
+def train_hgbm():
+    th.train_model("hgbm")
+
+
+def train_mlp():
+    th.train_model("mlp")
+
+
+def train_catboost():
+    th.train_model("catboost")
+
+
+def train_sgd_log_reg():
+    ooc.train_out_of_core("sgd_log_reg")
+
+
+def train_mlp_streaming():
+    ooc.train_out_of_core("mlp_streaming")
+
+
+def train_gaussian_nb():
+    ooc.train_out_of_core("gaussian_nb")
+
+
+def cluster_sweep():
+    clh.k_sweep()
+
+
+def fit_clusters():
+    clh.fit_kmeans()
+    clh.fit_density()
+
+
+def assign_clusters():
+    clh.assign_clusters()
+    for model in clh.LABEL_COLS:
+        clh.cluster_profiles(model)
+
+
+def _models(*keys: str) -> list[str]:
+    # Registry models plus their .meta.json sidecars, so a cache hit restores the version record with the model
+    return [k for key in keys for k in (key, key + cu.META_SUFFIX)]
+
+
+def _train_stage(func, name: str, inputs: list[str]) -> dict:
+    return {"func": func, "inputs": inputs,
+            "outputs": [*_models(f"{name}_model"), f"{name}_metrics_csv", f"{name}_roc", f"{name}_pr", f"{name}_search_log_csv"],
+            "code": ["src.helpers.training_helpers", "src.helpers.model_helpers", "src.helpers.search_helpers",
+                     "src.helpers.feature_store_helpers", "src.helpers.sparse_svd_helpers",
+                     "src.helpers.logistic_regression_helpers", "src.helpers.evaluation_helpers",
+                     "src.helpers.feature_engineering_helper"]}
+
+
+def _out_of_core_stage(func, name: str, inputs: list[str]) -> dict:
+    return {"func": func, "inputs": inputs, "outputs": [*_models(f"{name}_model"), f"{name}_metrics_csv", f"{name}_roc", f"{name}_pr"],
+            "code": ["src.helpers.out_of_core_helpers", "src.helpers.training_helpers", "src.helpers.model_helpers",
+                     "src.helpers.feature_store_helpers", "src.helpers.sparse_svd_helpers", "src.utils.arrow_utils",
+                     "src.helpers.evaluation_helpers", "src.helpers.feature_engineering_helper"]}
+
+
+# Clustering reads the pca and pca_svd feature-store views, which feature_store_helpers and training_helpers build
+_CLUSTER_INPUTS = ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model", "svd_model"]
+_CLUSTER_CODE = ["src.helpers.clustering_helpers", "src.helpers.feature_store_helpers", "src.helpers.training_helpers",
+                 "src.helpers.sparse_svd_helpers", "src.helpers.feature_engineering_helper", "src.helpers.model_helpers",
+                 "src.utils.arrow_utils"]
+
+# Notebooks 01-04 as pipeline stages. inputs/outputs are paths.yaml keys; a stage depends on whichever stage
+# produces one of its inputs. config names the YAML files and code the modules whose changes invalidate the stage:
+# every helper the stage calls into (this module is always included).
+STAGES = {
+    "clean": {"func": clean, "inputs": ["hmda_raw"], "outputs": ["hmda_2024_typed"],
+              "config": ["clean", "schema"], "code": ["src.helpers.clean_helpers", "src.utils.arrow_utils"]},
+    "schema_summary": {"func": schema_summary, "inputs": ["hmda_2024_typed"], "outputs": ["schema_summary"],
+                       "config": ["schema"], "code": ["src.helpers.clean_helpers"]},
+    "target_cube": {"func": target_cube, "inputs": ["hmda_2024_typed"], "outputs": _models("target_cube"),
+                    "config": ["schema"], "code": ["src.helpers.target_cube_helpers", "src.utils.arrow_utils"]},
+    "model_dataset": {"func": model_dataset, "inputs": ["hmda_2024_typed"], "outputs": ["hmda_2024_model", *_models("ohe_encoder", "feature_imputer")],
+                      "config": ["feature_engineering", "schema", "memory"],
+                      "code": ["src.helpers.feature_engineering_helper", "src.helpers.encoding_helpers",
+                               "src.helpers.imputation_helpers", "src.utils.memory_utils", "src.utils.sketch_utils",
+                               "src.utils.arrow_utils"]},
+    "catboost_model_dataset": {"func": catboost_model_dataset, "inputs": ["hmda_2024_typed"],
+                               "outputs": ["hmda_2024_model_catboost", *_models("feature_imputer_catboost")],
+                               "config": ["schema", "memory"],
+                               "code": ["src.helpers.feature_engineering_helper", "src.helpers.imputation_helpers",
+                                        "src.utils.memory_utils", "src.utils.sketch_utils", "src.utils.arrow_utils"]},
+    "splits": {"func": splits, "inputs": ["hmda_2024_model"],
+               "outputs": ["split_assignment", "train_index", "test_index"],
+               "code": ["src.helpers.feature_engineering_helper"]},
+    "catboost_splits": {"func": catboost_splits, "inputs": ["hmda_2024_model_catboost"],
+                        "outputs": ["split_assignment_catboost", "train_index_catboost", "test_index_catboost"],
+                        "code": ["src.helpers.feature_engineering_helper"]},
+    "fit_scaler": {"func": fit_scaler, "inputs": ["hmda_2024_model", "split_assignment"], "outputs": _models("scaler_model"),
+                   "code": ["src.helpers.feature_engineering_helper", "src.helpers.model_helpers"]},
+    "fit_ipca": {"func": fit_ipca, "inputs": ["hmda_2024_model", "split_assignment", "scaler_model"],
+                 "outputs": [*_models("ipca_model"), "pca_variance_csv"],
+                 "code": ["src.helpers.feature_engineering_helper", "src.helpers.model_helpers"]},
+    "fit_svd": {"func": fit_svd, "inputs": ["hmda_2024_model", "split_assignment"], "outputs": _models("svd_model"),
+                "code": ["src.helpers.sparse_svd_helpers", "src.helpers.feature_engineering_helper", "src.utils.arrow_utils"]},
+    "train_log_reg": _train_stage(train_log_reg, "log_reg",
+                                  ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model", "svd_model"]),
+    "train_random_forest": _train_stage(train_random_forest, "random_forest", ["hmda_2024_model", "split_assignment"]),
+    "train_hgbm": _train_stage(train_hgbm, "hgbm", ["hmda_2024_model", "split_assignment"]),
+    "train_mlp": _train_stage(train_mlp, "mlp", ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model"]),
+    "train_catboost": _train_stage(train_catboost, "catboost", ["hmda_2024_model_catboost", "split_assignment_catboost"]),
+    "train_sgd_log_reg": _out_of_core_stage(train_sgd_log_reg, "sgd_log_reg",
+                                            ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model", "svd_model"]),
+    "train_mlp_streaming": _out_of_core_stage(train_mlp_streaming, "mlp_streaming",
+                                              ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model"]),
+    "train_gaussian_nb": _out_of_core_stage(train_gaussian_nb, "gaussian_nb",
+                                            ["hmda_2024_model", "split_assignment", "scaler_model", "ipca_model", "svd_model"]),
+    "cluster_sweep": {"func": cluster_sweep, "inputs": _CLUSTER_INPUTS, "outputs": ["cluster_sweep_csv", "cluster_sweep_plot"],
+                      "config": ["clustering"], "code": _CLUSTER_CODE},
+    "fit_clusters": {"func": fit_clusters, "inputs": _CLUSTER_INPUTS, "outputs": _models("kmeans_cluster_model", "density_cluster_model"),
+                     "config": ["clustering"], "code": _CLUSTER_CODE},
+    "assign_clusters": {"func": assign_clusters, "inputs": _CLUSTER_INPUTS + ["kmeans_cluster_model", "density_cluster_model"],
+                        "outputs": ["cluster_labels"] + [f"{col}_{kind}_summary_csv" for col in clh.LABEL_COLS.values()
+                                                         for kind in ("numeric", "categorical")],
+                        "config": ["clustering"], "code": _CLUSTER_CODE},
+}
@@ -0,0 +1,177 @@
+# src/helpers/scoring_helpers.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.utils.arrow_utils as au
+import src.utils.serving_utils as sv
+import src.utils.model_registry as mr
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.out_of_core_helpers as ooc
+import src.helpers.training_helpers as th
+
+SCORE_COL = "denied_probability"
+PREDICTION_COL = "denied_pred"
+
+# Scorer held by each worker process, loaded once by _init_worker
+_WORKER_SCORER = None
+
+
+def model_feature_columns(index_suffix: str = "") -> list[str]:
+    """
+    Feature columns in the order load_model_dataset hands them to training.
+    """
+    names = ds.dataset(fu.get_path("hmda_2024_model" + index_suffix), format="parquet").schema.names
+    return [c for c in names if c not in ("denied_flag", su.ROW_KEY)]
+
+
+def model_spec(name: str) -> dict:
+    """
+    Training spec of a model: a training_helpers.MODEL_SPECS or an out_of_core_helpers.OUT_OF_CORE_SPECS entry.
+    """
+    return th.MODEL_SPECS.get(name) or ooc.OUT_OF_CORE_SPECS[name]
+
+
+def _typed_schema() -> pa.Schema | None:
+    path = fu.get_path("hmda_2024_typed")
+    return pq.read_schema(path) if path.exists() else None
+
+
+def load_scorer(name: str, threshold: float | None = None) -> dict:
+    """
+    Load a trained model, the imputer / one-hot encoder that built its model dataset and its fitted transform
+    chain (log -> scaler -> IPCA -> SVD) once. name is a MODEL_SPECS or OUT_OF_CORE_SPECS key, e.g. "hgbm".
+    """
+    spec = model_spec(name)
+    index_suffix = spec.get("index_suffix", "")
+    catboost = spec["features"] == "catboost"
+    model = mr.get_model(f"{name}_model")
+    return {
+        "name": name,
+        "kind": spec["features"],
+        "model": model,
+        "transforms": th.load_feature_transforms(spec["features"]),
+        # Models fitted on named columns keep their own order, which survives a rebuild of the model dataset
+        "columns": list(model.feature_names_in_ if hasattr(model, "feature_names_in_") else model_feature_columns(index_suffix)),
+        "imputer": mr.get_model("feature_imputer" + index_suffix),
+        "encoder": None if catboost else mr.get_model("ohe_encoder"),
+        "feature_config": None if catboost else fu.load_config("feature_engineering"),
+        "input_schema": _typed_schema(),
+        "threshold": threshold,
+    }
+
+
+def model_features(scorer: dict, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The model-dataset columns for df. Rows already in hmda_2024_model format are used as they are; otherwise df is
+    taken as hmda_2024_typed rows and built with the fitted imputer and encoder, exactly as the model dataset was.
+    """
+    if all(c in df.columns for c in scorer["columns"]):
+        return df[scorer["columns"]].copy()
+
+    # The typed file's Arrow types, so request rows (e.g. JSON) encode and impute like the training rows
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = scorer["input_schema"]
+    if schema is not None:
+        table = pa.table({c: table.column(c).cast(schema.field(c).type) if c in schema.names else table.column(c)
+                          for c in table.column_names})
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    if scorer["encoder"] is None:
+        df = feh.build_catboost_model_dataset(df, scorer["imputer"])
+    else:
+        df = feh.build_model_dataset(df, scorer["feature_config"], scorer["encoder"], scorer["imputer"])
+
+    missing = [c for c in scorer["columns"] if c not in df.columns]
+    if missing:
+        raise KeyError(f"Input is missing {len(missing)} model columns, e.g. {missing[:5]}")
+    return df[scorer["columns"]]
+
+
+def score_frame(scorer: dict, df) -> np.ndarray:
+    """
+    Denial probability for each row of a DataFrame in hmda_2024_model or hmda_2024_typed format.
+    """
+    X = th.transform_features(scorer["kind"], model_features(scorer, df), scorer["transforms"])
+    return scorer["model"].predict_proba(X)[:, 1]
+
+
+def score_batch(scorer: dict, batch: pa.RecordBatch, keep_columns: list[str]) -> pa.RecordBatch:
+    prob = score_frame(scorer, batch.to_pandas(ignore_metadata=True))
+    arrays = [batch.column(c) for c in keep_columns] + [pa.array(prob, type=pa.float64())]
+    names = keep_columns + [SCORE_COL]
+    if scorer["threshold"] is not None:
+        arrays.append(pa.array((prob >= scorer["threshold"]).astype(np.int8)))
+        names.append(PREDICTION_COL)
+
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _init_worker(name: str, threshold: float | None):
+    global _WORKER_SCORER
+    _WORKER_SCORER = load_scorer(name, threshold)
+
+
+def _score_in_worker(args):
+    batch, keep_columns = args
+    started = time.perf_counter()
+    out = score_batch(_WORKER_SCORER, batch, keep_columns)
+    return out, time.perf_counter() - started
+
+
+def score_parquet(name: str, input_path, output_path, batch_size: int = 100_000, n_workers: int | None = None,
+                  keep_columns: list[str] | None = None, threshold: float | None = None) -> dict:
+    """
+    Stream a Parquet file through a trained model and write the scores to Parquet.
+    - Input is in hmda_2024_model or hmda_2024_typed format (encoded and imputed like the training rows)
+    - Batches fan out to a process pool; each worker loads the model and transforms once
+    - Output keeps input order: keep_columns (default: row_key when present), denied_probability,
+      and denied_pred when a threshold is given
+    - Returns throughput (rows/sec) and per-batch latency percentiles for sizing hardware
+    """
+    dataset = ds.dataset(input_path, format="parquet")
+    if keep_columns is None:
+        keep_columns = [su.ROW_KEY] if su.ROW_KEY in dataset.schema.names else []
+    # Model-dataset input reads only the model columns; typed input needs every column to build them
+    model_columns = model_feature_columns(model_spec(name).get("index_suffix", ""))
+    names = dataset.schema.names
+    columns = list(dict.fromkeys(keep_columns + (model_columns if set(model_columns) <= set(names) else names)))
+    n_workers = n_workers or os.cpu_count() or 1
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Scoring {input_path} with {name} on {n_workers} workers")
+
+    batches = ((batch, keep_columns) for batch in dataset.to_batches(columns=columns, batch_size=batch_size))
+    latencies, n_rows, writer = [], 0, None
+    started = time.perf_counter()
+    # spawn keeps pyarrow / BLAS thread pools out of forked children
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(name, threshold)) as pool:
+        for out, seconds in au.map_batches(_score_in_worker, batches, max_in_flight=2 * n_workers, executor=pool):
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, out.schema, compression="snappy")
+            writer.write_batch(out)
+            latencies.append(seconds)
+            n_rows += out.num_rows
+    elapsed = time.perf_counter() - started
+
+    if writer is not None:
+        writer.close()
+
+    stats = {"rows": n_rows, "seconds": round(elapsed, 3), "rows_per_sec": round(n_rows / elapsed, 1) if elapsed else None,
+             **sv.latency_summary(latencies, prefix="batch_")}
+    print(f"Saved to {output_path}")
+    print(f"Scored {n_rows} rows in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec), "
+          f"batch p99 {stats['batch_p99_ms']} ms")
+
+    return stats
@@ -0,0 +1,139 @@
+# src/helpers/search_helpers.py
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, PredefinedSplit, check_cv
+import src.utils.file_utils as fu
+import src.helpers.feature_engineering_helper as feh
+
+SEARCH_LOG_COLUMNS = ["iter", "n_resources", "params", "mean_fit_time", "mean_score_time", "mean_test_score",
+                      "std_test_score", "rank_test_score"]
+
+
+def shared_matrix(X, name: str, dtype=np.float32):
+    """
+    Write the feature matrix once to a .npy under search_cache and reopen it memory-mapped (read-only).
+    joblib passes memmaps to worker processes by filename, so every candidate and fold reads the same
+    pages instead of unpickling its own copy of X. DataFrames come back as DataFrames over the memmap.
+    """
+    if _memmap_backed(X):
+        return X  # already a shared file, e.g. a feature store view
+
+    path = fu.get_path("search_cache") / f"{name}.npy"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Filled column by column so the float copy of X is never held in memory alongside X
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=X.shape, fortran_order=True)
+    for j in range(X.shape[1]):
+        column = X.iloc[:, j] if isinstance(X, pd.DataFrame) else X[:, j]
+        out[:, j] = column.to_numpy(dtype=dtype, na_value=np.nan) if isinstance(column, pd.Series) else column
+    out.flush()
+    del out
+
+    shared = np.load(path, mmap_mode="r")
+    if isinstance(X, pd.DataFrame):
+        return pd.DataFrame(shared, columns=X.columns, index=X.index, copy=False)
+    return shared
+
+
+def _memmap_backed(X) -> bool:
+    # A DataFrame's blocks are checked where they are: to_numpy() would copy a mixed-dtype frame to find out
+    arrays = [block.values for block in X._mgr.blocks] if isinstance(X, pd.DataFrame) else [X]
+    return bool(arrays) and all(_is_memmap(arr) for arr in arrays)
+
+
+def _is_memmap(arr) -> bool:
+    while isinstance(arr, np.ndarray):
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def fold_split(positions: np.ndarray, index_suffix: str = "") -> PredefinedSplit:
+    """
+    CV folds from the saved split assignment (the train fold each row was hashed into), built once for
+    every candidate instead of reshuffled by each search.
+    """
+    return PredefinedSplit(np.asarray(feh.load_split_assignment(index_suffix)[np.asarray(positions)]))
+
+
+def search_cv(search, positions: np.ndarray, index_suffix: str = ""):
+    """
+    The saved folds when the notebook's search uses as many folds, otherwise the search's own CV
+    (e.g. the random forest's 10 folds), so moving to halving never changes how many folds a model gets.
+    """
+    folds = fold_split(positions, index_suffix)
+    return folds if folds.get_n_splits() == check_cv(search.cv).get_n_splits() else search.cv
+
+
+def min_samples(y, n_candidates: int, n_splits: int, factor: int = 3, min_positives: int = 50) -> int:
+    """
+    Rows for the first halving round: what min_resources="exhaust" would give, raised until each CV training
+    fold of the round expects min_positives positives. With too few, early rounds score F1 0 and halving
+    discards candidates at random.
+    """
+    y = np.asarray(y)
+    n_rounds = 1 + int(np.floor(np.log(n_candidates) / np.log(factor)))
+    exhaust = len(y) // factor ** (n_rounds - 1)
+    positive_rate = max(float(np.mean(y == 1)), 1 / len(y))
+    needed = int(np.ceil(min_positives / (positive_rate * (n_splits - 1) / n_splits)))
+    return min(len(y), max(exhaust, needed))
+
+
+def halving_search(search, cv, resource: str = "n_samples", max_resources="auto", factor: int = 3,
+                   n_candidates: int | None = None, y=None) -> HalvingRandomSearchCV:
+    """
+    Successive-halving version of a RandomizedSearchCV: the same estimator, distributions and scoring, but
+    every round keeps the best 1/factor of the candidates and gives them factor times the resource
+    (training rows by default, or an estimator parameter such as max_iter). Early rounds are cheap,
+    so by default it tries factor times as many candidates as the random search did.
+    Pass the training labels y to size the first round by rows so it has positives (min_samples).
+    """
+    n_candidates = n_candidates or factor * search.n_iter
+    param_distributions = dict(search.param_distributions)
+    min_resources = "exhaust"
+    if resource != "n_samples":
+        # The halving schedule sets the resource; it can't also be sampled
+        param_distributions.pop(resource, None)
+    elif y is not None and max_resources == "auto":
+        min_resources = min_samples(y, n_candidates, check_cv(cv).get_n_splits(), factor)
+        # Fewer rounds fit between min_resources and all rows; keep only the candidates they can halve down,
+        # never fewer than the random search tried
+        n_rounds = 1 + int(np.floor(np.log(len(y) / min_resources) / np.log(factor)))
+        n_candidates = max(search.n_iter, min(n_candidates, factor ** (n_rounds - 1)))
+
+    return HalvingRandomSearchCV(
+        search.estimator,
+        param_distributions=param_distributions,
+        n_candidates=n_candidates,
+        factor=factor,
+        resource=resource,
+        max_resources=max_resources,
+        min_resources=min_resources,
+        scoring=search.scoring,
+        cv=cv,
+        refit=True,
+        n_jobs=search.n_jobs,
+        random_state=search.random_state,
+    )
+
+
+def search_log(search) -> pd.DataFrame:
+    """
+    One row per (round, candidate): resources it got, fit and score seconds, and CV score.
+    """
+    results = pd.DataFrame(search.cv_results_)
+    if "iter" not in results:
+        results["iter"], results["n_resources"] = 0, np.nan
+    return results[SEARCH_LOG_COLUMNS]
+
+
+def print_search_rounds(log: pd.DataFrame) -> None:
+    rounds = log.groupby("iter").agg(
+        candidates=("params", "size"),
+        n_resources=("n_resources", "first"),
+        fit_seconds_per_fold=("mean_fit_time", "sum"),
+        best_score=("mean_test_score", "max"),
+    )
+    print(rounds.to_string())
@@ -0,0 +1,135 @@
+# src/helpers/sparse_svd_helpers.py
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+import src.utils.arrow_utils as au
+import src.utils.file_utils as fu
+import src.utils.schema_utils as su
+import src.helpers.feature_engineering_helper as feh
+
+TARGET_COL = "denied_flag"
+
+
+def categorical_columns(columns) -> list[str]:
+    """
+    The one-hot block the SVD reduces: every model-dataset column except the scaled numerics, target and row key.
+    """
+    return [c for c in columns if c not in feh.SCALED_NUMERIC_COLS and c not in (TARGET_COL, su.ROW_KEY)]
+
+
+def _nonzero(data, col: str) -> tuple[np.ndarray, np.ndarray]:
+    # Row indices and values of a column's nonzero entries, without a float copy of the whole column.
+    # Missing values count as 0.
+    if isinstance(data, pd.DataFrame):
+        series = data[col]
+        numpy_backed = isinstance(series.dtype, np.dtype) and series.dtype != object
+        values = series.to_numpy() if numpy_backed else series.to_numpy(dtype=np.float32, na_value=0.0)
+    else:
+        column = data.column(col)
+        if column.null_count:
+            column = pc.fill_null(column, pa.scalar(0).cast(column.type))
+        values = column.to_numpy(zero_copy_only=False)
+    rows = np.flatnonzero(values)
+    vals = values[rows].astype(np.float32)
+    if vals.dtype.kind == "f" and np.isnan(vals).any():
+        keep = ~np.isnan(vals)
+        rows, vals = rows[keep], vals[keep]
+    return rows.astype(np.int32), vals
+
+
+def to_csr(data, columns: list[str] | None = None) -> sp.csr_matrix:
+    """
+    float32 CSR matrix of the encoded columns of a DataFrame or Arrow table, assembled column by column
+    from their nonzero entries, so the dense block is never materialized. Missing values count as 0.
+    """
+    if columns is None:
+        columns = list(data.columns) if isinstance(data, pd.DataFrame) else data.schema.names
+    n_rows = len(data) if isinstance(data, pd.DataFrame) else data.num_rows
+    indices, values = zip(*(_nonzero(data, col) for col in columns)) if columns else ((), ())
+    indptr = np.concatenate([[0], np.cumsum([len(i) for i in indices])])
+    csc = sp.csc_matrix((np.concatenate(values) if columns else np.empty(0, np.float32),
+                         np.concatenate(indices) if columns else np.empty(0, np.int32), indptr),
+                        shape=(n_rows, len(columns)), dtype=np.float32)
+    return csc.tocsr()
+
+
+def iter_csr_chunks(split: str = "train", columns: list[str] | None = None, index_suffix: str = ""):
+    """
+    The split's rows of the one-hot block as one CSR matrix per Parquet row group, read on a background
+    thread one row group ahead. Memory is bounded by a row group's nonzeros.
+    """
+    pf = pq.ParquetFile(fu.get_path("hmda_2024_model" + index_suffix))
+    columns = columns or categorical_columns(pf.schema_arrow.names)
+
+    def load(group):
+        i, rows = group
+        return to_csr(pf.read_row_group(i, columns=columns).take(rows), columns)
+
+    yield from au.map_batches(load, feh.split_row_groups(pf, split, index_suffix), n_threads=1, max_in_flight=2)
+
+
+def _gram_pass(chunks, Q: np.ndarray) -> tuple[np.ndarray, dict]:
+    # A^T A Q in one streamed pass, with the column sums, sums of squares and row count for explained variance
+    Z = np.zeros_like(Q)
+    stats = {"n": 0, "sum": np.zeros(Q.shape[0]), "sum_sq": np.zeros(Q.shape[0])}
+    for A in chunks():
+        Z += A.T @ (A @ Q)
+        stats["n"] += A.shape[0]
+        stats["sum"] += np.bincount(A.indices, weights=A.data, minlength=Q.shape[0])
+        stats["sum_sq"] += np.bincount(A.indices, weights=np.square(A.data, dtype=np.float64), minlength=Q.shape[0])
+    return Z, stats
+
+
+def fit_randomized_svd(chunks, n_features: int, n_components: int = 20, n_oversamples: int = 20, n_iter: int = 5,
+                       random_state: int = 42) -> TruncatedSVD:
+    """
+    Randomized truncated SVD (Halko et al.) of a matrix seen only as a stream of row chunks: subspace
+    iteration on A^T A, one pass over chunks() per iteration, then Rayleigh-Ritz on the final subspace.
+    Holds n_features x (n_components + n_oversamples) floats rather than the matrix. chunks is called once per
+    pass and must yield the same rows each time. Returns a fitted TruncatedSVD, so transform works as before.
+    """
+    rng = np.random.default_rng(random_state)
+    width = min(n_features, n_components + n_oversamples)
+    Q, _ = np.linalg.qr(rng.standard_normal((n_features, width)))
+    for i in range(n_iter + 1):
+        started = time.perf_counter()
+        Z, stats = _gram_pass(chunks, Q)
+        print(f"SVD pass {i + 1}/{n_iter + 1}: {stats['n']:,} rows in {time.perf_counter() - started:.1f}s")
+        if i < n_iter:
+            Q, _ = np.linalg.qr(Z)
+
+    # Q^T A^T A Q is small; its eigenvectors rotate Q onto the right singular vectors
+    eigenvalues, U = np.linalg.eigh((Q.T @ Z + Z.T @ Q) / 2)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+    eigenvalues, components = np.clip(eigenvalues[order], 0, None), (Q @ U[:, order]).T
+    # sklearn's sign convention: the largest loading of each component is positive
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    components *= signs[:, None]
+
+    n, mean = stats["n"], stats["sum"] / stats["n"]
+    svd = TruncatedSVD(n_components=n_components, n_oversamples=n_oversamples, n_iter=n_iter, random_state=random_state)
+    svd.components_ = components
+    svd.singular_values_ = np.sqrt(eigenvalues)
+    # Population variance of each projection and of the original columns, as TruncatedSVD reports them
+    svd.explained_variance_ = eigenvalues / n - (mean @ components.T) ** 2
+    svd.explained_variance_ratio_ = svd.explained_variance_ / (stats["sum_sq"] / n - mean ** 2).sum()
+    svd.n_features_in_ = n_features
+    return svd
+
+
+def fit_svd(n_components: int = 20, n_iter: int = 5, index_suffix: str = "", random_state: int = 42) -> TruncatedSVD:
+    """
+    Fit the categorical SVD on every training row, streaming the one-hot block row group by row group.
+    """
+    pf = pq.ParquetFile(fu.get_path("hmda_2024_model" + index_suffix))
+    columns = categorical_columns(pf.schema_arrow.names)
+    print(f"Fitting a {n_components} component SVD over {len(columns)} categorical columns")
+    return fit_randomized_svd(lambda: iter_csr_chunks("train", columns, index_suffix), len(columns), n_components,
+                              n_iter=n_iter, random_state=random_state)
@@ -0,0 +1,184 @@
+# src/helpers/synthetic_data_helpers.py
+from __future__ import annotations
+from pathlib import Path
+import re
+import zlib
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import src.utils.file_utils as fu
+
+STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+          "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH",
+          "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY"]
+AGE_BINS = ["<25", "25-34", "35-44", "45-54", "55-64", "65-74", ">74", "8888"]
+TOTAL_UNITS = ["1", "2", "3", "4", "5-24", "25-49", "50-99", "100-149", ">149"]
+N_LENDERS = 5000
+
+# Share of missing values where no rule says otherwise, and of those written as a null-like token
+NULL_RATE = 0.02
+NULL_TOKEN_RATE = 0.25
+EXEMPT_RATE = 0.01
+# Reported on every application, so never missing
+REQUIRED = {"activity_year", "lei", "loan_type", "loan_purpose", "preapproval", "construction_method", "occupancy_type",
+            "loan_amount", "action_taken", "lien_status"}
+
+
+def _column_rng(seed: int, chunk: int, col: str) -> np.random.Generator:
+    # Independent stream per column and chunk, so adding a column does not change the others
+    return np.random.default_rng([seed, chunk, zlib.crc32(col.encode())])
+
+
+def _skewed_weights(col: str, n: int) -> np.ndarray:
+    # Fixed per column across chunks: a few common codes and a long tail, as in the real data
+    w = np.random.default_rng(zlib.crc32(col.encode())).dirichlet(np.full(n, 0.7))
+    return w / w.sum()
+
+
+def column_codes(col: str, cfg_feature_engineering: dict) -> list[str] | None:
+    """
+    Raw codes a categorical column takes, from its code map in feature_engineering.yaml (or the map of its
+    numbered family, e.g. applicant_race_2 uses applicant_race_code_map).
+    """
+    cfg = cfg_feature_engineering["feature_engineering"]
+    base = re.sub(r"_\d$", "", col)
+    for key in (f"{col}_code_map", f"{col}_ohe_map", f"{col}_map", f"{base}_code_map"):
+        if key in cfg:
+            return list(dict.fromkeys(str(v) for values in cfg[key].values() for v in values))
+    return None
+
+
+def _choice(rng, values: list[str], n: int, col: str) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=_skewed_weights(col, len(values)))]
+
+
+def _loan_fields(rng, n: int) -> dict[str, np.ndarray]:
+    # Amounts are reported as the midpoint of a $10k bucket, income in thousands
+    income = np.round(rng.lognormal(np.log(95), 0.6, n))
+    loan_amount = np.round(np.clip(income * 1000 * rng.lognormal(np.log(2.8), 0.45, n), 5_000, 5e7), -4) + 5_000
+    cltv = np.round(np.clip(rng.normal(78, 15, n), 5, 125), 1)
+    property_value = np.round(loan_amount / (cltv / 100), -4) + 5_000
+    dti = np.clip(rng.normal(37, 9, n), 5, 80)
+    return {"income": income, "loan_amount": loan_amount, "combined_loan_to_value_ratio": cltv,
+            "property_value": property_value, "dti": dti}
+
+
+def _dti_codes(dti: np.ndarray) -> np.ndarray:
+    # Reported as ranges outside 36-49 and exact percentages inside
+    codes = np.where(dti < 20, "<20%", np.where(dti < 30, "20%-<30%", np.where(dti < 36, "30%-<36%",
+                     np.where(dti < 50, dti.astype(int).astype(str), np.where(dti <= 60, "50%-60%", ">60%")))))
+    return codes.astype(object)
+
+
+def _action_taken(rng, fields: dict, loan_type: np.ndarray, cfg_clean: dict) -> np.ndarray:
+    """
+    Denials follow a latent risk score of debt-to-income, loan-to-value, income and loan type, so trained
+    models have signal to find. A fixed share of applications never reaches a decision (excluded codes).
+    """
+    action_cfg = cfg_clean["clean"]["action_taken"]
+    risk = (-1.9 + 0.07 * (fields["dti"] - 37) + 0.03 * (fields["combined_loan_to_value_ratio"] - 78)
+            - 0.6 * np.log(fields["income"] / 95) + 0.5 * (loan_type != "1") + rng.normal(0, 0.8, len(loan_type)))
+    denied = rng.random(len(loan_type)) < 1 / (1 + np.exp(-risk))
+    out = np.where(denied, _choice(rng, [str(c) for c in action_cfg["denied"]], len(denied), "action_taken_denied"),
+                   _choice(rng, [str(c) for c in action_cfg["approved"]], len(denied), "action_taken_approved"))
+    excluded = rng.random(len(denied)) < 0.15
+    out[excluded] = _choice(rng, [str(c) for c in action_cfg["exclude"]], int(excluded.sum()), "action_taken_exclude")
+    return out
+
+
+def _fallback(rng, col: str, spec: dict, n: int) -> np.ndarray:
+    # Columns without a rule get plausible values for their schema type
+    if spec.get("type") == "categorical":
+        codes = ["1", "2"] if str(spec.get("dtype", "")).startswith("Bool") else [str(i) for i in range(1, 6)]
+        return _choice(rng, codes, n, col)
+    if spec.get("type") == "numeric":
+        return np.round(rng.lognormal(3, 1, n)).astype(int).astype(str).astype(object)
+    return _choice(rng, [str(i) for i in range(1, 21)], n, col)
+
+
+def generate_chunk(n: int, chunk: int, cfg_schema: dict, cfg_feature_engineering: dict, cfg_clean: dict,
+                   seed: int = 42) -> pa.Table:
+    """
+    n rows of raw HMDA LAR (every schema.yaml column, as strings), like the file raw_to_parquet.py writes.
+    """
+    columns = cfg_schema["columns"]
+    null_like = [t for t in cfg_clean["clean"].get("null_like", []) if t] or ["NA"]
+    rng = _column_rng(seed, chunk, "__rows__")
+    fields = _loan_fields(rng, n)
+    states = _choice(rng, STATES, n, "state_code")
+    county = np.char.add(np.char.zfill(rng.integers(1, 57, n).astype(str), 2), np.char.zfill(rng.integers(1, 200, n).astype(str), 3))
+
+    values = {
+        "activity_year": np.full(n, "2024", dtype=object),
+        "lei": np.char.add("5493", np.char.zfill(_choice(rng, [str(i) for i in range(N_LENDERS)], n, "lei").astype(str), 16)).astype(object),
+        "state_code": states,
+        "county_code": county.astype(object),
+        "census_tract": np.char.add(county, np.char.zfill(rng.integers(100, 990_000, n).astype(str), 6)).astype(object),
+        "loan_amount": fields["loan_amount"].astype(np.int64).astype(str).astype(object),
+        "income": fields["income"].astype(np.int64).astype(str).astype(object),
+        "property_value": fields["property_value"].astype(np.int64).astype(str).astype(object),
+        "combined_loan_to_value_ratio": fields["combined_loan_to_value_ratio"].astype(str).astype(object),
+        "debt_to_income_ratio": _dti_codes(fields["dti"]),
+        "loan_term": _choice(rng, ["360", "180", "240", "120", "300"], n, "loan_term"),
+        "applicant_age": _choice(rng, AGE_BINS, n, "applicant_age"),
+        "co_applicant_age": np.where(rng.random(n) < 0.5, "9999", _choice(rng, AGE_BINS, n, "co_applicant_age")).astype(object),
+        "total_units": _choice(rng, TOTAL_UNITS, n, "total_units"),
+    }
+
+    out, sparse = {}, {"intro_rate_period": 0.9, "prepayment_penalty_term": 0.95, "multifamily_affordable_units": 0.99}
+    for col, spec in columns.items():
+        crng = _column_rng(seed, chunk, col)
+        if col in values:
+            arr = values[col]
+        elif col in sparse:
+            arr = np.round(crng.lognormal(3, 0.8, n)).astype(int).astype(str).astype(object)
+        elif col == "action_taken":
+            continue
+        elif codes := column_codes(col, cfg_feature_engineering):
+            arr = _choice(crng, codes, n, col)
+        elif col.endswith("_above_62"):
+            arr = _choice(crng, ["Yes", "No", "NA"], n, col)
+        else:
+            arr = _fallback(crng, col, spec, n)
+        arr = arr.copy()
+
+        # Later ethnicity / race slots are mostly empty; other columns get a few nulls and null-like tokens
+        null_rate = sparse.get(col) or (0.9 if re.search(r"_(ethnicity|race)_[2-5]$", col) else NULL_RATE)
+        if col in REQUIRED:
+            null_rate = 0.0
+        missing = crng.random(n) < null_rate
+        tokens = missing & (crng.random(n) < NULL_TOKEN_RATE)
+        arr[tokens] = crng.choice(null_like, int(tokens.sum()))
+        arr[missing & ~tokens] = None
+        if spec.get("exempt"):
+            arr[crng.random(n) < EXEMPT_RATE] = "Exempt"
+        if col == "income":
+            # The sentinel and sign typos clean.yaml repairs
+            arr[crng.random(n) < 0.002] = "999999999"
+            flip = (crng.random(n) < 0.002) & ~missing
+            arr[flip] = np.char.add("-", arr[flip].astype(str))
+        out[col] = arr
+
+    if "action_taken" in columns:
+        out["action_taken"] = _action_taken(rng, fields, out.get("loan_type", np.full(n, "1", dtype=object)), cfg_clean)
+    return pa.table({col: pa.array(out[col], type=pa.string()) for col in columns if col in out})
+
+
+def generate_raw_parquet(n_rows: int, output_path: Path | None = None, chunk_rows: int = 500_000, seed: int = 42) -> Path:
+    """
+    Write n_rows of synthetic raw HMDA data to Parquet (hmda_raw by default), chunk_rows at a time, so any
+    scale fits in memory. The same seed and chunk_rows always give the same file.
+    """
+    output_path = Path(output_path or fu.get_path("hmda_raw"))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    cfg_schema, cfg_feature_engineering, cfg_clean = (fu.load_config(name) for name in ("schema", "feature_engineering", "clean"))
+
+    with pq.ParquetWriter(output_path, generate_chunk(1, 0, cfg_schema, cfg_feature_engineering, cfg_clean, seed).schema,
+                          compression="snappy") as writer:
+        for chunk, start in enumerate(range(0, n_rows, chunk_rows)):
+            n = min(chunk_rows, n_rows - start)
+            writer.write_table(generate_chunk(n, chunk, cfg_schema, cfg_feature_engineering, cfg_clean, seed))
+    print(f"Saved {n_rows:,} synthetic rows to {output_path}")
+    return output_path
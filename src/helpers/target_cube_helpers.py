@@ -0,0 +1,116 @@
+# src/helpers/target_cube_helpers.py
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import src.utils.arrow_utils as au
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+
+
+def _cube_batch(item):
+    # rows: all rows per category; n / sum: count and sum of the non-missing target, as groupby count/sum
+    col, arr, y = item
+    encoded = pc.dictionary_encode(arr)
+    size = len(encoded.dictionary) + 1
+    idx = encoded.indices.fill_null(size - 1).to_numpy(zero_copy_only=False)
+    known = ~np.isnan(y)
+
+    rows = np.bincount(idx, minlength=size)
+    stats = pd.DataFrame({
+        "rows": rows,
+        "n": np.bincount(idx, weights=known, minlength=size).astype(np.int64),
+        "sum": np.bincount(idx, weights=np.where(known, y, 0.0), minlength=size),
+    }, index=pd.Index(encoded.dictionary.to_pylist() + [None], dtype=object, name=col))
+    return col, stats[rows > 0]
+
+
+def _combine(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    # Counts and sums add across partitions; missing values stay their own category
+    return pd.concat([a, b]).groupby(level=0, dropna=False, sort=False).sum()
+
+
+class TargetCube:
+    """
+    Per-category target statistics (rows, non-missing target count, target sum) for every categorical column,
+    built in one parallel pass and queried by the EDA screens instead of one groupby per column per screen.
+    Counts and sums are additive, so new partitions are folded in with update() without rescanning the old ones.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self.columns = {}
+        self.partitions = []
+
+    def update(self, source: pd.DataFrame | str, category_cols: list[str], partition: str | None = None,
+               batch_size: int = 1_000_000, n_threads: int | None = None) -> "TargetCube":
+        """
+        Add a DataFrame or a Parquet file (paths.yaml key or path). File sources are identified by their path,
+        so a partition that was already added is skipped rather than counted twice.
+        """
+        columns = list(dict.fromkeys(category_cols + [self.target]))
+        if isinstance(source, pd.DataFrame):
+            batches = pa.Table.from_pandas(source[columns], preserve_index=False).to_batches(batch_size)
+        else:
+            path = fu.get_path(source) if isinstance(source, str) and source in fu.load_config("paths") else Path(source)
+            partition = partition or str(path)
+            if partition in self.partitions:
+                print(f"Skipping {partition}: already in the cube")
+                return self
+            print(f"Adding {path} to the target cube")
+            batches = ds.dataset(path, format="parquet").to_batches(columns=columns, batch_size=batch_size)
+
+        def items():
+            for batch in batches:
+                y = pc.cast(batch.column(self.target), pa.float64()).to_numpy(zero_copy_only=False)
+                for col in category_cols:
+                    yield col, batch.column(col), y
+
+        for col, stats in au.map_batches(_cube_batch, items(), n_threads=n_threads):
+            self.columns[col] = _combine(self.columns[col], stats) if col in self.columns else stats
+        if partition is not None:
+            self.partitions.append(partition)
+        return self
+
+    def merge(self, other: "TargetCube") -> "TargetCube":
+        if other.target != self.target:
+            raise ValueError(f"Cannot merge a {other.target} cube into a {self.target} cube")
+        for col, stats in other.columns.items():
+            self.columns[col] = _combine(self.columns[col], stats) if col in self.columns else stats.copy()
+        self.partitions += [p for p in other.partitions if p not in self.partitions]
+        return self
+
+    def stats(self, col: str) -> pd.DataFrame:
+        """
+        One row per category of col with rows, n, sum and rate (the mean target; NaN when n is 0).
+        """
+        stats = self.columns[col].copy()
+        stats["rate"] = stats["sum"] / stats["n"].where(stats["n"] > 0)
+        return stats
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per column: number of categories and the lowest and highest target rate.
+        """
+        rows = {}
+        for col in self.columns:
+            rate = self.stats(col)["rate"]
+            rows[col] = {"n_classes": len(rate), "min_rate": rate.min(), "max_rate": rate.max()}
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def build_target_cube(source: pd.DataFrame | str, category_cols: list[str], target: str, **kwargs) -> TargetCube:
+    return TargetCube(target).update(source, category_cols, **kwargs)
+
+
+def save_target_cube(cube: TargetCube, path_key: str = "target_cube") -> Path:
+    return mr.save_model(cube, path_key, {"target": cube.target, "partitions": cube.partitions})
+
+
+def load_target_cube(path_key: str = "target_cube") -> TargetCube:
+    return mr.load_model(path_key, mmap=False)
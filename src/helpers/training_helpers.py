@@ -0,0 +1,236 @@
+# src/helpers/training_helpers.py
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.stats import loguniform, randint, uniform
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold
+from sklearn.utils.class_weight import compute_sample_weight
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+import src.helpers.model_helpers as mh
+import src.helpers.feature_engineering_helper as feh
+import src.helpers.logistic_regression_helpers as lrh
+import src.helpers.search_helpers as sh
+import src.helpers.sparse_svd_helpers as ssvd
+
+# Continuous columns CatBoost treats as numeric; everything else is passed as a categorical feature
+CATBOOST_NUMERIC_COLS = ["combined_loan_to_value_ratio", "loan_term", "intro_rate_period", "prepayment_penalty_term",
+                         "loan_to_income_ratio", "loan_amount", "income", "property_value"]
+CATBOOST_MISSING = "__MISSING__"
+
+
+def create_random_forest_search():
+    param_grid = {
+        "n_estimators": randint(600, 1000),
+        "max_depth": [None, 10, 20, 40],
+        "max_features": ["sqrt", "log2", 0.2, 0.3, 0.5],
+        "min_samples_split": randint(5, 101),
+        "min_samples_leaf": randint(1, 9),
+        "class_weight": [None, "balanced", "balanced_subsample"],
+        "max_samples": [None, 0.5, 0.7, 0.9],
+    }
+    return RandomizedSearchCV(
+        RandomForestClassifier(n_jobs=-1, bootstrap=True, random_state=42),
+        param_distributions=param_grid,
+        n_iter=30,
+        scoring="f1",
+        cv=StratifiedKFold(n_splits=10, shuffle=True, random_state=42),
+        random_state=42,
+        n_jobs=-1,
+    )
+
+
+def create_hgbm_search():
+    param_grid = {
+        "learning_rate": loguniform(1e-3, 1e-1),
+        "max_iter": randint(400, 1500),
+        "max_depth": [2, 3, 4],
+        "max_leaf_nodes": randint(16, 96),
+        "min_samples_leaf": randint(100, 600),
+        "l2_regularization": loguniform(1e-4, 10),
+        "max_bins": randint(64, 255),
+    }
+    return RandomizedSearchCV(
+        HistGradientBoostingClassifier(random_state=42, early_stopping=True, validation_fraction=0.1, n_iter_no_change=30),
+        param_distributions=param_grid,
+        n_iter=15,
+        scoring="f1",
+        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
+        n_jobs=-1,
+        random_state=42,
+        refit=True,
+    )
+
+
+def create_mlp_search():
+    param_grid = {
+        "hidden_layer_sizes": [(64,), (128,), (64, 32), (128, 64)],
+        "activation": ["relu", "tanh"],
+        "alpha": loguniform(1e-5, 1e-2),
+        "learning_rate_init": loguniform(1e-4, 1e-2),
+        "batch_size": randint(64, 512),
+    }
+    return RandomizedSearchCV(
+        MLPClassifier(solver="adam", max_iter=300, early_stopping=True, validation_fraction=0.1, random_state=42),
+        param_distributions=param_grid,
+        n_iter=30,
+        scoring="f1",
+        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
+        n_jobs=-1,
+        random_state=42,
+    )
+
+
+def create_catboost_search():
+    # Imported here so the other models can train without catboost installed
+    from catboost import CatBoostClassifier
+
+    param_grid = {
+        "depth": randint(4, 10),
+        "learning_rate": loguniform(1e-3, 3e-1),
+        "l2_leaf_reg": loguniform(1e-2, 1e2),
+        "bagging_temperature": uniform(0.0, 1.0),
+        "border_count": randint(64, 255),
+        "random_strength": uniform(0.0, 1.0),
+        "min_data_in_leaf": randint(20, 500),
+        "scale_pos_weight": loguniform(0.5, 10),
+        "n_estimators": randint(800, 2500),
+    }
+    return RandomizedSearchCV(
+        CatBoostClassifier(loss_function="Logloss", eval_metric="F1", verbose=False, random_seed=42, thread_count=-1),
+        param_distributions=param_grid,
+        n_iter=15,
+        scoring="f1",
+        cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42),
+        n_jobs=-1,
+        random_state=42,
+        refit=True,
+    )
+
+
+# One entry per model notebook (04a-04e). features selects the transform applied before fitting.
+# cpu_weight is the model's relative share of threads when several train at once (orchestration_helpers).
+MODEL_SPECS = {
+    "log_reg": {"search": lrh.create_cv_search, "features": "pca_svd", "fraction": 0.005, "cpu_weight": 1},
+    "random_forest": {"search": create_random_forest_search, "features": "raw", "fraction": 0.005, "cpu_weight": 3},
+    "hgbm": {"search": create_hgbm_search, "features": "raw", "fraction": 0.06, "balanced_weights": True,
+             "cpu_weight": 2},
+    "mlp": {"search": create_mlp_search, "features": "pca", "fraction": 0.005, "cpu_weight": 1},
+    "catboost": {"search": create_catboost_search, "features": "catboost", "fraction": 0.02,
+                 "index_suffix": "_catboost", "balanced_weights": True, "cpu_weight": 3},
+}
+
+
+def limit_search_threads(search, n_jobs: int):
+    """
+    Run the search's candidates on n_jobs workers and each fit single-threaded, instead of
+    n_jobs=-1 at both levels (thread_count for CatBoost).
+    """
+    estimator = search.estimator
+    inner = {k: 1 for k in estimator.get_params(deep=False) if k in ("n_jobs", "thread_count")}
+    search.set_params(n_jobs=n_jobs, estimator=estimator.set_params(**inner))
+    return search
+
+
+def transform_numeric_pca(X, scaler, ipca) -> np.ndarray:
+    """
+    Log transform, scale and project the continuous columns onto the fitted IPCA components.
+    """
+    X_numeric = feh.log_transform_skewed_features(X[feh.SCALED_NUMERIC_COLS].copy())
+    scaled = scaler.transform(X_numeric)
+    # IPCA was fitted on median-imputed scaled values; 0 is the training mean after scaling
+    return ipca.transform(np.nan_to_num(scaled, nan=0.0))
+
+
+def load_feature_transforms(kind: str) -> dict:
+    """
+    Load the fitted transforms a feature kind needs, once, so they can be reused across batches.
+    """
+    if kind in ("raw", "catboost"):
+        return {}
+
+    transforms = {"scaler": mr.get_model("scaler_model"), "ipca": mr.get_model("ipca_model")}
+    if kind == "pca_svd":
+        transforms["svd"] = mr.get_model("svd_model")
+    return transforms
+
+
+def transform_features(kind: str, X, transforms: dict):
+    """
+    Turn model-dataset columns into the matrix the estimator was fitted on.
+    """
+    if kind == "raw":
+        return X
+
+    if kind == "catboost":
+        cat_cols = [c for c in X.columns if c not in CATBOOST_NUMERIC_COLS]
+        X[cat_cols] = X[cat_cols].astype("string").fillna(CATBOOST_MISSING)
+        return X
+
+    cat_cols = [c for c in X.columns if c not in feh.SCALED_NUMERIC_COLS]
+    X_cat = X[cat_cols]
+    if kind == "pca_svd":
+        # The one-hot block is mostly zeros, so it is reduced from a sparse matrix
+        X_cat = transforms["svd"].transform(ssvd.to_csr(X_cat))
+    return np.hstack([transform_numeric_pca(X, transforms["scaler"], transforms["ipca"]), np.asarray(X_cat)])
+
+
+def prepare_features(kind: str, X_train, X_test):
+    """
+    Apply the feature transform a model spec asks for. Returns X_train, X_test and any extra fit params.
+    """
+    fit_params = {}
+    if kind == "catboost":
+        cat_idx = [i for i, c in enumerate(X_train.columns) if c not in CATBOOST_NUMERIC_COLS]
+        fit_params = {"cat_features": cat_idx, "early_stopping_rounds": 100}
+
+    transforms = load_feature_transforms(kind)
+    return transform_features(kind, X_train, transforms), transform_features(kind, X_test, transforms), fit_params
+
+
+def train_model(name: str, fraction: float | None = None, halving: bool = True, n_jobs: int | None = None):
+    """
+    Headless version of a 04 model notebook: search, evaluate, save metrics, curves and the fitted model.
+    Features come from the float32 feature store (built on first use), except CatBoost's string categoricals.
+    halving runs the notebook's search as successive halving on a memory-mapped X with the saved folds (the search's
+    own CV when it uses a different number of folds),
+    and writes per-candidate timings to {name}_search_log_csv; halving=False runs the notebook's search as is.
+    n_jobs caps the threads the search uses (default: every core).
+    """
+    spec = MODEL_SPECS[name]
+    fraction = spec["fraction"] if fraction is None else fraction
+    if spec["features"] == "catboost":
+        X_train, y_train, X_test, y_test = mh.load_model_dataset(fraction=fraction, index_suffix=spec.get("index_suffix", ""))
+        X_train, X_test, fit_params = prepare_features(spec["features"], X_train, X_test)
+    else:
+        # Imported here because the feature store builds its views with this module's transforms
+        import src.helpers.feature_store_helpers as fs
+        X_train, y_train, X_test, y_test = fs.load_training_data(spec["features"], fraction, spec.get("index_suffix", ""))
+        fit_params = {}
+    if spec.get("balanced_weights"):
+        fit_params["sample_weight"] = compute_sample_weight(class_weight="balanced", y=y_train)
+
+    search = spec["search"]()
+    if n_jobs is not None:
+        search = limit_search_threads(search, n_jobs)
+    if halving:
+        # CatBoost keeps its string categoricals, so only numeric matrices are shared
+        if spec["features"] != "catboost":
+            X_train = sh.shared_matrix(X_train, name)
+        search = sh.halving_search(search, sh.search_cv(search, y_train.index, spec.get("index_suffix", "")), y=y_train)
+    search.fit(X_train, y_train, **fit_params)
+    mh.output_cv_summary(search)
+    if halving:
+        log = sh.search_log(search)
+        sh.print_search_rounds(log)
+        log.to_csv(fu.get_path(f"{name}_search_log_csv"), index=False)
+
+    results, y_pred, y_prob = mh.calculate_test_metrics(search, X_test, y_test)
+    mh.save_metrics_to_csv(results, f"{name}_metrics_csv")
+    mh.draw_roc_curve(y_test, y_prob, f"{name}_roc")
+    mh.draw_pr_curve(y_test, y_prob, f"{name}_pr")
+    plt.close("all")
+    mh.persist_model(search, f"{name}_model")
+
+    return results
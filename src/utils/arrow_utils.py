@@ -0,0 +1,112 @@
+# src/utils/arrow_utils.py
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Same tokens pandas treats as missing by default, plus the HMDA specific ones we passed to read_csv
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+# Anything pd.to_numeric would accept as a plain number
+NUMERIC_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def is_string(arr: pa.Array) -> bool:
+    return pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)
+
+
+def coerce_numeric(arr: pa.Array, target: pa.DataType) -> pa.Array:
+    """
+    Arrow equivalent of pd.to_numeric(errors="coerce").astype(target)
+    - Trims whitespace and nulls out anything that doesn't parse as a number
+    - Goes through float64 so values like "30.0" still land in integer columns
+    - Integer targets: non-integral or out-of-range values become null rather than raising
+    """
+    if is_string(arr):
+        s = pc.utf8_trim_whitespace(arr)
+        arr = pc.if_else(pc.match_substring_regex(s, NUMERIC_PATTERN), s, pa.scalar(None, arr.type))
+    if not pa.types.is_integer(target) or pa.types.is_integer(arr.type) and _fits(arr.type, target):
+        return pc.cast(arr, target)
+
+    f = pc.cast(arr, pa.float64())
+    info = np.iinfo(target.to_pandas_dtype())
+    valid = pc.and_(pc.equal(pc.floor(f), f),
+                    pc.and_(pc.greater_equal(f, float(info.min)), pc.less(f, float(info.max) + 1)))
+    # Strict bound: float(info.max) rounds up to 2**63 for int64. The unsafe cast only sees integral in-range values
+    return pc.cast(pc.if_else(pc.fill_null(valid, False), f, pa.scalar(None, pa.float64())), target, safe=False)
+
+
+def _fits(source: pa.DataType, target: pa.DataType) -> bool:
+    # Every value of integer type source is representable in integer type target
+    src, dst = np.iinfo(source.to_pandas_dtype()), np.iinfo(target.to_pandas_dtype())
+    return dst.min <= src.min and src.max <= dst.max
+
+
+def null_tokens(arr: pa.Array, tokens) -> pa.Array:
+    """
+    Replace any value found in tokens with null (e.g. the income 999999999 sentinel)
+    """
+    tokens = [str(t) for t in (tokens or [])]
+    if not tokens:
+        return arr
+    value_set = pa.array(tokens, type=pa.string()).cast(arr.type)
+    mask = pc.fill_null(pc.is_in(arr, value_set=value_set), False)
+    return pc.if_else(mask, pa.scalar(None, arr.type), arr)
+
+
+def map_batches(func, batches, n_threads: int | None = None, max_in_flight: int | None = None, executor=None):
+    """
+    Apply func to each record batch on a thread pool and yield the results in input order.
+    Arrow compute releases the GIL, so threads scale across cores. Only max_in_flight batches
+    are held at once, which keeps memory bounded by the batch size.
+    Pass an executor (e.g. a process pool) to run on it instead of a fresh thread pool.
+    """
+    n_threads = n_threads or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * n_threads
+
+    if executor is not None:
+        yield from _map_ordered(executor, func, batches, max_in_flight)
+        return
+
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        yield from _map_ordered(pool, func, batches, max_in_flight)
+
+
+def _map_ordered(pool, func, batches, max_in_flight: int):
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(func, batch))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def canonical_strings(arr) -> pa.Array:
+    """
+    Values as comparable strings whatever the column's physical type: trimmed, lower-cased, NA tokens as null
+    and every number in one spelling (30, "30" and " 30.0" all become "30").
+    """
+    s = arr if is_string(arr) else pc.cast(arr, pa.string())
+    s = pc.utf8_lower(pc.utf8_trim_whitespace(pc.cast(s, pa.string())))
+    s = pc.if_else(pc.is_in(s, value_set=pa.array(sorted({t.lower() for t in NA_VALUES}))), pa.scalar(None, pa.string()), s)
+    is_number = pc.fill_null(pc.match_substring_regex(s, NUMERIC_PATTERN), False)
+    number = pc.cast(pc.cast(pc.if_else(is_number, s, pa.scalar(None, pa.string())), pa.float64()), pa.string())
+    return pc.if_else(is_number, number, s)
+
+
+def hash_rows(data: pa.RecordBatch | pa.Table, columns: list[str]) -> pa.Array:
+    """
+    Stable 64-bit hash of each row's values across columns. The values are canonicalized first, so the key
+    doesn't change with the file's physical types (raw strings vs typed numbers) or formatting.
+    """
+    strings = [canonical_strings(data.column(c)) for c in columns]
+    joined = pc.binary_join_element_wise(*strings, "\x1f", null_handling="replace", null_replacement="\x1e")
+    return pa.array(pd.util.hash_array(joined.to_numpy(zero_copy_only=False)), type=pa.uint64())
@@ -0,0 +1,307 @@
+# src/utils/cache_utils.py
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import src.utils.file_utils as fu
+import src.utils.model_registry as mr
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# A stage output "<key>.meta" is the model registry's .meta.json sidecar of the model saved under <key>
+META_SUFFIX = ".meta"
+
+
+def cache_dir() -> Path:
+    path = fu.get_path("artifact_cache")
+    (path / "objects").mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _index_path() -> Path:
+    return cache_dir() / "index.json"
+
+
+@contextmanager
+def index_lock():
+    """
+    Exclusive lock on the index shared by every process, held across each read-modify-write of the index and
+    while objects are added or deleted, so parallel stages never lose entries or delete each other's objects.
+    """
+    with (cache_dir() / "index.lock").open("a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def output_path(key: str) -> Path:
+    """
+    Path of a stage output: a paths.yaml key, or "<key>.meta" for the registry sidecar of the model at <key>.
+    """
+    if key.endswith(META_SUFFIX):
+        return mr.metadata_path(fu.get_path(key[:-len(META_SUFFIX)]))
+    return fu.get_path(key)
+
+
+def load_index() -> dict:
+    path = _index_path()
+    if not path.exists():
+        return {"entries": {}, "fingerprints": {}, "stats": {"hits": 0, "misses": 0}}
+    with path.open("r") as f:
+        return json.load(f)
+
+
+def save_index(index: dict) -> None:
+    # Write then rename so a crash never leaves a half-written index; callers hold index_lock
+    path = _index_path()
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def file_digest(path: Path, index: dict | None = None) -> str:
+    """
+    Content hash of a file (or every file under a directory). Digests are remembered by (size, mtime)
+    so unchanged multi-GB Parquet files are only read once.
+    """
+    path = Path(path)
+    if path.is_dir():
+        h = hashlib.blake2b(digest_size=20)
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            h.update(str(child.relative_to(path)).encode())
+            h.update(file_digest(child, index).encode())
+        return h.hexdigest()
+
+    stat = path.stat()
+    fingerprints = index["fingerprints"] if index is not None else {}
+    cached = fingerprints.get(str(path))
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    h = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    fingerprints[str(path)] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+
+def compute_stage_key(inputs: list[str], config=None, code=(), index: dict | None = None) -> str:
+    """
+    Key a stage on the content of its input artifacts (paths.yaml keys), the config it reads and the source of the
+    helpers it runs. Any change to one of the three produces a new key.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for key in inputs:
+        h.update(key.encode())
+        h.update(file_digest(fu.get_path(key), index).encode())
+    h.update(json.dumps(_canonical(config), sort_keys=True, default=str).encode())
+    for obj in code:
+        h.update(_code_digest(obj))
+    return h.hexdigest()
+
+
+def _canonical(obj):
+    # YAML maps can mix int and str keys (e.g. 60_100 parses as 60100), which json can't sort
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def _code_digest(obj) -> bytes:
+    if isinstance(obj, str):
+        obj = importlib.import_module(obj)  # a module name hashes the whole module
+    try:
+        return inspect.getsource(obj).encode()
+    except (OSError, TypeError):
+        # No source file (e.g. defined interactively): fall back to the compiled bytecode
+        code = getattr(obj, "__code__", None)
+        return code.co_code + repr(code.co_consts).encode() if code else repr(obj).encode()
+
+
+def _place(src: Path, dst: Path) -> None:
+    # Always a real copy: pandas rewrites outputs in place, which would corrupt a hard-linked cache object.
+    # Directory outputs (e.g. partitioned Parquet) are copied whole, then swapped in for the old directory.
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    if src.is_dir():
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.copytree(src, tmp)
+        if dst.is_dir():
+            old = dst.with_name(f".{dst.name}.{os.getpid()}.old")
+            os.replace(dst, old)
+            os.replace(tmp, dst)
+            shutil.rmtree(old)
+            return
+    else:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def store_outputs(key: str, stage: str, outputs: list[str], index: dict) -> None:
+    objects = cache_dir() / "objects"
+    stored = {}
+    for out_key in outputs:
+        path = output_path(out_key)
+        digest = file_digest(path, index)
+        obj_path = objects / digest
+        if not obj_path.exists():
+            _place(path, obj_path)
+        stored[out_key] = digest
+
+    now = time.time()
+    index["entries"][key] = {"stage": stage, "outputs": stored, "created": now, "last_used": now}
+
+
+def restore_outputs(key: str, outputs: list[str], index: dict) -> bool:
+    """
+    Put a cached entry's files back in place. Files that already match are left alone.
+    """
+    entry = index["entries"].get(key)
+    if entry is None or set(entry["outputs"]) != set(outputs):
+        return False
+
+    objects = cache_dir() / "objects"
+    if not all((objects / digest).exists() for digest in entry["outputs"].values()):
+        return False
+
+    for out_key, digest in entry["outputs"].items():
+        path = output_path(out_key)
+        if path.exists() and file_digest(path, index) == digest:
+            continue
+        _place(objects / digest, path)
+        file_digest(path, index)
+
+    entry["last_used"] = time.time()
+    return True
+
+
+def evict(index: dict, max_size_gb: float | None = None, max_entries: int | None = None) -> list[str]:
+    """
+    Drop least recently used entries until the cache fits, then delete objects no entry refers to.
+    Call with index_lock held, on an index loaded under it.
+    """
+    cfg = (fu.load_config("cache").get("cache") or {})
+    max_size_gb = cfg.get("max_size_gb") if max_size_gb is None else max_size_gb
+    max_entries = cfg.get("max_entries") if max_entries is None else max_entries
+
+    objects = cache_dir() / "objects"
+    sizes = {p.name: _size(p) for p in objects.iterdir()}
+
+    def referenced_size():
+        live = {d for e in index["entries"].values() for d in e["outputs"].values()}
+        return sum(sizes.get(d, 0) for d in live)
+
+    evicted = []
+    by_age = sorted(index["entries"], key=lambda k: index["entries"][k]["last_used"])
+    while by_age and (
+        (max_entries is not None and len(index["entries"]) > max_entries)
+        or (max_size_gb is not None and referenced_size() > max_size_gb * 1024 ** 3)
+    ):
+        key = by_age.pop(0)
+        index["entries"].pop(key)
+        evicted.append(key)
+
+    live = {d for e in index["entries"].values() for d in e["outputs"].values()}
+    for name in sizes:
+        if name not in live:
+            _remove(objects / name)
+
+    return evicted
+
+
+def run_cached(stage: str, func, inputs: list[str], outputs: list[str], config=None, code=(), *args,
+               force: bool = False, **kwargs) -> bool:
+    """
+    Run func(*args, **kwargs) unless a previous run with the same stage key already produced `outputs`.
+    inputs/outputs are paths.yaml keys; config is the YAML section the stage reads; code lists extra helpers
+    (functions, or module names) whose source should invalidate the cache (func and its module are always included).
+    force runs the stage regardless and refreshes the cache entry. Returns True when the stage actually ran.
+    """
+    # Hash inputs against a snapshot of the index: digests are slow on big files, so they happen outside the lock
+    snapshot = load_index()
+    code = (func, *dict.fromkeys([func.__module__, *code]))
+    key = compute_stage_key(inputs, config, code, snapshot)
+
+    with index_lock():
+        index = load_index()
+        index["fingerprints"].update(snapshot["fingerprints"])
+        if not force and restore_outputs(key, outputs, index):
+            index["stats"]["hits"] += 1
+            save_index(index)
+            print(f"{stage}: cache hit ({key[:12]})")
+            return False
+
+    print(f"{stage}: cache miss ({key[:12]}), running")
+    func(*args, **kwargs)
+
+    for out_key in outputs:
+        file_digest(output_path(out_key), snapshot)
+
+    # Re-read under the lock so entries other stages stored while this one ran are kept
+    with index_lock():
+        index = load_index()
+        index["fingerprints"].update(snapshot["fingerprints"])
+        store_outputs(key, stage, outputs, index)
+        index["stats"]["misses"] += 1
+        evicted = evict(index)
+        save_index(index)
+    if evicted:
+        print(f"Evicted {len(evicted)} cache entries")
+
+    return True
+
+
+def cache_stats() -> dict:
+    with index_lock():
+        index = load_index()
+        size_bytes = sum(_size(p) for p in (cache_dir() / "objects").iterdir())
+    hits, misses = index["stats"]["hits"], index["stats"]["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "entries": len(index["entries"]),
+        "size_bytes": size_bytes,
+    }
@@ -54,6 +54,30 @@ def save_parquet(df, key: str) -> Path:
     return output_path
 
 
+def save_parquet_chunks(frames, key: str) -> Path:
+    """
+    Append a stream of DataFrames to one Parquet file, for outputs built chunk by chunk.
+    Every chunk is cast to the first chunk's schema.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output_path = get_path(key)
+    writer = None
+    try:
+        for df in frames:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema, compression="snappy")
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"Saved to {output_path}")
+
+    return output_path
+
+
 def load_parquet(key: str) -> pd.DataFrame:
     input_path = get_path(key)
     print(f"Loading dataset from {input_path}")
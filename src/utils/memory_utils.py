@@ -0,0 +1,166 @@
+# src/utils/memory_utils.py
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import src.utils.arrow_utils as au
+import src.utils.file_utils as fu
+
+# Narrowest first. Unsigned columns (row_key) are left alone: they are hashes, not codes.
+INT_TYPES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+# Dictionary indices are signed; beyond int16 a dictionary rarely beats plain strings
+MAX_DICTIONARY_SIZE = np.iinfo(np.int16).max
+
+
+def _memory_cfg() -> dict:
+    return fu.load_config("memory").get("memory") or {}
+
+
+def _source_path(source) -> Path:
+    return fu.get_path(source) if isinstance(source, str) and source in fu.load_config("paths") else Path(source)
+
+
+class _ColumnScan:
+    """
+    What the plan needs to know about one column, accumulated over batches.
+    """
+
+    def __init__(self, arrow_type: pa.DataType):
+        self.type = arrow_type
+        self.rows = 0
+        self.nbytes = 0
+        self.min = None
+        self.max = None
+        self.float32_exact = True
+        self.values = set()
+
+    def update(self, arr: pa.Array):
+        self.rows += len(arr)
+        self.nbytes += arr.nbytes
+        if pa.types.is_integer(self.type) or pa.types.is_floating(self.type):
+            lo, hi = pc.min_max(arr).values()
+            if lo.is_valid:
+                self.min = lo.as_py() if self.min is None else min(self.min, lo.as_py())
+                self.max = hi.as_py() if self.max is None else max(self.max, hi.as_py())
+            if pa.types.is_float64(self.type) and self.float32_exact:
+                values = arr.to_numpy(zero_copy_only=False)
+                # NaN != NaN, so compare with missing values masked out
+                with np.errstate(over="ignore"):
+                    roundtrip = values.astype(np.float32).astype(np.float64)
+                self.float32_exact = bool(np.all((roundtrip == values) | np.isnan(values)))
+        elif au.is_string(arr) and self.values is not None:
+            self.values.update(pc.unique(arr.drop_null()).to_pylist())
+            if len(self.values) > MAX_DICTIONARY_SIZE:
+                self.values = None
+
+    def planned_type(self, spec: dict) -> pa.DataType:
+        if pa.types.is_signed_integer(self.type) and self.min is not None:
+            return next(t for t in INT_TYPES if np.iinfo(t.to_pandas_dtype()).min <= self.min
+                        and self.max <= np.iinfo(t.to_pandas_dtype()).max)
+        if pa.types.is_signed_integer(self.type):
+            return pa.int8()  # all missing
+        if pa.types.is_float64(self.type) and self.float32_exact:
+            return pa.float32()
+        if pa.types.is_string(self.type) and self.values is not None and spec.get("type") == "categorical":
+            index = pa.int8() if len(self.values) <= np.iinfo(np.int8).max else pa.int16()
+            return pa.dictionary(index, pa.string())
+        return self.type
+
+    def planned_bytes(self, planned: pa.DataType) -> int:
+        validity = (self.rows + 7) // 8
+        if pa.types.is_dictionary(planned):
+            dictionary = sum(len(str(v).encode()) + 4 for v in self.values)
+            return self.rows * planned.index_type.bit_width // 8 + validity + dictionary
+        if planned == self.type:
+            return self.nbytes
+        return self.rows * planned.bit_width // 8 + validity
+
+
+def plan_column_types(source, cfg_schema: dict | None = None, batch_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    One pass over a Parquet file (paths.yaml key or path) to pick the narrowest lossless type per column:
+    - signed integers: the smallest of int8/16/32/64 holding the observed range
+    - float64: float32 when every value round-trips exactly
+    - strings schema.yaml marks categorical: dictionary-encoded with int8/int16 indices
+    Returns one row per column with the current and planned types and their in-memory bytes.
+    """
+    cfg_schema = cfg_schema or fu.load_config("schema")
+    specs = cfg_schema.get("columns", {}) or {}
+    dataset = ds.dataset(_source_path(source), format="parquet")
+    scans = {field.name: _ColumnScan(field.type) for field in dataset.schema}
+
+    for batch in dataset.to_batches(batch_size=batch_size):
+        for name, scan in scans.items():
+            scan.update(batch.column(name))
+
+    rows = []
+    for name, scan in scans.items():
+        planned = scan.planned_type(specs.get(name) or {})
+        rows.append({
+            "column": name,
+            "type": scan.type,
+            "planned_type": planned,
+            "bytes": scan.nbytes,
+            "planned_bytes": scan.planned_bytes(planned),
+        })
+    return pd.DataFrame(rows).set_index("column")
+
+
+def planned_schema(plan: pd.DataFrame, columns: list[str] | None = None) -> pa.Schema:
+    return pa.schema([(col, plan.loc[col, "planned_type"]) for col in (columns or plan.index)])
+
+
+def print_plan(plan: pd.DataFrame) -> None:
+    changed = plan[plan["type"] != plan["planned_type"]]
+    print(changed.to_string())
+    before, after = plan["bytes"].sum(), plan["planned_bytes"].sum()
+    print(f"{before / 2**20:,.1f} MB -> {after / 2**20:,.1f} MB ({1 - after / before:.0%} smaller)")
+
+
+def fits_budget(plan: pd.DataFrame, budget_gb: float | None = None, working_set_factor: float | None = None) -> bool:
+    """
+    Whether a stage can hold the planned frame in memory: its planned bytes times the working set factor
+    (the copies pandas makes along the way) against the memory budget from memory.yaml.
+    """
+    cfg = _memory_cfg()
+    budget_gb = cfg.get("budget_gb") if budget_gb is None else budget_gb
+    working_set_factor = cfg.get("working_set_factor", 1) if working_set_factor is None else working_set_factor
+    if budget_gb is None:
+        return True
+    return plan["planned_bytes"].sum() * working_set_factor <= budget_gb * 1024 ** 3
+
+
+def _cast(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    # Casting batch by batch keeps only one batch in the wide types at a time
+    return pa.RecordBatch.from_arrays([batch.column(f.name).cast(f.type) for f in schema], schema=schema)
+
+
+def iter_frames(source, plan: pd.DataFrame, columns: list[str] | None = None, chunk_rows: int | None = None):
+    """
+    Stream a Parquet file as pyarrow-backed DataFrames in the planned types, chunk_rows rows at a time.
+    """
+    chunk_rows = chunk_rows or _memory_cfg().get("chunk_rows", 1_000_000)
+    schema = planned_schema(plan, columns)
+    dataset = ds.dataset(_source_path(source), format="parquet")
+    for batch in dataset.to_batches(columns=schema.names, batch_size=chunk_rows):
+        yield _cast(batch, schema).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def load_parquet(source, plan: pd.DataFrame | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    fu.load_parquet in the planned types. Plans the file first when no plan is passed.
+    """
+    plan = plan_column_types(source) if plan is None else plan
+    schema = planned_schema(plan, columns)
+    print(f"Loading dataset from {_source_path(source)} in planned types")
+    dataset = ds.dataset(_source_path(source), format="parquet")
+    batches = [_cast(batch, schema) for batch in dataset.to_batches(columns=schema.names)]
+    # One dictionary per column rather than one per batch
+    table = pa.Table.from_batches(batches, schema=schema).unify_dictionaries()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
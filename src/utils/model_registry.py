@@ -0,0 +1,189 @@
+# src/utils/model_registry.py
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+import sklearn
+
+import src.utils.file_utils as fu
+
+# Models loaded in this process, keyed by paths.yaml key: (mtime_ns, size, model)
+_LOADED = {}
+
+
+def metadata_path(path: Path) -> Path:
+    return path.with_suffix(".meta.json")
+
+
+def save_model(model, path_key: str, metadata: dict | None = None) -> Path:
+    """
+    Save a model uncompressed so its numpy arrays can be memory-mapped on load, plus a
+    <name>.meta.json record with an incrementing version and whatever metadata is passed in.
+    """
+    path = fu.get_path(path_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    previous = load_metadata(path_key)
+
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+
+    record = {
+        "key": path_key,
+        "version": previous.get("version", 0) + 1,
+        "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "class": f"{type(model).__module__}.{type(model).__name__}",
+        "sklearn_version": sklearn.__version__,
+        "format": "joblib-mmap",
+        "size": path.stat().st_size,
+        **(metadata or {}),
+    }
+    with metadata_path(path).open("w") as f:
+        json.dump(record, f, indent=1, default=str)
+
+    _LOADED.pop(path_key, None)
+    print(f"Saved {path_key} v{record['version']} to {path}")
+    return path
+
+
+def load_metadata(path_key: str) -> dict:
+    """
+    The model's metadata record, or {} if it was saved before the registry existed.
+    stale is set when the model file no longer matches the record (e.g. restored from an older run).
+    """
+    path = fu.get_path(path_key)
+    meta_path = metadata_path(path)
+    if not meta_path.exists():
+        return {}
+
+    with meta_path.open() as f:
+        record = json.load(f)
+    if path.exists() and record.get("size") != path.stat().st_size:
+        record["stale"] = True
+    return record
+
+
+def load_model(path_key: str, mmap: bool = True):
+    """
+    Load a model from disk. Uncompressed models are memory-mapped read-only, so worker processes share
+    the same physical pages. gzip pickles written by older runs still load, just without mmap.
+    """
+    return joblib.load(fu.get_path(path_key), mmap_mode="r" if mmap else None)
+
+
+def get_model(path_key: str):
+    """
+    Lazily load a model on first use and reuse it for the life of the process.
+    Reloads if the file on disk has changed since it was loaded.
+    """
+    stat = fu.get_path(path_key).stat()
+    cached = _LOADED.get(path_key)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        cached = (stat.st_mtime_ns, stat.st_size, load_model(path_key))
+        _LOADED[path_key] = cached
+    return cached[2]
+
+
+def list_models() -> dict:
+    """
+    Metadata for every saved *_model pickle in paths.yaml.
+    """
+    paths = {key: fu.get_path(key) for key in fu.load_config("paths") if key.endswith("_model")}
+    return {
+        key: load_metadata(key) or {"format": "legacy"}
+        for key, path in paths.items()
+        if path.suffix == ".pkl" and path.exists()
+    }
+
+
+def _memory_mb() -> dict:
+    # Pss splits shared (e.g. memory-mapped) pages between the processes using them; Private is what this worker alone holds
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0].rstrip(":") in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {"rss": rss, "pss": rss, "private": rss}
+
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def _benchmark_worker(path: str, mmap: bool, start, results):
+    warnings.simplefilter("ignore")
+    start.wait()
+    before = _memory_mb()
+    started = time.perf_counter()
+    model = joblib.load(path, mmap_mode="r" if mmap else None)
+    load_seconds = time.perf_counter() - started
+
+    # Touch the model's arrays the way scoring would
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features and hasattr(model, "predict_proba"):
+        model.predict_proba(np.zeros((1000, n_features)))
+
+    after = _memory_mb()
+    start.wait()  # hold the pages until every worker has measured
+    results.put({"load_seconds": load_seconds, **{f"{k}_mb": after[k] - before[k] for k in after}})
+
+
+def benchmark_load(path_key: str, n_workers: int = 4) -> list[dict]:
+    """
+    Cold-load n_workers processes at once from a gzip pickle and from the uncompressed mmap format
+    and report median load time and per-worker memory added by the model.
+    """
+    model = load_model(path_key, mmap=False)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {"gzip": (Path(tmp) / "model_gzip.pkl", False), "mmap": (Path(tmp) / "model_mmap.pkl", True)}
+        joblib.dump(model, variants["gzip"][0], compress=("gzip", 3))
+        joblib.dump(model, variants["mmap"][0])
+
+        ctx = multiprocessing.get_context("spawn")
+        for fmt, (path, mmap) in variants.items():
+            start, results = ctx.Barrier(n_workers), ctx.Queue()
+            workers = [ctx.Process(target=_benchmark_worker, args=(str(path), mmap, start, results)) for _ in range(n_workers)]
+            for w in workers:
+                w.start()
+            measured = [results.get() for _ in workers]
+            for w in workers:
+                w.join()
+
+            rows.append({
+                "model": path_key,
+                "format": fmt,
+                "file_mb": round(path.stat().st_size / 2**20, 2),
+                "workers": n_workers,
+                **{k: round(statistics.median(m[k] for m in measured), 3) for k in measured[0]},
+            })
+
+    return rows
+
+
+def migrate_legacy(path_key: str) -> bool:
+    """
+    Rewrite a gzip pickle in the mmap format. Returns False if the model is already uncompressed.
+    """
+    path = fu.get_path(path_key)
+    with path.open("rb") as f:
+        is_gzip = f.read(2) == b"\x1f\x8b"
+    if not is_gzip:
+        return False
+
+    shutil.copy2(path, path.with_name(path.name + ".gz.bak"))
+    save_model(load_model(path_key, mmap=False), path_key, {"migrated_from": "gzip"})
+    return True
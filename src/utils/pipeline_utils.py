@@ -0,0 +1,133 @@
+# src/utils/pipeline_utils.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import importlib
+import json
+import multiprocessing
+import time
+
+import src.utils.file_utils as fu
+import src.utils.cache_utils as cu
+import src.utils.trace_utils as tu
+
+
+def load_stages(registry: str) -> dict:
+    """
+    registry is a module name exposing a STAGES dict, e.g. "src.helpers.pipeline_helpers".
+    """
+    return importlib.import_module(registry).STAGES
+
+
+def build_dag(stages: dict) -> dict[str, set[str]]:
+    """
+    Map each stage to the stages it depends on: B depends on A when one of B's inputs is one of A's outputs.
+    """
+    producers = {}
+    for name, stage in stages.items():
+        for out in stage["outputs"]:
+            if out in producers:
+                raise ValueError(f"{out!r} is produced by both {producers[out]!r} and {name!r}")
+            producers[out] = name
+
+    return {
+        name: {producers[key] for key in stage["inputs"] if key in producers}
+        for name, stage in stages.items()
+    }
+
+
+def topological_order(dag: dict[str, set[str]]) -> list[str]:
+    order, done = [], set()
+    remaining = dict(dag)
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if deps <= done)
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among: {sorted(remaining)}")
+        for name in ready:
+            order.append(name)
+            done.add(name)
+            remaining.pop(name)
+    return order
+
+
+def select_stages(dag: dict[str, set[str]], targets: list[str]) -> set[str]:
+    """
+    The targets plus everything upstream of them.
+    """
+    unknown = set(targets) - set(dag)
+    if unknown:
+        raise KeyError(f"Unknown pipeline stages: {sorted(unknown)}")
+
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(dag[name])
+    return selected
+
+
+def run_stage(registry: str, name: str, force: bool = False) -> bool:
+    """
+    Run one stage through the artifact cache. Executed in a worker process, so the stage is looked up by name.
+    Traced when the parent process enabled tracing (trace_utils).
+    """
+    tracing = tu.enable_from_env()
+    stage = load_stages(registry)[name]
+    config = {cfg: fu.load_config(cfg) for cfg in stage.get("config", [])}
+    if not tracing:
+        return cu.run_cached(name, stage["func"], stage["inputs"], stage["outputs"], config, stage.get("code", ()), force=force)
+
+    try:
+        with tu.span(f"stage:{name}", "stage"):
+            return cu.run_cached(name, stage["func"], stage["inputs"], stage["outputs"], config, stage.get("code", ()),
+                                 force=force)
+    finally:
+        tu.flush()
+
+
+def run_pipeline(registry: str, targets: list[str] | None = None, max_workers: int | None = None,
+                 force: bool = False) -> dict[str, str]:
+    """
+    Run the pipeline DAG, launching every stage whose dependencies are done in its own process.
+    Stages whose inputs, config and code are unchanged are restored from the cache, so re-running after a
+    failure resumes where it stopped. A failed stage only skips the stages downstream of it.
+    Returns {stage: "ran" | "cached" | "failed" | "skipped"}.
+    """
+    dag = build_dag(load_stages(registry))
+    selected = select_stages(dag, targets) if targets else set(dag)
+    pending = [name for name in topological_order(dag) if name in selected]
+
+    status, timings, running = {}, {}, {}
+    # spawn keeps pyarrow / BLAS thread pools out of forked children
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = dag[name] & selected
+                if any(status.get(d) in ("failed", "skipped") for d in deps):
+                    status[name] = "skipped"
+                    pending.remove(name)
+                elif all(status.get(d) in ("ran", "cached") for d in deps):
+                    print(f"Starting {name}")
+                    running[pool.submit(run_stage, registry, name, force)] = (name, time.perf_counter())
+                    pending.remove(name)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                timings[name] = round(time.perf_counter() - started, 3)
+                try:
+                    status[name] = "ran" if future.result() else "cached"
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"{name}: failed ({type(e).__name__}: {e})")
+                print(f"Finished {name}: {status[name]} in {timings[name]}s")
+
+    state_path = fu.get_path("pipeline_state")
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    with state_path.open("w") as f:
+        json.dump({"finished": time.time(), "status": status, "seconds": timings}, f, indent=1)
+
+    return status
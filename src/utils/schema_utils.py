@@ -1,4 +1,21 @@
 # src/utils/schema_utils.py
+import pyarrow as pa
+
+# schema.yaml dtype -> Arrow type. Bool is absent on purpose: those columns arrive as "1"/"2" codes
+# and are mapped to int8 flags during cleaning, so they stay strings until then.
+ARROW_TYPES = {
+    "Int8": pa.int8(),
+    "Int16": pa.int16(),
+    "Int32": pa.int32(),
+    "Int64": pa.int64(),
+    "Float32": pa.float32(),
+    "Float64": pa.float64(),
+    "string": pa.string(),
+}
+
+# Stable per-application key added during cleaning. It identifies rows for splits and is never a model feature.
+ROW_KEY = "row_key"
+
 
 def get_columns_by_attribute(cfg_schema: dict, attr: str, value) -> list[str]:
     """
@@ -9,4 +26,15 @@ def get_columns_by_attribute(cfg_schema: dict, attr: str, value) -> list[str]:
     return [
         name for name, spec in cols.items()
         if isinstance(spec, dict) and spec.get(attr) == value
-    ]
\ No newline at end of file
+    ]
+
+
+def get_arrow_type(cfg_schema: dict, col: str) -> pa.DataType | None:
+    """
+    Return the Arrow type for a column's schema.yaml dtype, or None when the column
+    isn't in the schema or its dtype has no direct Arrow equivalent.
+    """
+    spec = (cfg_schema.get("columns", {}) or {}).get(col)
+    if not isinstance(spec, dict):
+        return None
+    return ARROW_TYPES.get(str(spec.get("dtype", "")))
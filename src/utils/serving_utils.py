@@ -0,0 +1,183 @@
+# src/utils/serving_utils.py
+from __future__ import annotations
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def latency_summary(seconds, prefix: str = "") -> dict:
+    """
+    Count, mean, p50, p99 and max of a list of latencies in seconds, reported in milliseconds.
+    """
+    ms = np.asarray(seconds, dtype=float) * 1000
+    if ms.size == 0:
+        return {f"{prefix}count": 0, f"{prefix}mean_ms": None, f"{prefix}p50_ms": None,
+                f"{prefix}p99_ms": None, f"{prefix}max_ms": None}
+
+    return {
+        f"{prefix}count": int(ms.size),
+        f"{prefix}mean_ms": round(float(ms.mean()), 3),
+        f"{prefix}p50_ms": round(float(np.percentile(ms, 50)), 3),
+        f"{prefix}p99_ms": round(float(np.percentile(ms, 99)), 3),
+        f"{prefix}max_ms": round(float(ms.max()), 3),
+    }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent scoring requests into one DataFrame so the model runs one predict per batch
+    instead of one per request. A batch is flushed when it reaches max_batch_rows or when the oldest
+    request has waited max_wait_ms.
+    score_fn takes a DataFrame and returns one score per row.
+    """
+
+    def __init__(self, score_fn, max_batch_rows: int = 1024, max_wait_ms: float = 5.0, window: int = 10_000):
+        self.score_fn = score_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._rows = 0
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, records: list[dict]) -> list[float]:
+        """
+        Score a list of row dicts; blocks until the batch containing them has been scored.
+        """
+        records = list(records)
+        if not records:
+            return []
+        item = {"records": records, "enqueued": time.perf_counter(), "done": threading.Event()}
+        self._queue.put(item)
+        item["done"].wait()
+        if "error" in item:
+            raise item["error"]
+        return item["scores"]
+
+    def _collect(self, items: list[dict]) -> None:
+        # Appends to the caller's list, so whatever was taken off the queue can be failed if collecting raises
+        items.append(self._queue.get())
+        n_rows = len(items[0]["records"])
+        deadline = items[0]["enqueued"] + self.max_wait
+        while n_rows < self.max_batch_rows:
+            # Requests that queued up while the last batch was scoring are taken without waiting
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            n_rows += len(item["records"])
+
+    def _score(self, items: list[dict]) -> None:
+        records = [r for item in items for r in item["records"]]
+        scores = np.asarray(self.score_fn(pd.DataFrame.from_records(records)), dtype=float).tolist()
+        start = 0
+        for item in items:
+            end = start + len(item["records"])
+            item["scores"] = scores[start:end]
+            start = end
+
+    def _score_isolated(self, items: list[dict]) -> None:
+        try:
+            self._score(items)
+        except Exception:
+            # One malformed request should not fail the others it was batched with
+            for item in items:
+                try:
+                    self._score([item])
+                except Exception as e:
+                    item["error"] = e
+
+    def _run(self):
+        while True:
+            items = []
+            try:
+                self._collect(items)
+                self._score_isolated(items)
+                finished = time.perf_counter()
+                with self._lock:
+                    for item in items:
+                        if "error" not in item:
+                            self._rows += len(item["records"])
+                            self._latencies.append(finished - item["enqueued"])
+                    self._batch_sizes.append(sum(len(item["records"]) for item in items))
+            except Exception as e:
+                # The thread must outlive any error, or every later submit would wait forever
+                for item in items:
+                    if "scores" not in item:
+                        item.setdefault("error", e)
+            for item in items:
+                item["done"].set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            sizes = list(self._batch_sizes)
+            return {
+                "rows": self._rows,
+                "rows_per_sec": round(self._rows / elapsed, 1) if elapsed else None,
+                "mean_batch_rows": round(float(np.mean(sizes)), 1) if sizes else None,
+                **latency_summary(list(self._latencies), prefix="request_"),
+            }
+
+
+def make_server(batcher: MicroBatcher, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """
+    Local HTTP endpoint in front of a MicroBatcher:
+    - POST /score  {"rows": [{column: value, ...}, ...]} -> {"scores": [...]}
+    - GET  /stats  throughput and request latency percentiles
+    - GET  /health
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, batcher.stats())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                rows = payload["rows"] if isinstance(payload, dict) else payload
+                if isinstance(rows, dict):
+                    rows = [rows]
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": f"expected {{\"rows\": [...]}}: {e}"})
+                return
+            try:
+                self._send(200, {"scores": batcher.submit(rows)})
+            except KeyError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate latency under load; /stats has the numbers
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,172 @@
+# src/utils/sketch_utils.py
+from __future__ import annotations
+
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang & Liberty). Keeps O(k log n) values; rank error is roughly 1.7 / k.
+    Level h holds items that each stand for 2**h original values. Seeded, so the same input gives the same sketch.
+    Sketches that will be merged need distinct seeds (e.g. partial_seed(i) for the i-th partial), otherwise their
+    compactions drop the same halves and the errors add up instead of cancelling.
+    """
+
+    def __init__(self, k: int = 1024, seed=42):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            buf = self.levels[level]
+            if len(buf) <= self._capacity(level):
+                level += 1
+                continue
+
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            buf = np.sort(buf)
+            # An odd item out stays at this level; every other item of the rest moves up with double weight
+            keep = len(buf) % 2
+            promoted = buf[keep:][self._rng.integers(2)::2]
+            self.levels[level] = buf[:keep]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Adding a level shrinks the capacity of those below it, so start over from the bottom
+            level = 0
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(buf), 2.0 ** h) for h, buf in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q) -> np.ndarray:
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan)
+        items, cum = self._weighted()
+        idx = np.searchsorted(cum, np.asarray(q) * cum[-1], side="left").clip(max=len(items) - 1)
+        return items[idx]
+
+    def cdf(self, x, strict: bool = False) -> np.ndarray:
+        """
+        Approximate share of values <= x (< x with strict=True).
+        """
+        if self.n == 0:
+            return np.full(np.shape(x), np.nan)
+        items, cum = self._weighted()
+        pos = np.searchsorted(items, x, side="left" if strict else "right")
+        return np.where(pos > 0, cum[np.maximum(pos - 1, 0)], 0.0) / cum[-1]
+
+
+def partial_seed(*index: int, seed: int = 42) -> np.random.SeedSequence:
+    """
+    Independent, reproducible seed for the partial sketch at index (e.g. batch number, column number).
+    """
+    return np.random.SeedSequence(seed, spawn_key=index)
+
+
+def moments(values: np.ndarray) -> np.ndarray:
+    """
+    [n, mean, M2, M3, M4] of the finite values, where Mp is the sum of p-th powers of deviations from the mean.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    n = len(values)
+    if n == 0:
+        return np.zeros(5)
+
+    mean = values.mean()
+    d = values - mean
+    d2 = d * d
+    return np.array([n, mean, d2.sum(), (d2 * d).sum(), (d2 * d2).sum()])
+
+
+def merge_moments(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Combine two moment accumulators exactly (Pebay's pairwise update).
+    """
+    na, ma, m2a, m3a, m4a = a
+    nb, mb, m2b, m3b, m4b = b
+    n = na + nb
+    if na == 0 or nb == 0:
+        return (a if nb == 0 else b).copy()
+
+    d = mb - ma
+    mean = ma + d * nb / n
+    m2 = m2a + m2b + d ** 2 * na * nb / n
+    m3 = m3a + m3b + d ** 3 * na * nb * (na - nb) / n ** 2 + 3 * d * (na * m2b - nb * m2a) / n
+    m4 = (m4a + m4b + d ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+          + 6 * d ** 2 * (na ** 2 * m2b + nb ** 2 * m2a) / n ** 2 + 4 * d * (na * m3b - nb * m3a) / n)
+    return np.array([n, mean, m2, m3, m4])
+
+
+def skew_from_moments(m: np.ndarray) -> float:
+    # Biased (population) skew, the scipy.stats.skew default
+    n, _, m2, m3, _ = m
+    return float(np.sqrt(n) * m3 / m2 ** 1.5) if n and m2 > 0 else np.nan
+
+
+def kurtosis_from_moments(m: np.ndarray) -> float:
+    # Biased excess (Fisher) kurtosis, the scipy.stats.kurtosis default
+    n, _, m2, _, m4 = m
+    return float(n * m4 / m2 ** 2 - 3) if n and m2 > 0 else np.nan
+
+
+class ColumnProfile:
+    """
+    Everything profile_numeric_columns needs for one column, mergeable across batches:
+    row and null counts, min/max, exact moments and a KLL quantile sketch.
+    """
+
+    def __init__(self, k: int = 1024, seed=42):
+        self.rows = 0
+        self.nulls = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.moments = np.zeros(5)
+        self.sketch = KLLSketch(k, seed)
+
+    def update(self, values: np.ndarray) -> "ColumnProfile":
+        values = np.asarray(values, dtype=np.float64)
+        finite = values[np.isfinite(values)]
+        self.rows += len(values)
+        self.nulls += int(np.isnan(values).sum())
+        if len(finite):
+            self.min = min(self.min, finite.min())
+            self.max = max(self.max, finite.max())
+        self.moments = merge_moments(self.moments, moments(finite))
+        self.sketch.update(finite)
+        return self
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.moments = merge_moments(self.moments, other.moments)
+        self.sketch.merge(other.sketch)
+        return self
@@ -0,0 +1,269 @@
+# src/utils/trace_utils.py
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+import functools
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import resource
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Set by enable(); spawned worker processes (pipeline stages) read it and trace into the same directory
+TRACE_DIR_ENV = "HMDA_TRACE_DIR"
+PACKAGES = ["src.utils", "src.helpers"]
+# Called too often, and too cheap, to be worth a span each
+SKIP = {"src.utils.file_utils.get_path", "src.helpers.encoding_helpers.to_arrow"}
+
+_patched = []  # (owner, attribute, original) to restore on disable()
+_spans = []
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _io_bytes() -> tuple[int, int]:
+    # Bytes passed through read/write calls by the whole process (files, pipes and page cache hits alike)
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except OSError:
+        return 0, 0
+
+
+def _rows(obj) -> int | None:
+    if isinstance(obj, (pd.DataFrame, pd.Series, pa.Table, pa.RecordBatch)):
+        return len(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.shape[0] if obj.ndim else None
+    if isinstance(obj, (tuple, list)) and obj and not isinstance(obj[0], (tuple, list)):
+        return _rows(obj[0])
+    return None
+
+
+def _first_rows(args, kwargs) -> int | None:
+    return next((n for n in map(_rows, [*args, *kwargs.values()]) if n is not None), None)
+
+
+@contextmanager
+def span(name: str, category: str = "", rows_in: int | None = None):
+    """
+    Record one span: wall and CPU time, RSS change, peak RSS growth, bytes read / written and nesting depth.
+    The context value is a dict; set its "rows_out" to record output rows.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    info = {"rows_out": None}
+    started_ns, cpu_started = time.time_ns(), time.process_time()
+    rss, maxrss = _rss_mb(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    read, written = _io_bytes()
+    stack.append(name)
+    error = None
+    try:
+        yield info
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        stack.pop()
+        read_end, written_end = _io_bytes()
+        record = {
+            "name": name,
+            "category": category,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "depth": len(stack),
+            "start_us": started_ns // 1000,
+            "wall_s": (time.time_ns() - started_ns) / 1e9,
+            "cpu_s": time.process_time() - cpu_started,
+            "rss_delta_mb": _rss_mb() - rss,
+            "peak_rss_delta_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - maxrss) / 1024,
+            "rows_in": rows_in,
+            "rows_out": info["rows_out"],
+            "bytes_read": read_end - read,
+            "bytes_written": written_end - written,
+            "error": error,
+        }
+        with _lock:
+            _spans.append(record)
+
+
+def traced(func, name: str | None = None):
+    """
+    func wrapped in a span named module.qualname, with rows in from the first table-like argument
+    and rows out from the result.
+    """
+    name = name or f"{func.__module__}.{func.__qualname__}"
+    category = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name, category, _first_rows(args, kwargs)) as info:
+            result = func(*args, **kwargs)
+            info["rows_out"] = _rows(result)
+            return result
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def _public_functions(module):
+    # Generators are left alone: their body runs interleaved with the caller's, so a span would time neither
+    for attr, obj in vars(module).items():
+        if attr.startswith("_") or getattr(obj, "__module__", None) != module.__name__:
+            continue
+        if inspect.isfunction(obj) and not inspect.isgeneratorfunction(obj):
+            yield module, attr, obj
+        elif inspect.isclass(obj):
+            for method, fn in vars(obj).items():
+                if not method.startswith("_") and inspect.isfunction(fn) and not inspect.isgeneratorfunction(fn):
+                    yield obj, method, fn
+
+
+def _modules(packages: list[str]):
+    for package in packages:
+        pkg = importlib.import_module(package)
+        for info in pkgutil.iter_modules(pkg.__path__):
+            name = f"{package}.{info.name}"
+            if name == __name__:
+                continue
+            try:
+                yield importlib.import_module(name)
+            except ImportError as e:
+                # A helper whose optional dependency is missing (e.g. catboost) is simply not traced
+                print(f"Not tracing {name}: {e}")
+
+
+def enable(trace_dir: str | Path | None = None, packages: list[str] | None = None, fresh: bool = False) -> Path:
+    """
+    Wrap every public function and class method in src.utils and src.helpers in a span, and trace into
+    trace_dir (default: the trace_dir path key). Calls through the module (fu.load_parquet) and within it
+    are both traced. Nothing is wrapped until this runs, so tracing costs nothing when off.
+    fresh deletes the spans of earlier runs in trace_dir.
+    """
+    import src.utils.file_utils as fu
+    trace_dir = Path(trace_dir or os.environ.get(TRACE_DIR_ENV) or fu.get_path("trace_dir"))
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    if fresh:
+        for path in trace_dir.glob("spans-*.jsonl"):
+            path.unlink()
+    os.environ[TRACE_DIR_ENV] = str(trace_dir)
+    if _patched:
+        return trace_dir
+
+    for module in _modules(packages or PACKAGES):
+        for owner, attr, fn in _public_functions(module):
+            if getattr(fn, "__traced__", False) or f"{fn.__module__}.{fn.__qualname__}" in SKIP:
+                continue
+            setattr(owner, attr, traced(fn))
+            _patched.append((owner, attr, fn))
+    return trace_dir
+
+
+def enable_from_env() -> bool:
+    """
+    Turn tracing on in a worker process when the parent enabled it.
+    """
+    if os.environ.get(TRACE_DIR_ENV):
+        enable(os.environ[TRACE_DIR_ENV])
+        return True
+    return False
+
+
+def disable():
+    flush()
+    while _patched:
+        owner, attr, fn = _patched.pop()
+        setattr(owner, attr, fn)
+    os.environ.pop(TRACE_DIR_ENV, None)
+
+
+def is_enabled() -> bool:
+    return bool(_patched)
+
+
+def flush() -> Path | None:
+    """
+    Append this process's spans to spans-<pid>.jsonl in the trace directory.
+    """
+    trace_dir = os.environ.get(TRACE_DIR_ENV)
+    with _lock:
+        records = list(_spans)
+        _spans.clear()
+    if not trace_dir or not records:
+        return None
+    path = Path(trace_dir) / f"spans-{os.getpid()}.jsonl"
+    with path.open("a") as f:
+        f.writelines(json.dumps(r) + "\n" for r in records)
+    return path
+
+
+def load_spans(trace_dir: str | Path) -> pd.DataFrame:
+    lines = [json.loads(line) for path in sorted(Path(trace_dir).glob("spans-*.jsonl")) for line in path.open()]
+    return pd.DataFrame(lines)
+
+
+def summarize(spans: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per traced function: calls, total and mean wall seconds, CPU seconds, largest peak RSS growth,
+    rows and bytes, slowest first.
+    """
+    summary = spans.groupby("name").agg(
+        calls=("wall_s", "size"),
+        wall_s=("wall_s", "sum"),
+        mean_wall_s=("wall_s", "mean"),
+        cpu_s=("cpu_s", "sum"),
+        peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+        rows_in=("rows_in", "sum"),
+        rows_out=("rows_out", "sum"),
+        bytes_read=("bytes_read", "sum"),
+        bytes_written=("bytes_written", "sum"),
+    )
+    return summary.sort_values("wall_s", ascending=False)
+
+
+def chrome_trace(spans: pd.DataFrame) -> dict:
+    """
+    Spans as Chrome trace complete events, for chrome://tracing or ui.perfetto.dev.
+    """
+    events = []
+    for record in spans.to_dict("records"):
+        args = {k: record[k] for k in ("cpu_s", "rss_delta_mb", "peak_rss_delta_mb", "rows_in", "rows_out",
+                                       "bytes_read", "bytes_written", "error") if pd.notna(record[k])}
+        events.append({"name": record["name"], "cat": record["category"], "ph": "X", "ts": record["start_us"],
+                       "dur": int(record["wall_s"] * 1e6), "pid": record["pid"], "tid": record["tid"], "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export(trace_dir: str | Path | None = None) -> tuple[Path, Path]:
+    """
+    Merge the span files of every traced process into trace.json (spans and per-function summary)
+    and trace.chrome.json. Returns both paths.
+    """
+    flush()
+    trace_dir = Path(trace_dir or os.environ[TRACE_DIR_ENV])
+    spans = load_spans(trace_dir)
+    if spans.empty:
+        raise ValueError(f"No spans recorded in {trace_dir}")
+
+    json_path, chrome_path = trace_dir / "trace.json", trace_dir / "trace.chrome.json"
+    with json_path.open("w") as f:
+        json.dump({"spans": json.loads(spans.to_json(orient="records")),
+                   "summary": json.loads(summarize(spans).reset_index().to_json(orient="records"))}, f, indent=1)
+    with chrome_path.open("w") as f:
+        json.dump(chrome_trace(spans), f)
+    print(f"Saved trace to {json_path} and {chrome_path}")
+    return json_path, chrome_path